@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+
+"""
+Record store load benchmark
+
+Writes synthetic doctor and appointment stores to a temporary directory and
+times building models from them the way the services used to (json.load
+plus full Pydantic validation per record) against load_records with and
+without the trusted path taken for files carrying our schema stamp.
+
+    python benchmarks/bench_load.py
+    python benchmarks/bench_load.py --records 10000 --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schedulur.models.appointment import Appointment
+from schedulur.models.doctor import Doctor
+from schedulur.services.appointment_service import AppointmentService
+from schedulur.services.doctor_service import DoctorService
+from schedulur.storage.blob_store import BlobStore
+from schedulur.storage.records import build_models, load_records, save_records
+
+
+def make_doctors(count):
+    return {
+        f"doctor-{i}": {
+            "id": f"doctor-{i}",
+            "name": f"Dr. Example {i}",
+            "specialization": ["Cardiology", "Dermatology", "Primary Care"][i % 3],
+            "phone": "555-0100",
+            "address": f"{i} Main St",
+            "city": "Springfield",
+            "state": "IL",
+            "zip_code": "62701",
+            "accepted_insurance": ["Aetna", "Blue Cross"],
+            "appointment_duration": 30,
+            "availability": {"days": [0, 2, 4], "time_slots": [{"day": 0, "start": "09:00", "end": "17:00"}]},
+            "has_been_called": False,
+            "user_approval": None
+        } for i in range(count)
+    }
+
+
+def make_appointments(count):
+    start = datetime(2026, 1, 5, 9)
+    records = {}
+    for i in range(count):
+        begins = start + timedelta(minutes=30 * i)
+        records[f"appt-{i}"] = {
+            "id": f"appt-{i}",
+            "user_id": "user-1",
+            "doctor_id": f"doctor-{i % 500}",
+            "start_time": begins.isoformat(),
+            "end_time": (begins + timedelta(minutes=30)).isoformat(),
+            "status": "requested",
+            "reason": "Checkup",
+            "virtual": False,
+            "call_transcript_ref": None,
+            "call_timestamp": (begins - timedelta(days=3)).isoformat(),
+            "call_duration_seconds": 120
+        }
+    return records
+
+
+def time_load(load, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        load()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark trusted vs validated record loads")
+    parser.add_argument("--records", type=int, default=100_000, help="Records per store")
+    parser.add_argument("--runs", type=int, default=3, help="Timed loads per variant")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = BlobStore(os.path.join(root, "transcripts"))
+        doctors = DoctorService(os.path.join(root, "empty.json"), transcript_store=store)
+
+        stores = {
+            "doctors": (Doctor, make_doctors(args.records),
+                        lambda path: DoctorService(path, transcript_store=store)),
+            "appointments": (Appointment, make_appointments(args.records),
+                             lambda path: AppointmentService(path, doctor_service=doctors, transcript_store=store))
+        }
+
+        print(f"{args.records:,} records, median of {args.runs} loads")
+        for name, (model_cls, records, service) in stores.items():
+            path = os.path.join(root, f"{name}.json")
+            save_records(path, records)
+
+            def unstamped():
+                # What the services did before records were stamped
+                with open(path) as f:
+                    data = json.load(f)["records"]
+                return {key: model_cls(**value) for key, value in data.items()}
+
+            def validated():
+                data, _ = load_records(path)
+                return build_models(model_cls, data)
+
+            def trusted():
+                data, _ = load_records(path)
+                return build_models(model_cls, data, trusted=True)
+
+            unstamped_ms = time_load(unstamped, args.runs)
+            validated_ms = time_load(validated, args.runs)
+            trusted_ms = time_load(trusted, args.runs)
+            service_ms = time_load(lambda: service(path), args.runs)
+            print(f"  {name}")
+            print(f"    json.load + Model(**record)   {unstamped_ms:8.1f} ms")
+            print(f"    load_records, validated       {validated_ms:8.1f} ms")
+            print(f"    load_records, trusted         {trusted_ms:8.1f} ms  ({unstamped_ms / trusted_ms:3.1f}x)")
+            print(f"    service constructor           {service_ms:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
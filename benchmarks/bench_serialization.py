@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+
+"""
+Appointment store round-trip benchmark
+
+Saves and reloads a synthetic appointment store the way the services did
+before the serialization layer (hand-built dicts, json.dump with indent=2,
+json.load plus fromisoformat and validation) and the way they do now
+(model_dump, compact orjson or stdlib output, trusted load).
+
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --records 10000 --stdlib
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schedulur.models.appointment import Appointment
+from schedulur.storage import serialization
+from schedulur.storage.records import build_models, load_records, save_records
+
+
+def make_appointments(count):
+    start = datetime(2026, 1, 5, 9)
+    appointments = {}
+    for i in range(count):
+        begins = start + timedelta(minutes=30 * i)
+        appointments[f"appt-{i}"] = Appointment(
+            id=f"appt-{i}", user_id="user-1", doctor_id=f"doctor-{i % 500}",
+            start_time=begins, end_time=begins + timedelta(minutes=30),
+            reason="Checkup", call_timestamp=begins - timedelta(days=3), call_duration_seconds=120)
+    return appointments
+
+
+def legacy_to_dict(appointment):
+    return {
+        "id": appointment.id,
+        "user_id": appointment.user_id,
+        "doctor_id": appointment.doctor_id,
+        "start_time": appointment.start_time.isoformat() if appointment.start_time else None,
+        "end_time": appointment.end_time.isoformat() if appointment.end_time else None,
+        "status": appointment.status,
+        "reason": appointment.reason,
+        "notes": appointment.notes,
+        "location": appointment.location,
+        "virtual": appointment.virtual,
+        "call_transcript_ref": appointment.call_transcript_ref,
+        "call_timestamp": appointment.call_timestamp.isoformat() if appointment.call_timestamp else None,
+        "call_duration_seconds": appointment.call_duration_seconds,
+        "calendar_event_id": appointment.calendar_event_id
+    }
+
+
+def legacy_save(path, appointments):
+    with open(path, 'w') as f:
+        json.dump({key: legacy_to_dict(a) for key, a in appointments.items()}, f, indent=2)
+
+
+def legacy_load(path):
+    with open(path, 'r') as f:
+        data = json.load(f)
+    loaded = {}
+    for key, record in data.items():
+        for field in ("start_time", "end_time", "call_timestamp"):
+            if isinstance(record.get(field), str):
+                record[field] = datetime.fromisoformat(record[field])
+        loaded[key] = Appointment(**record)
+    return loaded
+
+
+def current_save(path, appointments):
+    save_records(path, {key: a.to_dict() for key, a in appointments.items()})
+
+
+def current_load(path):
+    records, trusted = load_records(path)
+    return build_models(Appointment, records, trusted)
+
+
+def median_ms(func, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark appointment store save/load")
+    parser.add_argument("--records", type=int, default=100_000, help="Appointments in the store")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per step")
+    parser.add_argument("--stdlib", action="store_true", help="Time the stdlib fallback instead of orjson")
+    args = parser.parse_args()
+
+    appointments = make_appointments(args.records)
+    encoder = "stdlib json" if args.stdlib or not serialization.orjson else "orjson"
+
+    with tempfile.TemporaryDirectory() as root, \
+            mock.patch.object(serialization, "orjson", None if args.stdlib else serialization.orjson):
+        legacy_path = os.path.join(root, "legacy.json")
+        current_path = os.path.join(root, "current.json")
+
+        rows = [
+            ("legacy save", median_ms(lambda: legacy_save(legacy_path, appointments), args.runs), legacy_path),
+            ("legacy load", median_ms(lambda: legacy_load(legacy_path), args.runs), None),
+            (f"save ({encoder})", median_ms(lambda: current_save(current_path, appointments), args.runs), current_path),
+            (f"load ({encoder})", median_ms(lambda: current_load(current_path), args.runs), None),
+        ]
+
+        assert current_load(current_path) == appointments
+
+        print(f"{args.records:,} appointments, median of {args.runs} runs")
+        for label, elapsed, path in rows:
+            size = f"{os.path.getsize(path) / 1e6:6.1f} MB" if path else ""
+            print(f"  {label:<22} {elapsed:8.1f} ms  {size}")
+
+
+if __name__ == "__main__":
+    main()
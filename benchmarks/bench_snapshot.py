@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+"""
+Cold-start lookup benchmark
+
+Times what a freshly started process pays to answer one get_doctor(id):
+loading the whole JSON store versus opening the memory-mapped snapshot and
+decoding the single record. Each run uses a new DoctorService so nothing is
+cached between runs.
+
+    python benchmarks/bench_snapshot.py
+    python benchmarks/bench_snapshot.py --records 50000 --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schedulur.models.doctor import Doctor
+from schedulur.services.doctor_service import DoctorService
+from schedulur.storage import snapshot
+from schedulur.storage.blob_store import BlobStore
+from schedulur.storage.records import STORE_FORMAT_ENV, snapshot_path
+
+
+def make_doctors(count):
+    return {
+        f"doctor-{i}": Doctor(
+            id=f"doctor-{i}", name=f"Dr. {i}", specialization="Cardiology",
+            accepted_insurance=["Aetna", "Cigna"], phone="555-0100", address=f"{i} Main St",
+            available_times=[{"day": day, "start_time": "09:00", "end_time": "17:00"} for day in range(5)])
+        for i in range(count)
+    }
+
+
+def cold_lookup_ms(path, store, doctor_id, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        DoctorService(data_file=path, transcript_store=store).get_doctor(doctor_id)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold get_doctor from JSON and snapshot stores")
+    parser.add_argument("--records", type=int, default=20_000, help="Doctors in the store")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per format")
+    args = parser.parse_args()
+
+    doctors = make_doctors(args.records)
+    doctor_id = f"doctor-{args.records // 2}"
+    codec = "msgpack" if snapshot.msgpack else "json"
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "doctors.json")
+        store = BlobStore(os.path.join(root, "transcripts"))
+
+        writer = DoctorService(data_file=path, transcript_store=store)
+        writer.doctors = doctors
+        with mock.patch.dict(os.environ, {STORE_FORMAT_ENV: "json"}):
+            writer.save_doctors()
+            json_ms = cold_lookup_ms(path, store, doctor_id, args.runs)
+        with mock.patch.dict(os.environ, {STORE_FORMAT_ENV: "snapshot"}):
+            writer.save_doctors()
+            snapshot_ms = cold_lookup_ms(path, store, doctor_id, args.runs)
+            assert DoctorService(data_file=path, transcript_store=store).get_doctor(doctor_id) == doctors[doctor_id]
+
+        print(f"{args.records:,} doctors, cold get_doctor, median of {args.runs} runs")
+        print(f"  {'json load':<22} {json_ms:8.1f} ms  {os.path.getsize(path) / 1e6:6.1f} MB")
+        print(f"  {f'snapshot ({codec})':<22} {snapshot_ms:8.1f} ms  "
+              f"{os.path.getsize(snapshot_path(path)) / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+"""
+CLI startup benchmark
+
+Times cold runs of a schedulur command in fresh interpreters and compares
+them with a bare interpreter, so the number reported is what the command
+itself adds on top of Python startup.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 --command "user show" --imports
+"""
+
+import argparse
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_command(argv, runs):
+    """Run a command repeatedly and return wall-clock times in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def top_imports(argv, count):
+    """Slowest imports (cumulative microseconds) for one run"""
+    result = subprocess.run([argv[0], "-X", "importtime"] + argv[1:], cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark schedulur CLI cold start")
+    parser.add_argument("--command", default="user show", help="schedulur command to time")
+    parser.add_argument("--runs", type=int, default=10, help="Number of cold runs")
+    parser.add_argument("--imports", action="store_true", help="Also show the slowest imports")
+    args = parser.parse_args()
+
+    baseline = time_command([sys.executable, "-c", "pass"], args.runs)
+    command = [sys.executable, "-m", "schedulur"] + shlex.split(args.command)
+    timings = time_command(command, args.runs)
+
+    print(f"python -c pass:          median {statistics.median(baseline):7.1f} ms  min {min(baseline):7.1f} ms")
+    print(f"schedulur {args.command:<14} median {statistics.median(timings):7.1f} ms  min {min(timings):7.1f} ms")
+    print(f"added by schedulur:      median {statistics.median(timings) - statistics.median(baseline):7.1f} ms")
+
+    if args.imports:
+        print("\nSlowest imports (cumulative):")
+        for cumulative, name in top_imports(command, 15):
+            print(f"  {cumulative / 1000:7.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+
+"""
+Benchmark suite
+
+Times the doctor store, doctor search, slot finding, the provider optimizer
+and webhook ingestion on synthetic data in a temporary directory. Results
+are written as JSON and can be saved as a baseline that later runs are
+compared against, so a change that makes any of them slower shows up:
+
+    python benchmarks/bench_suite.py --save-baseline
+    python benchmarks/bench_suite.py --compare
+    python benchmarks/bench_suite.py --quick -k slots
+
+--compare exits non-zero when a benchmark's median is more than
+--threshold slower than the baseline's. Baselines are machine-specific:
+record one before a change and compare after it on the same machine.
+"""
+
+import argparse
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, NamedTuple, Optional
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schedulur import web_app
+from schedulur.container import ServiceContainer, set_container
+from schedulur.events import EventBus
+from schedulur.integrations.calendar import CalendarService
+from schedulur.models.appointment import Appointment
+from schedulur.models.doctor import Doctor
+from schedulur.models.provider import Provider
+from schedulur.models.user import User, UserAvailability
+from schedulur.services import provider_service
+from schedulur.services.appointment_service import AppointmentService
+from schedulur.services.call_analytics_service import CallAnalyticsService
+from schedulur.services.doctor_search_service import DoctorSearchService
+from schedulur.services.doctor_service import DoctorService
+from schedulur.services.office_knowledge_service import OfficeKnowledgeService
+from schedulur.storage.blob_store import BlobStore
+from schedulur.storage.records import STORE_FORMAT_ENV
+from schedulur.storage.serialization import read_file, write_file
+from schedulur.storage.transcript_index import TranscriptIndex
+from schedulur.utils.scheduling import SchedulingOptimizer
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, "latest.json")
+
+SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+class Benchmark(NamedTuple):
+    name: str
+    run: Callable[[], object]
+    # Operations one call performs, for the throughput column
+    ops: int = 1
+    # Override --runs (the largest stores take one run)
+    runs: Optional[int] = None
+
+
+def parse_count(value: str) -> int:
+    value = value.strip().lower()
+    if value[-1:] in SUFFIXES:
+        return int(float(value[:-1]) * SUFFIXES[value[-1]])
+    return int(value)
+
+
+def label(count: int) -> str:
+    for suffix, size in (("M", 1_000_000), ("k", 1_000)):
+        if count >= size and count % size == 0:
+            return f"{count // size}{suffix}"
+    return str(count)
+
+
+def make_doctors(count):
+    specializations = ["Cardiology", "Dermatology", "Primary Care"]
+    return {
+        f"doctor-{i}": Doctor(
+            id=f"doctor-{i}", name=f"Dr. Example {i}", specialization=specializations[i % 3],
+            accepted_insurance=["Aetna", "Blue Cross"], phone="555-0100", address=f"{i} Main St",
+            city="Springfield", state="IL", zip_code="62701",
+            available_times=[{"day": day, "start_time": "09:00", "end_time": "17:00"} for day in range(5)])
+        for i in range(count)
+    }
+
+
+def make_providers(count):
+    return [
+        Provider(id=f"provider-{i}", name=f"Dr. Provider {i}", specialization="Cardiology",
+                 location="Clinic", email=f"p{i}@example.com", phone="555-0100",
+                 accepted_insurance=["Aetna"] if i % 4 else ["Cigna"], appointment_duration=30,
+                 available_times=[{"day": day, "start_time": "09:00", "end_time": "17:00"}
+                                  for day in range(5) if (i + day) % 3])
+        for i in range(count)
+    ]
+
+
+def dense_calendar(start, days):
+    """A 30-minute meeting every hour, 8:00 to 18:00, every day"""
+    events = []
+    for day in range(days):
+        date = start + timedelta(days=day)
+        for hour in range(8, 18):
+            begins = date.replace(hour=hour, minute=15 * (hour % 3))
+            events.append({"id": f"event-{day}-{hour}", "title": "Busy",
+                           "start": begins, "end": begins + timedelta(minutes=30)})
+    return events
+
+
+def webhook_payload(i):
+    return {
+        "event": "call_analyzed",
+        "call": {
+            "call_id": f"call-{i}",
+            "agent_id": f"agent-{i % 3}",
+            "call_status": "ended",
+            "start_timestamp": 1745712084853 + i * 60_000,
+            "end_timestamp": 1745712123835 + i * 60_000,
+            "duration_ms": 38982,
+            "transcript": "Agent: Hi, are you accepting new patients?\nUser: We are, and we take Aetna.\n",
+            "disconnection_reason": "agent_hangup",
+            "latency": {"e2e": {"values": [2313, 2341, 3224]}, "llm": {"values": [2009, 1693, 2635]}},
+            "call_cost": {"combined_cost": 9.425},
+            "metadata": {"doctor_id": f"doctor-{i % 50}", "user_id": f"user-{i % 20}", "insurance": "Aetna"},
+            "call_analysis": {"custom_analysis_data": {
+                "accepts_insurance": True, "accepting_new_patients": True, "appointment_booked": False,
+                "scheduled_appointment": "", "additional_information": ""}},
+        },
+    }
+
+
+def selected(args, name: str) -> bool:
+    return not args.keyword or any(keyword in name for keyword in args.keyword)
+
+
+def make_appointment_service(root, name, store):
+    doctors = DoctorService(os.path.join(root, f"{name}-doctors.json"), transcript_store=store)
+    return AppointmentService(os.path.join(root, f"{name}-appointments.json"), doctor_service=doctors,
+                              transcript_store=store, transcript_index=mock.Mock(), office_knowledge=mock.Mock(),
+                              approval_service=mock.Mock(), event_bus=EventBus())
+
+
+def store_benchmarks(root, args) -> Iterator[Benchmark]:
+    """DoctorService save, cold open and full read, per size and store format"""
+    store = BlobStore(os.path.join(root, "transcripts"))
+    for count in args.sizes:
+        if not any(selected(args, f"doctors.{store_format}.{op}[{label(count)}]")
+                   for store_format in args.formats for op in ("save", "load", "scan")):
+            continue
+        runs = 1 if count >= 1_000_000 else None
+        for store_format in args.formats:
+            path = os.path.join(root, f"doctors-{store_format}-{count}.json")
+            name = f"doctors.{store_format}"
+            with mock.patch.dict(os.environ, {STORE_FORMAT_ENV: store_format}):
+                writer = DoctorService(path, transcript_store=store)
+                writer.doctors = make_doctors(count)
+                if selected(args, f"{name}.save[{label(count)}]"):
+                    yield Benchmark(f"{name}.save[{label(count)}]", writer.save_doctors, count, runs)
+                else:
+                    writer.save_doctors()
+                # Drop the written records first: a 1M-record store doesn't fit in memory twice
+                del writer
+                yield Benchmark(f"{name}.load[{label(count)}]",
+                                lambda: DoctorService(path, transcript_store=store), count, runs)
+                # A snapshot opens lazily; reading every record is what a full scan costs
+                yield Benchmark(f"{name}.scan[{label(count)}]",
+                                lambda: DoctorService(path, transcript_store=store).list_doctors(), count, runs)
+
+
+def slot_benchmarks(root, args) -> Iterator[Benchmark]:
+    """CalendarService.find_available_slots against a dense calendar"""
+    start = datetime(2030, 1, 7)
+    calendar = CalendarService("mock")
+    calendar.provider.events = dense_calendar(start, max(args.days))
+    for days in args.days:
+        yield Benchmark(f"calendar.find_available_slots[{days}d]",
+                        lambda days=days: calendar.find_available_slots(start, days=days), days)
+
+
+def optimizer_benchmarks(root, args) -> Iterator[Benchmark]:
+    """SchedulingOptimizer.find_best_providers over a large provider catalog with booked appointments"""
+    name = f"optimizer.find_best_providers[{label(args.providers)}]"
+    if not selected(args, name):
+        return
+    store = BlobStore(os.path.join(root, "transcripts"))
+    appointments = make_appointment_service(root, "optimizer", store)
+    begins = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    appointments.store.put_many("user-1", {
+        f"appt-{i}": Appointment(id=f"appt-{i}", user_id="user-1", doctor_id=f"provider-{i}",
+                                 start_time=begins, end_time=begins + timedelta(minutes=30))
+        for i in range(0, args.providers, 10)
+    })
+    user = User(id="user-1", name="Pat", email="pat@example.com", insurance_provider="Aetna",
+                availability=UserAvailability(days=[0, 1, 2, 3, 4], time_slots=[
+                    {"day": day, "start": "09:00", "end": "12:00"} for day in range(5)]))
+
+    saved = dict(provider_service.providers)
+    provider_service.providers.clear()
+    provider_service.ProviderService.create_providers(make_providers(args.providers))
+    set_container(ServiceContainer(doctor_service=appointments.doctor_service, appointment_service=appointments))
+    try:
+        # Seconds per call at 10k providers; three runs are plenty
+        yield Benchmark(name, lambda: SchedulingOptimizer.find_best_providers(user), args.providers,
+                        min(args.runs, 3))
+    finally:
+        set_container(None)
+        provider_service.providers.clear()
+        provider_service.providers.update(saved)
+
+
+def search_benchmarks(root, args) -> Iterator[Benchmark]:
+    """Mock doctor search (what the app serves without a provider API key)"""
+    with mock.patch.object(DoctorSearchService, "_ensure_mock_data"):
+        search = DoctorSearchService(office_knowledge=OfficeKnowledgeService(os.path.join(root, "knowledge.json")))
+    search.use_real_api = False
+    search.mock_data_file = os.path.join(root, "mock_doctors.json")
+    write_file(search.mock_data_file, search._generate_mock_doctors(args.search_doctors))
+
+    queries = [("Cardiology", None), ("Dermatology", "Aetna"), ("Pediatrics", "Medicare"), ("Neurology", None)]
+
+    def run():
+        for specialization, insurance in queries:
+            search.search_doctors(specialization, insurance)
+
+    yield Benchmark(f"search.mock[{label(args.search_doctors)} doctors]", run, len(queries))
+
+
+def webhook_benchmarks(root, args) -> Iterator[Benchmark]:
+    """Retell call_analyzed webhooks through the Flask app: indexing, office knowledge and analytics"""
+    store = BlobStore(os.path.join(root, "transcripts"))
+    index = TranscriptIndex(os.path.join(root, "transcripts.db"), transcript_store=store)
+    container = ServiceContainer(
+        transcript_store=store, transcript_index=index,
+        office_knowledge=OfficeKnowledgeService(os.path.join(root, "webhook-knowledge.json")),
+        call_analytics=CallAnalyticsService(os.path.join(root, "webhook-analytics.json")),
+        appointment_service=make_appointment_service(root, "webhook", store))
+    client = web_app.app.test_client()
+    batch = 50
+    sent = iter(range(10 ** 9))
+
+    def run():
+        for _ in range(batch):
+            response = client.post("/api/retell_webhook", json=webhook_payload(next(sent)))
+            assert response.status_code == 200, response.status_code
+
+    with mock.patch.object(web_app, "container", container), mock.patch.object(web_app, "_warm_up_started", True), \
+            mock.patch("schedulur.integrations.retell.get_transcript_index", return_value=index):
+        yield Benchmark("webhook.call_analyzed", run, batch)
+
+
+SCENARIOS = [store_benchmarks, slot_benchmarks, optimizer_benchmarks, search_benchmarks, webhook_benchmarks]
+
+
+def measure(benchmark: Benchmark, runs: int) -> dict:
+    runs = benchmark.runs or runs
+    if runs > 1:
+        # Warm caches and imports so the timed runs measure the steady state
+        benchmark.run()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        benchmark.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(timings)
+    return {"median_ms": round(median, 3), "min_ms": round(min(timings), 3), "max_ms": round(max(timings), 3),
+            "runs": runs, "ops": benchmark.ops, "ops_per_sec": round(benchmark.ops / (median / 1000), 1)}
+
+
+def run_suite(args) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        for scenario in SCENARIOS:
+            for benchmark in scenario(root, args):
+                if not selected(args, benchmark.name):
+                    continue
+                result = measure(benchmark, args.runs)
+                results[benchmark.name] = result
+                print(f"  {benchmark.name:<42} {result['median_ms']:10.2f} ms  "
+                      f"{result['ops_per_sec']:>12,.0f} ops/s  ({result['runs']} runs)", flush=True)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} cpus)",
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Print each benchmark's change from the baseline; returns the names that got slower than threshold"""
+    regressions = []
+    print(f"\nAgainst baseline from {baseline['created']} (Python {baseline['python']}, {baseline['machine']})")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"  {name:<42} {'new':>10}")
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1 if before["median_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"  {name:<42} {before['median_ms']:10.2f} -> {result['median_ms']:10.2f} ms  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare against a baseline")
+    parser.add_argument("--sizes", default="1k,100k,1M", help="Doctor store sizes (default: 1k,100k,1M)")
+    parser.add_argument("--formats", default="json,snapshot", help="Store formats to time (json, snapshot)")
+    parser.add_argument("--days", default="7,30,90", help="Calendar ranges to search for slots, in days")
+    parser.add_argument("--providers", type=parse_count, default=10_000, help="Providers for the optimizer")
+    parser.add_argument("--search-doctors", type=parse_count, default=2_000, help="Doctors in the mock search data")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per benchmark (median is reported)")
+    parser.add_argument("--quick", action="store_true",
+                        help="Small sizes and fewer runs, for a fast check (compare only against --quick baselines)")
+    parser.add_argument("-k", "--keyword", action="append",
+                        help="Only benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write this run's results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="Also save this run as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare with the baseline; exit 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Slowdown counted as a regression (default: 0.2, i.e. 20%%)")
+    args = parser.parse_args()
+
+    args.sizes = [parse_count(size) for size in args.sizes.split(",")]
+    args.formats = [f.strip() for f in args.formats.split(",")]
+    args.days = [int(days) for days in args.days.split(",")]
+    if args.quick:
+        args.sizes = [size for size in args.sizes if size <= 1_000] or [1_000]
+        args.providers = min(args.providers, 1_000)
+        args.search_doctors = min(args.search_doctors, 500)
+        args.runs = min(args.runs, 3)
+
+    print(f"Benchmarks, median of {args.runs} runs")
+    current = run_suite(args)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    write_file(args.output, current)
+    print(f"\nResults written to {args.output}")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        write_file(args.baseline, current)
+        print(f"Saved as the baseline in {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save-baseline first")
+            sys.exit(2)
+        regressions = compare(current, read_file(args.baseline), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) more than {args.threshold:.0%} slower: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
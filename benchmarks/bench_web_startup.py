@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+
+"""
+Web app cold-start time-to-first-byte benchmark
+
+Copies the package into a temporary directory, seeds its stores, builds the
+warm-start snapshot and then starts a fresh interpreter per measurement.
+Each one imports the web app and serves a single logged-in request, and the
+time from process launch to the response is reported for / and /search,
+with and without SCHEDULUR_WARMSTART.
+
+    python benchmarks/bench_web_startup.py
+    python benchmarks/bench_web_startup.py --users 5000 --doctors 20000 --appointments 50000 --runs 5
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ("/", "/search")
+
+
+def seed(users, doctors, appointments):
+    from schedulur.models.appointment import Appointment
+    from schedulur.models.doctor import Doctor
+    from schedulur.models.user import User
+    from schedulur.services.doctor_service import DoctorService
+    from schedulur.services.user_service import UserService
+    from schedulur.storage.records import save_records
+
+    user_service = UserService()
+    user_service.users = {
+        f"user-{i}": User(id=f"user-{i}", name=f"User {i}", email=f"user{i}@example.com", insurance_provider="Aetna")
+        for i in range(users)
+    }
+    user_service.save_users()
+
+    doctor_service = DoctorService()
+    doctor_service.doctors = {
+        f"doctor-{i}": Doctor(id=f"doctor-{i}", name=f"Dr. {i}", specialization="Cardiology",
+                              accepted_insurance=["Aetna"], phone="555-0100")
+        for i in range(doctors)
+    }
+    doctor_service.save_doctors()
+
+    start = datetime(2026, 1, 5, 9)
+    data_file = os.path.join(os.path.dirname(doctor_service.data_file), "appointments.json")
+    save_records(data_file, {
+        f"appt-{i}": Appointment(id=f"appt-{i}", user_id=f"user-{i % max(users, 1)}", doctor_id=f"doctor-{i % max(doctors, 1)}",
+                                 start_time=start + timedelta(minutes=30 * i),
+                                 end_time=start + timedelta(minutes=30 * i + 30)).to_dict()
+        for i in range(appointments)
+    })
+
+
+def serve(path):
+    """Import the app and serve one request; print when the response is ready"""
+    from schedulur.web_app import app
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = "user-0"
+    response = client.get(path)
+    print(time.time(), response.status_code, flush=True)
+
+
+def run_child(root, *args, env=None):
+    return subprocess.run([sys.executable, os.path.abspath(__file__), "--root", root, *args],
+                          cwd=root, env=env, check=True, capture_output=True, text=True).stdout
+
+
+def ttfb_ms(root, path, warm):
+    env = dict(os.environ)
+    env.pop("SCHEDULUR_STORE_FORMAT", None)
+    env["SCHEDULUR_WARMSTART"] = "1" if warm else "0"
+    started = time.time()
+    finished, status = run_child(root, "--serve", path, env=env).split()[-2:]
+    if status != "200":
+        raise RuntimeError(f"GET {path} returned {status}")
+    return (float(finished) - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold-start time-to-first-byte")
+    parser.add_argument("--users", type=int, default=10_000, help="Users in the store")
+    parser.add_argument("--doctors", type=int, default=10_000, help="Doctors in the store")
+    parser.add_argument("--appointments", type=int, default=20_000, help="Appointments in the store")
+    parser.add_argument("--runs", type=int, default=3, help="Process launches per path and mode")
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    parser.add_argument("--seed", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.root:
+        # Child process: run against the copied package
+        sys.path.insert(0, args.root)
+        if args.seed:
+            seed(args.users, args.doctors, args.appointments)
+        else:
+            serve(args.serve)
+        return
+
+    with tempfile.TemporaryDirectory() as root:
+        shutil.copytree(os.path.join(REPO, "schedulur"), os.path.join(root, "schedulur"),
+                        ignore=shutil.ignore_patterns("__pycache__", "*.json", "*.jsonl", "*.snap", "*.db*", "transcripts"))
+        run_child(root, "--seed", "--users", str(args.users), "--doctors", str(args.doctors),
+                  "--appointments", str(args.appointments))
+        subprocess.run([sys.executable, "-m", "schedulur.warmstart"], cwd=root, check=True, capture_output=True)
+
+        print(f"{args.users:,} users, {args.doctors:,} doctors, {args.appointments:,} appointments; "
+              f"median of {args.runs} process launches")
+        for path in PATHS:
+            for warm in (False, True):
+                elapsed = statistics.median(ttfb_ms(root, path, warm) for _ in range(args.runs))
+                label = f"GET {path} ({'warm start' if warm else 'json'})"
+                print(f"  {label:<28} {elapsed:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
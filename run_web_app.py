@@ -13,8 +13,10 @@ from schedulur.web_app import app
 
 # if HOST is not set, use default
 HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "5000"))
+DEBUG = os.getenv("FLASK_DEBUG", "1").lower() in ("1", "true", "yes")
 
 if __name__ == "__main__":
-    print("Starting Schedulur web app on http://127.0.0.1:5000")
-    app.run(debug=True,host=HOST,port=5000)
+    print(f"Starting Schedulur web app on http://127.0.0.1:{PORT}")
+    app.run(debug=DEBUG,host=HOST,port=PORT)
 
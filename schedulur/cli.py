@@ -2,52 +2,90 @@
 
 import argparse
 import sys
+import threading
 import uuid
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-import json
 
-from schedulur.models.doctor import Doctor
-from schedulur.models.appointment import Appointment, AppointmentStatus
 from schedulur.models.user import User, UserAvailability
-from schedulur.services.doctor_service import DoctorService
-from schedulur.services.doctor_search_service import DoctorSearchService
-from schedulur.services.appointment_service import AppointmentService
-from schedulur.services.user_service import UserService
-from schedulur.integrations.calendar import CalendarService
-from schedulur.integrations.communication import CommunicationService
+from schedulur.container import ServiceContainer, get_container
+from schedulur.logs import configure_logging
+from schedulur.profiling import ADMIN_TOKEN_ENV, StackSampler
+from schedulur.storage.records import ConflictError
+from schedulur.storage.serialization import read_file, write_file
+from schedulur.tracing import TRACE_FILE_ENV, format_trace, read_trace_file, recent_traces, span
+
+
+# Seconds between stack samples under --profile; commands are short, so sample often
+CLI_PROFILE_INTERVAL = 0.001
+
+
+def _positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 
 class CLI:
     """Command-line interface for Schedulur"""
 
-    def __init__(self):
-        self.user_service = UserService()
-        self.doctor_service = DoctorService()
-        self.doctor_search_service = DoctorSearchService()
-        self.appointment_service = AppointmentService()
-        self.calendar_service = CalendarService()
-        self.communication_service = CommunicationService()
+    def __init__(self, container: ServiceContainer = None):
+        self.container = container or get_container()
 
         self.current_user = None
         self._load_current_user()
 
         self.parser = argparse.ArgumentParser(
             description="Schedulur - Medical Appointment Scheduler")
+        self.parser.add_argument(
+            "--profile", metavar="FILE",
+            help="Sample the command's stacks and write them to FILE (collapsed stacks, for flame graphs)")
         self.setup_parsers()
 
+    # Services come from the shared container, which builds each one on first
+    # use, so a command only pays for the stores it touches.
+
+    @property
+    def user_service(self):
+        return self.container.user_service
+
+    @property
+    def doctor_service(self):
+        return self.container.doctor_service
+
+    @property
+    def doctor_search_service(self):
+        return self.container.doctor_search_service
+
+    @property
+    def appointment_service(self):
+        return self.container.appointment_service
+
+    @property
+    def approval_service(self):
+        return self.container.approval_service
+
+    @property
+    def calendar_service(self):
+        return self.container.calendar_service
+
+    @property
+    def communication_service(self):
+        return self.container.communication_service
+
     def _load_current_user(self):
         """Load the current user from config file"""
         config_file = os.path.join(
             os.path.dirname(__file__), "data/config.json")
         try:
             if os.path.exists(config_file):
-                with open(config_file, 'r') as f:
-                    config = json.load(f)
-                    if 'current_user_id' in config:
-                        self.current_user = self.user_service.get_user(
-                            config['current_user_id'])
+                config = read_file(config_file)
+                if 'current_user_id' in config:
+                    self.current_user = self.user_service.get_user(
+                        config['current_user_id'])
         except Exception as e:
             print(f"Error loading user config: {e}")
 
@@ -56,11 +94,7 @@ class CLI:
         config_file = os.path.join(
             os.path.dirname(__file__), "data/config.json")
         try:
-            os.makedirs(os.path.dirname(config_file), exist_ok=True)
-
-            config = {'current_user_id': user_id}
-            with open(config_file, 'w') as f:
-                json.dump(config, f, indent=2)
+            write_file(config_file, {'current_user_id': user_id})
         except Exception as e:
             print(f"Error saving user config: {e}")
 
@@ -189,6 +223,63 @@ class CLI:
             "cancel", help="Cancel an appointment")
         cancel_parser.add_argument("appointment_id", help="Appointment ID")
 
+        # Call transcript commands
+        calls_parser = subparsers.add_parser(
+            "calls", help="Call transcript search")
+        calls_subparsers = calls_parser.add_subparsers(
+            dest="subcommand", help="Subcommand")
+
+        # Search transcripts
+        calls_search_parser = calls_subparsers.add_parser(
+            "search", help="Search call transcripts")
+        calls_search_parser.add_argument(
+            "query", help='Search query, e.g. \'"not taking new patients"\' or \'medicaid NOT medicare\'')
+        calls_search_parser.add_argument("--doctor", help="Only calls to this doctor ID")
+        calls_search_parser.add_argument("--user", help="Only calls for this user ID")
+        calls_search_parser.add_argument("--since", help="Only calls on or after this date (YYYY-MM-DD)")
+        calls_search_parser.add_argument("--until", help="Only calls before this date (YYYY-MM-DD)")
+        calls_search_parser.add_argument(
+            "--limit", type=int, default=20, help="Maximum number of results")
+
+        # Rebuild the index
+        calls_subparsers.add_parser(
+            "reindex", help="Index transcripts of all stored appointments")
+
+        # Latency and cost report
+        calls_report_parser = calls_subparsers.add_parser(
+            "report", help="Show call latency and cost over recent days")
+        calls_report_parser.add_argument(
+            "--days", type=_positive_int, default=7, help="Number of days to include")
+        calls_report_parser.add_argument("--agent", help="Only calls handled by this Retell agent ID")
+
+        # Office knowledge stats
+        calls_subparsers.add_parser(
+            "knowledge", help="Show how many calls learned office answers have saved")
+
+        # Data store commands
+        store_parser = subparsers.add_parser(
+            "store", help="Data store maintenance")
+        store_subparsers = store_parser.add_subparsers(
+            dest="subcommand", help="Subcommand")
+
+        # Export snapshots as JSON
+        store_subparsers.add_parser(
+            "export", help="Write snapshot stores out as their JSON files")
+
+        # Trace commands
+        traces_parser = subparsers.add_parser(
+            "traces", help="Show where recent requests spent their time")
+        traces_parser.add_argument(
+            "--file", help=f"Trace file to read (default: ${TRACE_FILE_ENV})")
+        traces_parser.add_argument(
+            "--url", help=f"Read a running app's span buffer instead, e.g. http://localhost:5000 "
+                          f"(sends ${ADMIN_TOKEN_ENV})")
+        traces_parser.add_argument("--trace", help="Only this trace (request) ID")
+        traces_parser.add_argument(
+            "--limit", type=int, default=5, help="Number of traces to show")
+        traces_parser.add_argument(
+            "--min-ms", type=float, default=0, help="Only traces taking at least this long")
+
     def run(self, args=None):
         """Run the CLI with the given arguments"""
         args = self.parser.parse_args(args)
@@ -197,6 +288,33 @@ class CLI:
             self.parser.print_help()
             return
 
+        sampler = StackSampler(interval=CLI_PROFILE_INTERVAL, thread_ids=[threading.get_ident()]).start() \
+            if args.profile else None
+        try:
+            if args.command == "traces":
+                self.dispatch(args)
+            else:
+                # Each command is a trace of its own, exported like the apps' requests
+                with span(" ".join(filter(None, ["cli", args.command, getattr(args, "subcommand", None)]))):
+                    self.dispatch(args)
+        except ConflictError as e:
+            print(f"Error: {e}. Please run the command again.")
+        finally:
+            if sampler is not None:
+                self.report_profile(sampler.stop(), args.profile)
+
+    def report_profile(self, profile, path: str):
+        """Write a --profile run's stacks and list the busiest service and integration functions"""
+        profile.write(path)
+        print(f"\nProfile: {profile.samples} samples over {profile.seconds:.2f}s written to {path}")
+        top = profile.top_functions(limit=10)
+        if top:
+            print(f"{'Total':>7}{'Self':>7}  Function")
+            for entry in top:
+                print(f"{entry['total_percent']:>6.1f}%{entry['self_percent']:>6.1f}%  {entry['function']}")
+
+    def dispatch(self, args):
+        """Run the handler for a parsed command"""
         # Handle user commands
         if args.command == "user":
             self.handle_user_command(args)
@@ -213,6 +331,18 @@ class CLI:
         elif args.command == "appointment":
             self.handle_appointment_command(args)
 
+        # Handle call transcript commands
+        elif args.command == "calls":
+            self.handle_calls_command(args)
+
+        # Handle data store commands
+        elif args.command == "store":
+            self.handle_store_command(args)
+
+        # Handle trace commands
+        elif args.command == "traces":
+            self.handle_traces_command(args)
+
     def check_current_user(self):
         """Check if there's a current user, and prompt to create one if not"""
         if not self.current_user:
@@ -354,6 +484,8 @@ class CLI:
                 print("For now, we're using a mock implementation")
 
         elif args.subcommand == "slots":
+            from schedulur.integrations.calendar import CalendarService
+
             # Show available calendar slots
             calendar_service = CalendarService(provider_type=self.current_user.calendar_provider,
                                                user_id=self.current_user.id)
@@ -378,11 +510,12 @@ class CLI:
             # Group by date
             dates = {}
             for slot in slots:
-                date_str = slot['start'].strftime('%Y-%m-%d')
+                start_time, end_time = slot.start_time, slot.end_time
+                date_str = start_time.strftime('%Y-%m-%d')
                 if date_str not in dates:
                     dates[date_str] = []
 
-                time_str = f"{slot['start'].strftime('%H:%M')} - {slot['end'].strftime('%H:%M')}"
+                time_str = f"{start_time.strftime('%H:%M')} - {end_time.strftime('%H:%M')}"
                 dates[date_str].append(time_str)
 
             # Print by date
@@ -414,8 +547,7 @@ class CLI:
                 specialization=args.specialization,
                 insurance=insurance,
                 zip_code=zip_code,
-                max_distance=args.distance,
-                urgency_level=args.urgency
+                max_distance=args.distance
             )
 
             if not doctors:
@@ -434,9 +566,10 @@ class CLI:
 
             self.print_doctor_search_results(doctors)
 
-    def print_doctor_search_results(self, doctors: List[Doctor]):
+    def print_doctor_search_results(self, doctors: List["DoctorSummary"]):
         """Print doctor search results in a user-friendly format"""
         print(f"\nFound {len(doctors)} doctors:")
+        self.approval_service.annotate(self.current_user.id, doctors)
 
         for i, doctor in enumerate(doctors, 1):
             approval_status = ""
@@ -480,6 +613,8 @@ class CLI:
 
     def handle_appointment_command(self, args):
         """Handle appointment-related commands"""
+        from schedulur.models.appointment import AppointmentStatus
+
         if not self.check_current_user():
             return
 
@@ -489,7 +624,8 @@ class CLI:
 
         if args.subcommand == "schedule":
             # Schedule appointments with approved doctors
-            approved_doctors = self.doctor_service.get_approved_doctors()
+            approved_doctors = self.approval_service.get_approved_doctors(
+                self.current_user.id)
 
             if not approved_doctors:
                 print(
@@ -507,10 +643,16 @@ class CLI:
                     print("Invalid date format. Please use YYYY-MM-DD.")
                     return
 
+            # Prefer the weekday of the requested date, if any
+            scheduling_preferences = dict(self.current_user.scheduling_preferences or {})
+            if preferred_date:
+                scheduling_preferences['preferred_days'] = [preferred_date.weekday()]
+
             print(
                 f"Scheduling appointments with {len(approved_doctors)} approved doctors...")
 
             # Schedule with each approved doctor
+            appointment = None
             for doctor in approved_doctors:
                 print(f"\nCalling {doctor.name} ({doctor.specialization})...")
 
@@ -518,9 +660,13 @@ class CLI:
                     doctor=doctor,
                     user=self.current_user,
                     reason=args.reason,
-                    preferred_date=preferred_date
+                    scheduling_preferences=scheduling_preferences
                 )
 
+                if call_details.get('skipped'):
+                    print(call_details['error'])
+                    continue
+
                 if appointment:
                     print(
                         f"Success! Appointment scheduled for {appointment.start_time.strftime('%A, %B %d at %I:%M %p')}")
@@ -561,7 +707,7 @@ class CLI:
         elif args.subcommand == "approve":
             # Approve a doctor for scheduling
             success = self.appointment_service.approve_doctor_for_scheduling(
-                args.doctor_id, True)
+                args.doctor_id, True, self.current_user.id)
             if success:
                 doctor = self.doctor_service.get_doctor(args.doctor_id)
                 print(f"Approved {doctor.name} for scheduling")
@@ -571,7 +717,7 @@ class CLI:
         elif args.subcommand == "reject":
             # Reject a doctor for scheduling
             success = self.appointment_service.approve_doctor_for_scheduling(
-                args.doctor_id, False)
+                args.doctor_id, False, self.current_user.id)
             if success:
                 doctor = self.doctor_service.get_doctor(args.doctor_id)
                 print(f"Rejected {doctor.name} for scheduling")
@@ -581,7 +727,8 @@ class CLI:
         elif args.subcommand == "list":
             # List appointments
             if args.upcoming:
-                appointments = self.appointment_service.get_upcoming_appointments()
+                appointments = self.appointment_service.get_upcoming_appointments(
+                    self.current_user.id)
             else:
                 appointments = self.appointment_service.get_user_appointments(
                     self.current_user.id)
@@ -608,7 +755,7 @@ class CLI:
         elif args.subcommand == "show":
             # Show appointment details
             appointment = self.appointment_service.get_appointment(
-                args.appointment_id)
+                args.appointment_id, self.current_user.id)
             if not appointment:
                 print(f"Appointment not found with ID: {args.appointment_id}")
                 return
@@ -654,15 +801,169 @@ class CLI:
         elif args.subcommand == "cancel":
             # Cancel an appointment
             success = self.appointment_service.cancel_appointment(
-                args.appointment_id)
+                args.appointment_id, self.current_user.id)
             if success:
                 print(f"Appointment cancelled with ID: {args.appointment_id}")
                 print("The appointment has been removed from your calendar")
             else:
                 print(f"Appointment not found with ID: {args.appointment_id}")
 
+    def handle_calls_command(self, args):
+        """Handle call transcript commands"""
+        if not args.subcommand:
+            print("Error: Please specify a subcommand for calls")
+            return
+
+        transcript_index = self.container.transcript_index
+
+        if args.subcommand == "search":
+            try:
+                since = datetime.strptime(args.since, '%Y-%m-%d') if args.since else None
+                until = datetime.strptime(args.until, '%Y-%m-%d') if args.until else None
+            except ValueError:
+                print("Invalid date format. Please use YYYY-MM-DD.")
+                return
+
+            try:
+                results = transcript_index.search(
+                    args.query,
+                    doctor_id=args.doctor,
+                    user_id=args.user,
+                    since=since,
+                    until=until,
+                    limit=args.limit
+                )
+            except ValueError as e:
+                print(f"Error: {e}")
+                return
+
+            if not results:
+                print("No calls found matching the query")
+                return
+
+            print(f"Found {len(results)} calls:")
+            for result in results:
+                doctor = self.doctor_service.get_doctor(result['doctor_id']) if result['doctor_id'] else None
+                doctor_name = doctor.name if doctor else (result['doctor_id'] or "Unknown Doctor")
+
+                print(f"\n{doctor_name}")
+                if result['call_time']:
+                    print(f"   When: {result['call_time']}")
+                if result['appointment_id']:
+                    print(f"   Appointment ID: {result['appointment_id']}")
+                print(f"   Call: {result['call_key']}")
+                print(f"   ...{transcript_index.snippet(result['transcript_ref'], args.query)}...")
+
+        elif args.subcommand == "reindex":
+            indexed = 0
+            for appointment in self.appointment_service.list_appointments():
+                if transcript_index.index_appointment(appointment):
+                    indexed += 1
+            print(f"Indexed {indexed} call transcripts ({transcript_index.count()} total)")
+
+        elif args.subcommand == "report":
+            report = self.container.call_analytics.report(days=args.days, agent_id=args.agent)
+            if not report['total']['calls']:
+                print(f"No analyzed calls since {report['since']}")
+                return
+
+            def fmt(value, unit=""):
+                return "-" if value is None else f"{value:,.0f}{unit}"
+
+            print(f"Calls since {report['since']}:")
+            print(f"{'Day':<12}{'Calls':>7}{'Cost':>10}{'p50 e2e':>10}{'p95 e2e':>10}{'p95 llm':>10}{'p95 dur':>10}")
+            rows = list(report['by_day'].items()) + [("Total", report['total'])]
+            for day, summary in rows:
+                print(f"{day:<12}{summary['calls']:>7}{summary['cost']['sum']:>10.2f}"
+                      f"{fmt(summary['latency_e2e_ms']['p50'], 'ms'):>10}"
+                      f"{fmt(summary['latency_e2e_ms']['p95'], 'ms'):>10}"
+                      f"{fmt(summary['latency_llm_ms']['p95'], 'ms'):>10}"
+                      f"{fmt(summary['duration_ms']['p95'] and summary['duration_ms']['p95'] / 1000, 's'):>10}")
+
+            print("\nDisconnection reasons:")
+            for reason, count in sorted(report['total']['disconnection_reasons'].items(), key=lambda r: -r[1]):
+                print(f"   {reason}: {count}")
+
+            if len(report['by_agent']) > 1:
+                print("\nBy agent:")
+                for agent, summary in report['by_agent'].items():
+                    print(f"   {agent}: {summary['calls']} calls, cost {summary['cost']['sum']:.2f}, "
+                          f"p95 e2e {fmt(summary['latency_e2e_ms']['p95'], 'ms')}")
+
+        elif args.subcommand == "knowledge":
+            stats = self.container.office_knowledge.get_stats()
+            print(f"Doctors with learned answers: {stats['doctors_known']}")
+            print(f"Fresh facts: {stats['fresh_facts']}")
+            print(f"Calls avoided: {stats['calls_avoided']}")
+            for reason, count in sorted(stats['calls_avoided_by_reason'].items()):
+                print(f"   {reason}: {count}")
+            print(f"Search results filtered: {stats['search_results_filtered']}")
+
+    def handle_store_command(self, args):
+        """Handle data store commands"""
+        from schedulur.storage.records import export_snapshot, snapshot_path
+
+        if not args.subcommand:
+            print("Please specify a subcommand. Run 'schedulur store --help' for more information.")
+            return
+
+        if args.subcommand == "export":
+            # Editing or replacing an exported file imports it: a JSON file
+            # newer than its snapshot is loaded and snapshotted on next start
+            data_dir = os.path.join(os.path.dirname(__file__), "data")
+            for name in ("users", "doctors", "appointments"):
+                path = os.path.join(data_dir, f"{name}.json")
+                if not os.path.exists(snapshot_path(path)):
+                    print(f"{name}: no snapshot")
+                    continue
+                print(f"{name}: exported {export_snapshot(path)} records to {path}")
+
+
+    def handle_traces_command(self, args):
+        """Handle trace commands"""
+        if args.url:
+            import requests
+
+            params = {"limit": args.limit if not args.min_ms else 200}
+            if args.trace:
+                params["trace_id"] = args.trace
+            # The endpoint is admin-only; send the same token the server checks
+            headers = {"Authorization": f"Bearer {os.environ.get(ADMIN_TOKEN_ENV, '')}"}
+            try:
+                response = requests.get(args.url.rstrip("/") + "/api/traces", params=params, headers=headers,
+                                        timeout=10)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                print(f"Error fetching traces: {e}")
+                return
+            traces = response.json()["traces"]
+        else:
+            path = args.file or os.environ.get(TRACE_FILE_ENV)
+            if not path:
+                print(f"No trace file. Set {TRACE_FILE_ENV} where the app runs, then pass it with --file, "
+                      "or read a running app's spans with --url.")
+                return
+            if not os.path.exists(path):
+                print(f"Trace file not found: {path}")
+                return
+            spans = read_trace_file(path)
+            if args.trace:
+                spans = [s for s in spans if s["trace_id"] == args.trace]
+            traces = recent_traces(spans, len(spans))
+
+        traces = [t for t in traces if t["duration_ms"] >= args.min_ms][:args.limit]
+        if not traces:
+            print("No traces found")
+            return
+
+        for trace in traces:
+            print(f"\nTrace {trace['trace_id']} ({trace['duration_ms']:.1f}ms)")
+            for line in format_trace(trace["spans"]):
+                print(line)
+
 
 def main():
+    configure_logging(fmt="text")
     cli = CLI()
     cli.run()
 
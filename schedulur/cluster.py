@@ -0,0 +1,220 @@
+"""
+Partitioning users across app nodes
+
+Each node keeps its own data/ directory, so every request for a user has
+to be served by the node that owns that user. Ownership comes from a
+consistent-hash ring over the user id: adding a node only moves the users
+that now hash to it, roughly 1/N of them, and leaves everyone else where
+they are.
+
+Configure every node with the same node list and its own name:
+
+    SCHEDULUR_NODES="a=http://127.0.0.1:5001,b=http://127.0.0.1:5002"
+    SCHEDULUR_NODE=a
+
+A node forwards requests for users it doesn't own. With an http(s)
+address the request is proxied to the owner; with fly:<machine id> the
+response asks Fly's proxy to replay it on that machine instead. Nodes must
+share SECRET_KEY so the session cookie is valid everywhere. Forwarded
+requests are signed with SCHEDULUR_CLUSTER_SECRET (SECRET_KEY if unset);
+the owner only skips its own routing for requests signed by a peer, so a
+client can't send NODE_HEADER to be served by a node that doesn't own it.
+Without SCHEDULUR_NODES the app runs as a single node, as before.
+"""
+
+import bisect
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from schedulur.logs import REQUEST_ID_HEADER, get_correlation_id
+
+NODES_ENV = "SCHEDULUR_NODES"
+NODE_ENV = "SCHEDULUR_NODE"
+CLUSTER_SECRET_ENV = "SCHEDULUR_CLUSTER_SECRET"
+
+# Set on forwarded requests as "<node> <signature>" (the owner serves them
+# without looking at the ring again) and on every clustered response, naming
+# the node that served it
+NODE_HEADER = "X-Schedulur-Node"
+
+FLY_PREFIX = "fly:"
+
+# Points per node on the ring; more points spread users more evenly
+DEFAULT_VNODES = 128
+
+# Namespace for user ids derived from email addresses
+USER_NAMESPACE = uuid.UUID("6f1d7c52-2b8e-4f5e-9a57-3c0f2d6b8e41")
+
+# Hop-by-hop and body-framing headers that must not be copied across a proxy
+_SKIP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-encoding", "content-length",
+                 "host", "te", "trailer", "upgrade", "proxy-authorization", "proxy-authenticate"}
+
+
+def user_id_for_email(email: str) -> str:
+    """
+    The id a new user gets, derived from their email
+
+    Login only knows the email, so the id (and with it the owning node)
+    has to be computable from it before the user record is found.
+    """
+    return str(uuid.uuid5(USER_NAMESPACE, email.strip().lower()))
+
+
+class HashRing:
+    """Consistent-hash ring mapping keys to nodes"""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = DEFAULT_VNODES):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(set(self._owners.values()))
+
+    def add(self, node: str) -> None:
+        for i in range(self.vnodes):
+            point = self._hash(f"{node}#{i}")
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+                self._owners[point] = node
+
+    def remove(self, node: str) -> None:
+        for point in [p for p, owner in self._owners.items() if owner == node]:
+            del self._owners[point]
+            self._points.pop(bisect.bisect_left(self._points, point))
+
+    def node_for(self, key: str) -> str:
+        """The node owning key: the first point clockwise from its hash"""
+        if not self._points:
+            raise LookupError("Hash ring has no nodes")
+        i = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[self._points[i]]
+
+
+class Cluster:
+    """
+    This node's view of the cluster: the ring plus where each node can be reached
+
+    Args:
+        nodes: Node names and addresses
+        local: This node's name
+        vnodes: Ring points per node
+        secret: Shared secret signing forwarded requests (default:
+            SCHEDULUR_CLUSTER_SECRET, then SECRET_KEY; without either, a
+            per-process one, so other nodes' forwards are routed again
+            rather than trusted)
+    """
+
+    def __init__(self, nodes: Dict[str, str], local: str, vnodes: int = DEFAULT_VNODES,
+                 secret: Optional[str] = None):
+        if local not in nodes:
+            raise ValueError(f"Node {local!r} is not in the node list {sorted(nodes)}")
+        self.nodes = dict(nodes)
+        self.local = local
+        self.ring = HashRing(nodes, vnodes)
+        secret = secret or os.environ.get(CLUSTER_SECRET_ENV) or os.environ.get("SECRET_KEY") \
+            or secrets.token_hex(32)
+        self._secret = secret.encode("utf-8")
+
+    @classmethod
+    def from_env(cls) -> Optional["Cluster"]:
+        spec = os.environ.get(NODES_ENV, "").strip()
+        if not spec:
+            return None
+        nodes = {}
+        for entry in spec.split(","):
+            name, _, address = entry.strip().partition("=")
+            if not name or not address:
+                raise ValueError(f"Bad {NODES_ENV} entry {entry!r}; expected name=address")
+            nodes[name] = address.rstrip("/")
+        return cls(nodes, os.environ.get(NODE_ENV) or os.environ.get("FLY_MACHINE_ID", ""))
+
+    def owner(self, user_id: str) -> str:
+        return self.ring.node_for(user_id)
+
+    def is_local(self, user_id: str) -> bool:
+        return self.owner(user_id) == self.local
+
+    def _sign(self, node: str) -> str:
+        return hmac.new(self._secret, node.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def forwarded_by(self) -> str:
+        """NODE_HEADER value marking a request as forwarded by this node"""
+        return f"{self.local} {self._sign(self.local)}"
+
+    def is_forwarded(self, value: Optional[str]) -> bool:
+        """Whether a request's NODE_HEADER was set by a peer, not by the client"""
+        node, _, signature = (value or "").partition(" ")
+        return node in self.nodes and bool(signature) and hmac.compare_digest(signature, self._sign(node))
+
+    def fly_instance(self, node: str) -> Optional[str]:
+        """Fly machine id for nodes addressed as fly:<machine id>"""
+        address = self.nodes[node]
+        return address[len(FLY_PREFIX):] if address.startswith(FLY_PREFIX) else None
+
+    def forward(self, node: str, method: str, path: str, headers: Iterable[Tuple[str, str]],
+                body: bytes, timeout: float = 30,
+                stream: bool = False) -> Tuple[int, List[Tuple[str, str]], Union[bytes, Iterator[bytes]]]:
+        """
+        Proxy a request to another node
+
+        Args:
+            node: Node to send it to
+            method: HTTP method
+            path: Path and query string
+            headers: Request headers
+            body: Request body
+            timeout: Seconds to wait for the owner (for each chunk, when streaming)
+            stream: Return the response body as chunks, as the owner sends them
+
+        Returns:
+            Status, headers and body of the owner's response (redirects are
+            passed back, not followed)
+        """
+        import requests
+
+        headers = [(k, v) for k, v in headers
+                   if k.lower() not in _SKIP_HEADERS and k.lower() != NODE_HEADER.lower()]
+        headers.append((NODE_HEADER, self.forwarded_by()))
+        # The owner logs the request under the same correlation id
+        if get_correlation_id() and not any(k.lower() == REQUEST_ID_HEADER.lower() for k, _ in headers):
+            headers.append((REQUEST_ID_HEADER, get_correlation_id()))
+        response = requests.request(method, self.nodes[node] + path, headers=dict(headers), data=body,
+                                    allow_redirects=False, timeout=timeout, stream=stream)
+        # raw.headers keeps repeated headers such as Set-Cookie apart
+        response_headers = [(k, v) for k, v in response.raw.headers.items() if k.lower() not in _SKIP_HEADERS]
+        if stream:
+            return response.status_code, response_headers, response.iter_content(chunk_size=None)
+        return response.status_code, response_headers, response.content
+
+
+_cluster: Optional[Cluster] = None
+_cluster_loaded = False
+_cluster_lock = threading.Lock()
+
+def get_cluster() -> Optional[Cluster]:
+    """This process's cluster configuration, or None when running as a single node"""
+    global _cluster, _cluster_loaded
+    if not _cluster_loaded:
+        with _cluster_lock:
+            if not _cluster_loaded:
+                _cluster, _cluster_loaded = Cluster.from_env(), True
+    return _cluster
+
+def set_cluster(cluster: Optional[Cluster]) -> None:
+    """Replace the cluster configuration (None re-reads it from the environment)"""
+    global _cluster, _cluster_loaded
+    with _cluster_lock:
+        _cluster, _cluster_loaded = cluster, cluster is not None
@@ -0,0 +1,140 @@
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class ServiceContainer:
+    """
+    Builds each store and integration once and hands out the same instance
+    to every caller.
+
+    Services are created lazily on first access, in dependency order, so an
+    entry point only pays for what it uses. Pass instances as keyword
+    arguments to replace any of them, e.g. in tests:
+
+        container = ServiceContainer(doctor_service=DoctorService(temp_file))
+    """
+
+    def __init__(self, **overrides):
+        self._instances: Dict[str, Any] = dict(overrides)
+        self._lock = threading.RLock()
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = factory()
+                    self._instances[name] = instance
+        return instance
+
+    def built(self, name: str) -> bool:
+        """Whether a service has been created (or supplied) yet"""
+        return name in self._instances
+
+    def override(self, **instances) -> None:
+        """Replace services after construction"""
+        with self._lock:
+            self._instances.update(instances)
+
+    @property
+    def transcript_store(self):
+        from schedulur.storage.blob_store import get_transcript_store
+        return self._get("transcript_store", get_transcript_store)
+
+    @property
+    def transcript_index(self):
+        from schedulur.storage.transcript_index import TranscriptIndex, get_transcript_index
+
+        def build():
+            index = get_transcript_index()
+            if index.transcript_store is not self.transcript_store:
+                index = TranscriptIndex(transcript_store=self.transcript_store)
+            return index
+        return self._get("transcript_index", build)
+
+    @property
+    def event_bus(self):
+        from schedulur.events import get_event_bus
+        return self._get("event_bus", get_event_bus)
+
+    @property
+    def user_service(self):
+        from schedulur.services.user_service import UserService
+        return self._get("user_service", UserService)
+
+    @property
+    def doctor_service(self):
+        from schedulur.services.doctor_service import DoctorService
+        return self._get("doctor_service", lambda: DoctorService(transcript_store=self.transcript_store))
+
+    @property
+    def provider_service(self):
+        from schedulur.services.provider_service import ProviderService
+        return self._get("provider_service", ProviderService)
+
+    @property
+    def office_knowledge(self):
+        from schedulur.services.office_knowledge_service import OfficeKnowledgeService
+        return self._get("office_knowledge", OfficeKnowledgeService)
+
+    @property
+    def call_analytics(self):
+        from schedulur.services.call_analytics_service import CallAnalyticsService
+        return self._get("call_analytics", CallAnalyticsService)
+
+    @property
+    def doctor_search_service(self):
+        from schedulur.services.doctor_search_service import DoctorSearchService
+        return self._get("doctor_search_service",
+                         lambda: DoctorSearchService(office_knowledge=self.office_knowledge))
+
+    @property
+    def communication_service(self):
+        from schedulur.integrations.communication import CommunicationService
+        return self._get("communication_service", CommunicationService)
+
+    @property
+    def calendar_service(self):
+        from schedulur.integrations.calendar import CalendarService
+        return self._get("calendar_service", CalendarService)
+
+    @property
+    def appointment_service(self):
+        from schedulur.services.appointment_service import AppointmentService
+        return self._get("appointment_service", lambda: AppointmentService(
+            doctor_service=self.doctor_service,
+            communication_service=self.communication_service,
+            transcript_store=self.transcript_store,
+            transcript_index=self.transcript_index,
+            office_knowledge=self.office_knowledge,
+            approval_service=self.approval_service,
+            event_bus=self.event_bus
+        ))
+
+    @property
+    def approval_service(self):
+        from schedulur.services.approval_service import ApprovalService
+        return self._get("approval_service", lambda: ApprovalService(
+            doctor_service=self.doctor_service,
+            user_service=self.user_service
+        ))
+
+
+_container: Optional[ServiceContainer] = None
+_container_lock = threading.Lock()
+
+def get_container() -> ServiceContainer:
+    """Get the process-wide service container"""
+    global _container
+    if _container is None:
+        with _container_lock:
+            if _container is None:
+                _container = ServiceContainer()
+    return _container
+
+def set_container(container: Optional[ServiceContainer]) -> None:
+    """Replace the process-wide container (None resets it)"""
+    global _container
+    with _container_lock:
+        _container = container
@@ -0,0 +1,212 @@
+"""
+In-process change feed for appointment and call status
+
+Services publish an event for a user whenever one of their appointments is
+written or a call about them finishes; the web app and the API relay each
+user's events to the browser as server-sent events, so pages update in
+place instead of being polled:
+
+    with get_event_bus().subscribe(user_id) as events:
+        event = events.get(timeout=15)
+
+Events live only in this process. Every request for a user is served by the
+node that owns them (see schedulur.cluster), so their stream is too.
+"""
+
+import asyncio
+import itertools
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, NamedTuple, Optional
+
+from schedulur.metrics import get_registry
+from schedulur.storage import serialization
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# An idle stream sends a comment this often, so proxies don't close it
+KEEPALIVE_SECONDS = 15
+
+# Events kept for clients reconnecting with Last-Event-ID
+DEFAULT_HISTORY = 1024
+# Events queued for one subscriber; a subscriber that falls further behind loses the oldest
+DEFAULT_QUEUE_SIZE = 256
+
+
+class Event(NamedTuple):
+    id: int
+    user_id: str
+    type: str
+    data: Dict[str, Any]
+
+
+class Subscription:
+    """One listener's queue of a user's events"""
+
+    def __init__(self, bus: "EventBus", user_id: str, queue_size: int,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.bus = bus
+        self.user_id = user_id
+        self._events: Deque[Event] = deque(maxlen=queue_size)
+        self._ready = threading.Condition()
+        # Async subscribers are woken on their own loop
+        self._loop = loop
+        self._wakeup = asyncio.Event() if loop is not None else None
+
+    def push(self, event: Event) -> None:
+        with self._ready:
+            self._events.append(event)
+            self._ready.notify()
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # The subscriber's loop has already shut down
+                pass
+
+    def _pop(self) -> Optional[Event]:
+        with self._ready:
+            return self._events.popleft() if self._events else None
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Next event, waiting up to timeout seconds; None if none arrived"""
+        with self._ready:
+            if not self._events:
+                self._ready.wait(timeout)
+        return self._pop()
+
+    async def get_async(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Next event without blocking the event loop (subscribe_async subscriptions only)"""
+        self._wakeup.clear()
+        if not self._events:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._pop()
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class EventBus:
+    """Publish/subscribe of events keyed by user"""
+
+    def __init__(self, history: int = DEFAULT_HISTORY, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._history: Deque[Event] = deque(maxlen=history)
+        self._subscribers: Dict[str, List[Subscription]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id: Optional[str], event_type: str, data: Dict[str, Any]) -> Optional[Event]:
+        """Send an event to the user's subscribers (events without a user are dropped)"""
+        if not user_id:
+            return None
+        with self._lock:
+            event = Event(next(self._ids), user_id, event_type, data)
+            self._history.append(event)
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.push(event)
+        return event
+
+    def subscribe(self, user_id: str, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        Start receiving a user's events
+
+        Args:
+            user_id: User whose events to receive
+            last_event_id: Last event the client saw; later events still in
+                the history are replayed first
+        """
+        return self._add(Subscription(self, user_id, self.queue_size), last_event_id)
+
+    def subscribe_async(self, user_id: str, last_event_id: Optional[int] = None) -> Subscription:
+        """subscribe() for a coroutine on the running event loop; read with get_async()"""
+        loop = asyncio.get_running_loop()
+        return self._add(Subscription(self, user_id, self.queue_size, loop=loop), last_event_id)
+
+    def _add(self, subscription: Subscription, last_event_id: Optional[int]) -> Subscription:
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._history:
+                    if event.id > last_event_id and event.user_id == subscription.user_id:
+                        subscription.push(event)
+            self._subscribers.setdefault(subscription.user_id, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.user_id, None)
+
+    def subscriber_count(self, user_id: Optional[str] = None) -> int:
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscribers.get(user_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+def parse_last_event_id(value: Optional[str]) -> Optional[int]:
+    """The Last-Event-ID header an EventSource sends when it reconnects"""
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+def sse_message(event: Optional[Event]) -> bytes:
+    """Encode an event for a text/event-stream response (None gives a keepalive comment)"""
+    if event is None:
+        return b": keepalive\n\n"
+    data = serialization.dumps(event.data, pretty=False)
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event.id, event.type.encode("utf-8"), data)
+
+def sse_stream(subscription: Subscription, keepalive: float = KEEPALIVE_SECONDS) -> Iterator[bytes]:
+    """Relay a subscription as server-sent events until the client goes away"""
+    try:
+        # Opens the stream at once, before the first event
+        yield sse_message(None)
+        while True:
+            yield sse_message(subscription.get(timeout=keepalive))
+    finally:
+        subscription.close()
+
+async def sse_stream_async(subscription: Subscription, keepalive: float = KEEPALIVE_SECONDS) -> AsyncIterator[bytes]:
+    """sse_stream() for an async server; the subscription must come from subscribe_async()"""
+    try:
+        yield sse_message(None)
+        while True:
+            yield sse_message(await subscription.get_async(timeout=keepalive))
+    finally:
+        subscription.close()
+
+
+_event_bus: Optional[EventBus] = None
+_event_bus_lock = threading.Lock()
+
+def get_event_bus() -> EventBus:
+    """Get the process-wide event bus"""
+    global _event_bus
+    if _event_bus is None:
+        with _event_bus_lock:
+            if _event_bus is None:
+                _event_bus = EventBus()
+    return _event_bus
+
+def set_event_bus(bus: Optional[EventBus]) -> None:
+    """Replace the process-wide event bus (None makes a fresh one on next use)"""
+    global _event_bus
+    _event_bus = bus
+
+get_registry().gauge("schedulur_event_subscribers", "Open event streams").set_function(
+    lambda: _event_bus.subscriber_count() if _event_bus is not None else 0)
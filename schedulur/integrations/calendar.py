@@ -1,9 +1,15 @@
+import logging
 import os
-import json
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta, time
 from abc import ABC, abstractmethod
 
+from schedulur.models.slot import Slot
+from schedulur.storage.serialization import read_file, write_file
+from schedulur.tracing import traced
+
+logger = logging.getLogger(__name__)
+
 class CalendarProvider(ABC):
     """Abstract base class for calendar providers"""
     
@@ -39,8 +45,7 @@ class MockCalendarProvider(CalendarProvider):
         """Load events from data file"""
         try:
             if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    events_data = json.load(f)
+                events_data = read_file(self.data_file)
                 
                 for event in events_data:
                     if isinstance(event['start'], str):
@@ -49,28 +54,17 @@ class MockCalendarProvider(CalendarProvider):
                         event['end'] = datetime.fromisoformat(event['end'])
                 
                 self.events = events_data
-        except Exception as e:
-            print(f"Error loading calendar events: {e}")
+        except Exception:
+            logger.exception("Error loading calendar events")
             self.events = []
     
     def save_events(self):
         """Save events to data file"""
         try:
-            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-            
-            events_data = []
-            for event in self.events:
-                event_copy = event.copy()
-                if hasattr(event_copy['start'], 'isoformat'):
-                    event_copy['start'] = event_copy['start'].isoformat()
-                if hasattr(event_copy['end'], 'isoformat'):
-                    event_copy['end'] = event_copy['end'].isoformat()
-                events_data.append(event_copy)
-            
-            with open(self.data_file, 'w') as f:
-                json.dump(events_data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving calendar events: {e}")
+            # Datetimes are written as ISO strings by the serializer
+            write_file(self.data_file, self.events)
+        except Exception:
+            logger.exception("Error saving calendar events")
     
     def get_events(self, start_date: datetime, end_date: datetime) -> List[Dict]:
         """Get events within a date range"""
@@ -206,11 +200,12 @@ class CalendarService:
         
         return True
     
+    @traced("calendar.find_available_slots")
     def find_available_slots(self, 
                            start_date: datetime, 
                            days: int = 7, 
                            time_preferences: Optional[List[Dict]] = None,
-                           duration_minutes: int = 30) -> List[Dict]:
+                           duration_minutes: int = 30) -> List[Slot]:
         """
         Find available time slots within a date range based on user preferences
         
@@ -224,11 +219,13 @@ class CalendarService:
             duration_minutes: Appointment duration in minutes
             
         Returns:
-            List of available time slots
+            Available slots in start order
         """
         available_slots = []
         current_date = start_date
         end_date = start_date + timedelta(days=days)
+        duration = duration_minutes * 60
+        step = 15 * 60
         
         # If no preferences are set, use business hours (9-5) on weekdays
         if not time_preferences:
@@ -261,33 +258,25 @@ class CalendarService:
                     end_hour, end_minute, 0
                 )
                 
-                # Get busy periods for this day
-                busy_periods = self.provider.get_free_busy(day_start, day_end)
+                # Busy periods for this day, as epoch seconds
+                busy_periods = [
+                    (int(period["start"].timestamp()), int(period["end"].timestamp()))
+                    for period in self.provider.get_free_busy(day_start, day_end)
+                    if period.get("start") and period.get("end")
+                ]
                 
                 # Create time slots with 15-minute increments
-                current_slot = day_start
-                while current_slot + timedelta(minutes=duration_minutes) <= day_end:
-                    slot_end = current_slot + timedelta(minutes=duration_minutes)
+                window_end = int(day_end.timestamp())
+                slot_start = int(day_start.timestamp())
+                while slot_start + duration <= window_end:
+                    slot_end = slot_start + duration
                     
                     # Check if slot overlaps with any busy periods
-                    is_available = True
-                    for period in busy_periods:
-                        period_start = period.get("start")
-                        period_end = period.get("end")
-                        
-                        if period_start and period_end:
-                            if (current_slot < period_end and slot_end > period_start):
-                                is_available = False
-                                break
-                    
-                    if is_available:
-                        available_slots.append({
-                            "start": current_slot,
-                            "end": slot_end
-                        })
+                    if not any(slot_start < busy_end and slot_end > busy_start
+                               for busy_start, busy_end in busy_periods):
+                        available_slots.append(Slot(slot_start, slot_end))
                     
-                    # Move to next slot (15-minute increments)
-                    current_slot += timedelta(minutes=15)
+                    slot_start += step
             
             # Move to next day
             current_date += timedelta(days=1)
@@ -1,10 +1,18 @@
+import logging
 import os
-import json
 import time
-from typing import Dict, List, Optional
+import uuid
+from typing import Dict, Iterator, List, Optional
 from datetime import datetime
 from abc import ABC, abstractmethod
 
+from schedulur.metrics import OUTBOUND_CALLS
+from schedulur.storage.jsonl_log import JsonlLog
+from schedulur.storage.serialization import read_file
+from schedulur.tracing import traced
+
+logger = logging.getLogger(__name__)
+
 class CommunicationProvider(ABC):
     """Abstract base class for communication providers"""
     
@@ -21,64 +29,78 @@ class CommunicationProvider(ABC):
 class MockCommunicationProvider(CommunicationProvider):
     """Mock communication provider for testing"""
     
-    def __init__(self):
-        self.sent_messages = []
-        self.calls = []
-        self.data_file = os.path.join(os.path.dirname(__file__), "../data/communication.json")
+    _shared: Dict[str, "MockCommunicationProvider"] = {}
+    
+    def __init__(self, data_file: str = None):
+        self.data_file = data_file or os.path.join(os.path.dirname(__file__), "../data/communication.jsonl")
+        self.log = JsonlLog.open(self.data_file)
         self.load_data()
     
-    def load_data(self):
-        """Load communication data from file"""
-        try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                    self.sent_messages = data.get('messages', [])
-                    self.calls = data.get('calls', [])
-        except Exception as e:
-            print(f"Error loading communication data: {e}")
-            self.sent_messages = []
-            self.calls = []
+    @classmethod
+    def shared(cls, data_file: str = None) -> "MockCommunicationProvider":
+        """Get the shared mock provider for a data file"""
+        if data_file not in cls._shared:
+            cls._shared[data_file] = cls(data_file)
+        return cls._shared[data_file]
+    
+    @property
+    def sent_messages(self) -> List[Dict]:
+        """All sent messages, read from the log on demand"""
+        return list(self.iter_messages())
+    
+    @property
+    def calls(self) -> List[Dict]:
+        """All calls, read from the log on demand"""
+        return list(self.iter_calls())
     
-    def save_data(self):
-        """Save communication data to file"""
+    def iter_messages(self) -> Iterator[Dict]:
+        """Stream sent messages oldest-first"""
+        return self.log.iter_records(kind='message')
+    
+    def iter_calls(self) -> Iterator[Dict]:
+        """Stream calls oldest-first"""
+        return self.log.iter_records(kind='call')
+    
+    def load_data(self):
+        """Import the legacy communication.json snapshot into the log, once"""
+        legacy_file = os.path.splitext(self.data_file)[0] + ".json"
         try:
-            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-            
-            with open(self.data_file, 'w') as f:
-                json.dump({
-                    'messages': self.sent_messages,
-                    'calls': self.calls
-                }, f, indent=2)
-        except Exception as e:
-            print(f"Error saving communication data: {e}")
+            if os.path.exists(legacy_file):
+                data = read_file(legacy_file)
+                self.log.extend([dict(m, kind='message') for m in data.get('messages', [])])
+                self.log.extend([dict(c, kind='call') for c in data.get('calls', [])])
+                os.replace(legacy_file, legacy_file + ".migrated")
+        except Exception:
+            logger.exception("Error loading communication data")
     
+    @traced("communication.mock.send_message")
     def send_message(self, to: str, subject: str, body: str) -> bool:
         """Send a message to a recipient"""
         message = {
+            'kind': 'message',
             'to': to,
             'subject': subject,
             'body': body,
             'timestamp': datetime.now().isoformat(),
             'status': 'sent'
         }
-        self.sent_messages.append(message)
-        self.save_data()
+        self.log.append(message)
         return True
     
+    @traced("communication.mock.make_call")
     def make_call(self, to: str, message: str) -> Dict:
         """Make a voice call to a recipient"""
         call = {
+            'kind': 'call',
             'to': to,
             'message': message,
             'timestamp': datetime.now().isoformat(),
             'status': 'completed',
-            'call_id': f"call-{len(self.calls) + 1}",
+            'call_id': f"call-{uuid.uuid4().hex[:12]}",
             'duration': 120,  # 2 minutes in seconds
             'transcript': self._generate_mock_transcript(message, to)
         }
-        self.calls.append(call)
-        self.save_data()
+        self.log.append(call)
         return call
     
     def _generate_mock_transcript(self, message: str, to: str) -> str:
@@ -163,7 +185,7 @@ class EmailProvider(CommunicationProvider):
         self.password = password or os.environ.get('SMTP_PASSWORD')
         
         # Fallback to mock provider for testing
-        self.mock_provider = MockCommunicationProvider()
+        self.mock_provider = MockCommunicationProvider.shared()
     
     def send_message(self, to: str, subject: str, body: str) -> bool:
         # TODO: Implement real email sending logic
@@ -182,7 +204,7 @@ class TwilioProvider(CommunicationProvider):
         self.phone_number = phone_number or os.environ.get('TWILIO_PHONE_NUMBER')
         
         # Fallback to mock provider for testing
-        self.mock_provider = MockCommunicationProvider()
+        self.mock_provider = MockCommunicationProvider.shared()
     
     def send_message(self, to: str, subject: str, body: str) -> bool:
         # Send SMS via Twilio
@@ -203,9 +225,9 @@ class CommunicationService:
         try:
             self.voice_provider = TwilioProvider()
         except Exception as e:
-            print(f"Voice provider initialization failed: {e}")
+            logger.warning("Voice provider initialization failed, using the mock provider: %s", e)
             # Use mock provider as fallback
-            self.voice_provider = MockCommunicationProvider()
+            self.voice_provider = MockCommunicationProvider.shared()
     
     def send_email(self, to: str, subject: str, body: str) -> bool:
         """Send an email"""
@@ -220,8 +242,15 @@ class CommunicationService:
     def make_call(self, to: str, message: str) -> Dict:
         """Make a voice call"""
         if not self.voice_provider:
+            OUTBOUND_CALLS.inc(channel="communication", outcome="not_configured")
             raise ValueError("Voice/SMS provider not initialized")
-        return self.voice_provider.make_call(to, message)
+        try:
+            result = self.voice_provider.make_call(to, message)
+        except Exception:
+            OUTBOUND_CALLS.inc(channel="communication", outcome="failed")
+            raise
+        OUTBOUND_CALLS.inc(channel="communication", outcome="initiated")
+        return result
     
     def call_doctor_for_appointment(self, 
                                   doctor_name: str,
@@ -1,15 +1,33 @@
+import json
+import logging
 import os
-from retell import Retell
+from datetime import datetime
 
-# Try to initialize Retell client, but handle case where API key is not set
-try:
-    retell = Retell(api_key=os.environ.get("RETELL_API_KEY", ""))
-except Exception as e:
-    print(f"Failed to initialize Retell client: {e}")
-    retell = None
+from schedulur.metrics import OUTBOUND_CALLS
+from schedulur.storage.transcript_index import get_transcript_index
+from schedulur.tracing import traced
 
+logger = logging.getLogger(__name__)
 
-def call_doctor(to_number, user_name, doctor_name, insurance_type, timeframe="3 months"):
+_retell = None
+
+
+def get_retell_client():
+    """Create the Retell client on first use; importing the SDK is slow"""
+    global _retell
+    if _retell is None:
+        # Try to initialize Retell client, but handle case where API key is not set
+        try:
+            from retell import Retell
+            _retell = Retell(api_key=os.environ.get("RETELL_API_KEY", ""))
+        except Exception:
+            logger.exception("Failed to initialize Retell client")
+            return None
+    return _retell
+
+
+@traced("retell.create_call")
+def call_doctor(to_number, user_name, doctor_name, insurance_type, timeframe="3 months", metadata=None):
     """
     Call a doctor's office using Retell API
 
@@ -18,9 +36,12 @@ def call_doctor(to_number, user_name, doctor_name, insurance_type, timeframe="3
         user_name: Name of the patient
         doctor_name: Name of the doctor
         insurance_type: Type of insurance the patient has
+        metadata: IDs echoed back in the call webhook (doctor_id, user_id, ...)
     """
+    retell = get_retell_client()
     if not retell:
-        print("Retell client not initialized. Cannot make call.")
+        logger.warning("Retell client not initialized. Cannot make call.")
+        OUTBOUND_CALLS.inc(channel="retell", outcome="not_configured")
         return
 
     try:
@@ -29,8 +50,9 @@ def call_doctor(to_number, user_name, doctor_name, insurance_type, timeframe="3
         agent_id = os.environ.get("RETELL_AGENT_ID", "")
 
         if not from_number or not agent_id:
-            print(
+            logger.warning(
                 "Required Retell environment variables are missing (RETELL_FROM_NUMBER, RETELL_AGENT_ID)")
+            OUTBOUND_CALLS.inc(channel="retell", outcome="not_configured")
             return
 
         response = retell.call.create_phone_call(
@@ -42,12 +64,17 @@ def call_doctor(to_number, user_name, doctor_name, insurance_type, timeframe="3
                 "doctor_name": doctor_name,
                 "insurance_type": insurance_type,
                 "timeframe": timeframe
-            }
+            },
+            metadata=metadata or {}
         )
-        print(f"Call initiated: {response}")
+        logger.info("Call initiated", extra={"call_id": getattr(response, "call_id", None),
+                                             "doctor_id": (metadata or {}).get("doctor_id"),
+                                             "user_id": (metadata or {}).get("user_id")})
+        OUTBOUND_CALLS.inc(channel="retell", outcome="initiated")
         return response
-    except Exception as e:
-        print(f"Error making call: {e}")
+    except Exception:
+        logger.exception("Error making call")
+        OUTBOUND_CALLS.inc(channel="retell", outcome="failed")
         return None
 
 # call_data:
@@ -173,13 +200,70 @@ def call_doctor(to_number, user_name, doctor_name, insurance_type, timeframe="3
 # }
 
 
+# Header carrying Retell's signature of a webhook body
+SIGNATURE_HEADER = "X-Retell-Signature"
+
+# Webhook events Retell sends; anything else is labelled "other" in the metrics
+WEBHOOK_EVENTS = ("call_started", "call_ended", "call_analyzed")
+
+
+def verify_webhook(call_data, signature):
+    """
+    Check that a webhook was signed by Retell with our API key
+
+    Returns:
+        False when the signature is missing or wrong, or no API key is configured
+    """
+    api_key = os.environ.get("RETELL_API_KEY")
+    if not api_key or not signature:
+        return False
+    retell = get_retell_client()
+    if not retell:
+        return False
+    try:
+        # Retell signs the compact JSON encoding of the body
+        return bool(retell.verify(json.dumps(call_data, separators=(",", ":"), ensure_ascii=False),
+                                  api_key=api_key, signature=signature))
+    except Exception:
+        logger.exception("Error verifying webhook signature")
+        return False
+
+
+@traced("retell.receive_webhook")
 def receive_webhook(call_data):
     if call_data['event'] != 'call_analyzed':
-        print("Not a call_analyzed event. Exiting.")
+        logger.debug("Ignoring %s webhook", call_data['event'])
         return
 
+    call = call_data['call']
+    index_call_transcript(call)
+
     # analysis data
-    call_analysis = call_data['call']['call_analysis']
+    call_analysis = call['call_analysis']
     custom_data = call_analysis['custom_analysis_data']
 
     return custom_data
+
+
+@traced("retell.index_call_transcript")
+def index_call_transcript(call):
+    """Add a finished call's transcript to the full-text index"""
+    transcript = call.get('transcript')
+    if not transcript:
+        return False
+
+    metadata = call.get('metadata') or {}
+    start_timestamp = call.get('start_timestamp')
+
+    try:
+        return get_transcript_index().index_call(
+            call_key=call['call_id'],
+            transcript=transcript,
+            appointment_id=metadata.get('appointment_id'),
+            doctor_id=metadata.get('doctor_id'),
+            user_id=metadata.get('user_id'),
+            call_time=datetime.fromtimestamp(start_timestamp / 1000) if start_timestamp else None
+        )
+    except Exception:
+        logger.exception("Error indexing call transcript")
+        return False
@@ -0,0 +1,185 @@
+"""
+Leveled, structured logging
+
+Modules log through the standard library, one logger per module:
+
+    logger = logging.getLogger(__name__)
+    logger.info("Call initiated", extra={"call_id": call_id})
+
+configure_logging() (called by the app entry points) sends everything under
+the "schedulur" logger through a queue to a background thread that formats
+and writes it, so a request never waits on stderr. Each line is a JSON
+object carrying the request's correlation id and any extra fields; set
+SCHEDULUR_LOG_FORMAT=text for plain lines when reading logs by eye.
+
+SCHEDULUR_LOG_LEVEL picks the level (INFO by default). With DEBUG on,
+SCHEDULUR_LOG_DEBUG_SAMPLE=N keeps one in N debug lines from each call
+site, so chatty loops can be watched without flooding the output.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional, TextIO, Tuple
+
+LOG_LEVEL_ENV = "SCHEDULUR_LOG_LEVEL"
+LOG_FORMAT_ENV = "SCHEDULUR_LOG_FORMAT"
+DEBUG_SAMPLE_ENV = "SCHEDULUR_LOG_DEBUG_SAMPLE"
+
+# Header carrying the correlation id in and out of both apps (and between cluster nodes)
+REQUEST_ID_HEADER = "X-Request-ID"
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(correlation_id)s] %(message)s"
+
+_correlation_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("correlation_id", default=None)
+
+# Attributes every LogRecord has; anything else came from extra= and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime",
+                                                                                      "correlation_id"}
+
+
+def new_correlation_id() -> str:
+    return uuid.uuid4().hex
+
+def get_correlation_id() -> Optional[str]:
+    """Correlation id of the request (or job) this code is running for"""
+    return _correlation_id.get()
+
+def set_correlation_id(value: Optional[str]) -> contextvars.Token:
+    """Tag everything logged from this context on with value; returns a token for reset_correlation_id"""
+    return _correlation_id.set(value)
+
+def reset_correlation_id(token: contextvars.Token) -> None:
+    _correlation_id.reset(token)
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Stamp records with the current correlation id (in the logging thread, before queueing)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = _correlation_id.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keep one in every `rate` DEBUG records from each call site; other levels always pass"""
+
+    def __init__(self, rate: int = 1):
+        super().__init__()
+        self.rate = max(1, rate)
+        self._seen: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate == 1:
+            return True
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            seen = self._seen.get(site, 0)
+            self._seen[site] = seen + 1
+        return seen % self.rate == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, correlation id, extra fields and traceback"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "correlation_id", None):
+            entry["correlation_id"] = record.correlation_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queues records with their message and traceback rendered, but fields left for the formatter"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks can't cross to the listener thread safely; keep their text
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_configure_lock = threading.Lock()
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                      stream: Optional[TextIO] = None, force: bool = False) -> logging.Logger:
+    """
+    Route the "schedulur" loggers through a queue to stream (stderr by default)
+
+    Safe to call more than once; later calls change nothing unless force is set.
+
+    Args:
+        level: Level name (default: SCHEDULUR_LOG_LEVEL, else INFO)
+        fmt: "json" or "text" (default: SCHEDULUR_LOG_FORMAT, else json)
+        stream: Where the listener thread writes the lines
+        force: Replace an earlier configuration
+    """
+    global _listener
+    root = logging.getLogger("schedulur")
+    with _configure_lock:
+        if _listener is not None:
+            if not force:
+                return root
+            _stop_listener()
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        if (fmt or os.environ.get(LOG_FORMAT_ENV, "json")).lower() == "text":
+            output.setFormatter(logging.Formatter(TEXT_FORMAT))
+        else:
+            output.setFormatter(JsonFormatter())
+
+        handler = _QueueHandler(queue.SimpleQueue())
+        handler.addFilter(CorrelationIdFilter())
+        handler.addFilter(DebugSamplingFilter(int(os.environ.get(DEBUG_SAMPLE_ENV, "1"))))
+
+        for old in list(root.handlers):
+            root.removeHandler(old)
+        root.addHandler(handler)
+        root.setLevel((level or os.environ.get(LOG_LEVEL_ENV, "INFO")).upper())
+        # The app's lines are written once, by the listener, not again by the root logger's handlers
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+    return root
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def flush_logging() -> None:
+    """Write out everything queued so far (the listener is restarted afterwards)"""
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener.start()
+
+atexit.register(_stop_listener)
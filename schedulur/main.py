@@ -1,25 +1,208 @@
-from fastapi import FastAPI, HTTPException, Depends
+import os
+
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import List, Optional
-from datetime import datetime, time
-import uvicorn
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+from datetime import date as calendar_date, datetime, time
+from pydantic import BaseModel, ValidationError
 
 # Import models
 from schedulur.models.user import User
 from schedulur.models.provider import Provider
-from schedulur.models.appointment import Appointment
+from schedulur.models.appointment import Appointment, AppointmentStatus
+from schedulur.models.slot import Slot
 
 # Import services
-from schedulur.services.user_service import UserService
-from schedulur.services.provider_service import ProviderService
-from schedulur.services.appointment_service import AppointmentService
+from schedulur.container import get_container
+from schedulur.events import SSE_MEDIA_TYPE, parse_last_event_id, sse_stream_async
+from schedulur.logs import (REQUEST_ID_HEADER, configure_logging, new_correlation_id, reset_correlation_id,
+                            set_correlation_id)
+from schedulur.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, get_registry
+from schedulur.profiling import DEFAULT_INTERVAL, MAX_SECONDS, admin_token_matches, sample_process
+from schedulur.services.async_service import AsyncService, async_service, run_blocking
+from schedulur.tracing import get_tracer, recent_traces
 
 # Import utilities
 from schedulur.utils.scheduling import SchedulingOptimizer
+from schedulur.utils.http_cache import (CATALOG_CACHE_CONTROL, COMPUTED_CACHE_CONTROL, PRIVATE_CACHE_CONTROL,
+                                        etag_matches, get_response_cache, make_etag)
+from schedulur.utils.pagination import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NDJSON_MEDIA_TYPE, NEXT_CURSOR_HEADER, Page,
+                                        ndjson_lines, parse_fields)
+from schedulur.storage import serialization
+from schedulur.storage.records import ConflictError
+
+class SchedulurJSONResponse(JSONResponse):
+    """
+    JSON response encoded with schedulur's serializer (orjson when installed).
+
+    Returning one directly from a handler also skips FastAPI's
+    jsonable_encoder pass; datetimes, models and slots are encoded natively.
+    """
+
+    def render(self, content) -> bytes:
+        return serialization.dumps(content)
+
+# Node-local and long-lived endpoints, left out of the traces
+UNTRACED_PATHS = {"/metrics", "/api/traces", "/admin/profile", "/api/stream/appointments"}
+
+# Event streams held open at once by this process; each keeps a subscriber queue until it closes
+MAX_STREAMS = int(os.environ.get("SCHEDULUR_MAX_STREAMS", "16"))
+
+class CorrelationIdMiddleware:
+    """
+    Tag each request's log lines (including work sent to the I/O pool) with its request id
+
+    The request is also timed in a span, whose trace id is the request id,
+    for the service calls it makes to nest under.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        header = REQUEST_ID_HEADER.lower().encode("latin-1")
+        incoming = next((value.decode("latin-1") for name, value in scope["headers"] if name == header), None)
+        correlation_id = incoming or new_correlation_id()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                if request_span is not None:
+                    request_span.set_attribute("status", message["status"])
+                message["headers"] = list(message.get("headers", [])) + [(header, correlation_id.encode("latin-1"))]
+            await send(message)
+
+        token = set_correlation_id(correlation_id)
+        request_span = None
+        if scope["path"] not in UNTRACED_PATHS:
+            request_span = get_tracer().start_span(f'{scope["method"]} {scope["path"]}', path=scope["path"])
+        try:
+            await self.app(scope, receive, send_with_id)
+        except Exception as exc:
+            if request_span is not None:
+                request_span.record_error(exc)
+            raise
+        finally:
+            if request_span is not None:
+                # Name the span after the route rather than the path, once routing has found it
+                endpoint = scope.get("endpoint")
+                if endpoint is not None:
+                    request_span.name = f'{scope["method"]} {endpoint.__name__}'
+                request_span.end()
+            reset_correlation_id(token)
+
+configure_logging()
 
 # Create FastAPI app
-app = FastAPI(title="Schedulur API", description="API for scheduling appointments with healthcare providers")
+app = FastAPI(title="Schedulur API", description="API for scheduling appointments with healthcare providers",
+              default_response_class=SchedulurJSONResponse)
+
+# Shared services (one instance of each store per process), injected as
+# awaitable wrappers: store reads and writes block on file I/O and locks,
+# so they run on a bounded thread pool instead of the event loop
+async def get_user_service() -> AsyncService:
+    return await async_service(get_container(), "user_service")
+
+async def get_provider_service() -> AsyncService:
+    return await async_service(get_container(), "provider_service")
+
+async def get_appointment_service() -> AsyncService:
+    return await async_service(get_container(), "appointment_service")
+
+async def get_doctor_service() -> AsyncService:
+    return await async_service(get_container(), "doctor_service")
+
+# Largest batch a single request may carry
+MAX_BATCH_SIZE = 1000
+
+def check_batch_size(count: int) -> None:
+    if count > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batches are limited to {MAX_BATCH_SIZE} items")
+
+def parse_batch(model_cls: Type[BaseModel],
+                items: List[Dict]) -> Tuple[List[Tuple[int, BaseModel]], List[Optional[Dict]]]:
+    """
+    Validate batch items one by one, so one bad item doesn't reject the rest
+
+    Returns:
+        (index, model) for the valid items, and the per-item results list
+        with the invalid items' 422 results already filled in
+    """
+    check_batch_size(len(items))
+    valid, results = [], [None] * len(items)
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, model_cls.model_validate(item)))
+        except ValidationError as e:
+            results[index] = {"index": index, "status": 422,
+                              "detail": e.errors(include_url=False, include_context=False)}
+    return valid, results
+
+class ListParams:
+    """
+    Query parameters shared by the list endpoints
+
+    limit and cursor page through the records (the next page's cursor is
+    returned in the X-Next-Cursor header), fields=a,b projects each record
+    to those fields, and format=ndjson (or Accept: application/x-ndjson)
+    streams newline-delimited JSON, every record after the cursor unless a
+    limit is given.
+    """
+
+    def __init__(self,
+                 request: Request,
+                 limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                 cursor: Optional[str] = None,
+                 fields: Optional[str] = None,
+                 format: Optional[str] = Query(None, pattern="^(json|ndjson)$")):
+        self.cursor = cursor
+        self.fields = fields
+        self.stream = format == "ndjson" or (format is None and NDJSON_MEDIA_TYPE in request.headers.get("accept", ""))
+        self.limit = limit if limit or self.stream else DEFAULT_PAGE_SIZE
+
+async def list_response(params: ListParams, model_cls: Type[BaseModel],
+                        fetch: Callable[[Optional[int], Optional[str]], Awaitable[Page]]):
+    """Fetch one page (or the whole export) and render it as JSON or NDJSON"""
+    try:
+        fields = parse_fields(params.fields, model_cls.model_fields)
+        page = await fetch(params.limit, params.cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    records = (model.model_dump(include=fields) for model in page.items)
+    headers = {NEXT_CURSOR_HEADER: page.next_cursor} if page.next_cursor else None
+    if params.stream:
+        return StreamingResponse(ndjson_lines(records), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+    return SchedulurJSONResponse(list(records), headers=headers)
+
+def conditional_response(request: Request, etag: str, cache_control: str, content: Any = None,
+                         body: Optional[bytes] = None) -> Response:
+    """304 when the client's If-None-Match already has etag, otherwise the content (or pre-encoded body)"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if body is not None:
+        return Response(body, media_type="application/json", headers=headers)
+    return SchedulurJSONResponse(content, headers=headers)
+
+async def cached_body(key: tuple, compute: Callable, *args) -> bytes:
+    """
+    Encoded result of an expensive computation, from the shared response cache
+
+    key must hold every input and the version of the data compute reads.
+    """
+    cache = get_response_cache()
+    body = cache.get(key)
+    if body is None:
+        body = serialization.dumps(await run_blocking(compute, *args))
+        cache.set(key, body)
+    return body
+
+class SlotCandidate(BaseModel):
+    start_time: datetime
+    end_time: datetime
 
 # Add CORS middleware
 app.add_middleware(
@@ -29,6 +212,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CorrelationIdMiddleware)
+
+@app.exception_handler(ConflictError)
+async def conflict_handler(request, exc: ConflictError):
+    """Another client saved the record first; it should re-read and retry"""
+    return SchedulurJSONResponse(status_code=409, content={"detail": str(exc), "version": exc.actual})
 
 # Health check endpoint
 @app.get("/")
@@ -37,120 +226,207 @@ async def read_root():
 
 # User endpoints
 @app.post("/users/", response_model=User)
-async def create_user(user: User):
-    return UserService.create_user(user)
+async def create_user(user: User, user_service: AsyncService = Depends(get_user_service)):
+    return await user_service.create_user(user)
 
 @app.get("/users/{user_id}", response_model=User)
-async def get_user(user_id: str):
-    user = UserService.get_user(user_id)
+async def get_user(user_id: str, request: Request, user_service: AsyncService = Depends(get_user_service)):
+    user = await user_service.get_user(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return conditional_response(request, make_etag("user", user.id, user.version), PRIVATE_CACHE_CONTROL, user)
 
 @app.put("/users/{user_id}", response_model=User)
-async def update_user(user_id: str, user: User):
-    updated_user = UserService.update_user(user_id, user)
+async def update_user(user_id: str, user: User, user_service: AsyncService = Depends(get_user_service)):
+    updated_user = await user_service.update_user(user_id, user)
     if not updated_user:
         raise HTTPException(status_code=404, detail="User not found")
     return updated_user
 
 @app.delete("/users/{user_id}")
-async def delete_user(user_id: str):
-    success = UserService.delete_user(user_id)
+async def delete_user(user_id: str, user_service: AsyncService = Depends(get_user_service)):
+    success = await user_service.delete_user(user_id)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User deleted successfully"}
 
-@app.get("/users/", response_model=List[User])
-async def list_users():
-    return UserService.list_users()
+@app.get("/users/")
+async def list_users(params: ListParams = Depends(), user_service: AsyncService = Depends(get_user_service)):
+    return await list_response(params, User, user_service.page_users)
+
+@app.post("/users/{user_id}/availability:check")
+async def check_availability(
+    user_id: str,
+    slots: List[SlotCandidate],
+    user_service: AsyncService = Depends(get_user_service),
+    appointment_service: AsyncService = Depends(get_appointment_service)
+):
+    """Check many candidate slots against the user's availability and appointments in one call"""
+    check_batch_size(len(slots))
+    user = await user_service.get_user(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    busy = [(int(a.start_time.timestamp()), int(a.end_time.timestamp()))
+            for a in await appointment_service.get_user_appointments(user_id)
+            if a.status != AppointmentStatus.CANCELLED]
+    candidates = [Slot.from_datetimes(slot.start_time, slot.end_time) for slot in slots]
+    reasons = await run_blocking(SchedulingOptimizer.check_user_slots, user, candidates, busy)
+    return SchedulurJSONResponse({"results": [
+        {"index": index, "start_time": slot.start_time, "end_time": slot.end_time,
+         "available": reason is None, "reason": reason}
+        for index, (slot, reason) in enumerate(zip(slots, reasons))
+    ]})
 
 # Provider endpoints
 @app.post("/providers/", response_model=Provider)
-async def create_provider(provider: Provider):
-    return ProviderService.create_provider(provider)
+async def create_provider(provider: Provider, provider_service: AsyncService = Depends(get_provider_service)):
+    return await provider_service.create_provider(provider)
 
 @app.get("/providers/{provider_id}", response_model=Provider)
-async def get_provider(provider_id: str):
-    provider = ProviderService.get_provider(provider_id)
+async def get_provider(
+    provider_id: str,
+    request: Request,
+    provider_service: AsyncService = Depends(get_provider_service)
+):
+    provider = await provider_service.get_provider(provider_id)
     if not provider:
         raise HTTPException(status_code=404, detail="Provider not found")
-    return provider
+    etag = make_etag("provider", provider.id, provider.version)
+    return conditional_response(request, etag, CATALOG_CACHE_CONTROL, provider)
 
 @app.put("/providers/{provider_id}", response_model=Provider)
-async def update_provider(provider_id: str, provider: Provider):
-    updated_provider = ProviderService.update_provider(provider_id, provider)
+async def update_provider(
+    provider_id: str,
+    provider: Provider,
+    provider_service: AsyncService = Depends(get_provider_service)
+):
+    updated_provider = await provider_service.update_provider(provider_id, provider)
     if not updated_provider:
         raise HTTPException(status_code=404, detail="Provider not found")
     return updated_provider
 
 @app.delete("/providers/{provider_id}")
-async def delete_provider(provider_id: str):
-    success = ProviderService.delete_provider(provider_id)
+async def delete_provider(provider_id: str, provider_service: AsyncService = Depends(get_provider_service)):
+    success = await provider_service.delete_provider(provider_id)
     if not success:
         raise HTTPException(status_code=404, detail="Provider not found")
     return {"message": "Provider deleted successfully"}
 
-@app.get("/providers/", response_model=List[Provider])
+@app.get("/providers/")
 async def list_providers(
     specialization: Optional[str] = None,
-    insurance: Optional[str] = None
+    insurance: Optional[str] = None,
+    params: ListParams = Depends(),
+    provider_service: AsyncService = Depends(get_provider_service)
 ):
-    if specialization and insurance:
-        # Filter by both
-        providers_by_specialization = ProviderService.filter_providers_by_specialization(specialization)
-        return [p for p in providers_by_specialization if insurance in p.accepted_insurance]
-    elif specialization:
-        return ProviderService.filter_providers_by_specialization(specialization)
-    elif insurance:
-        return ProviderService.filter_providers_by_insurance(insurance)
-    else:
-        return ProviderService.list_providers()
+    return await list_response(params, Provider, lambda limit, cursor: provider_service.page_providers(
+        limit, cursor, specialization=specialization, insurance=insurance))
+
+@app.post("/providers:batch")
+async def create_providers_batch(
+    items: List[Dict],
+    provider_service: AsyncService = Depends(get_provider_service)
+):
+    """Create many providers at once; returns a result per item, in order"""
+    valid, results = parse_batch(Provider, items)
+    created = await provider_service.create_providers([provider for _, provider in valid])
+    for (index, _), provider in zip(valid, created):
+        results[index] = {"index": index, "status": 201, "provider": provider}
+    return SchedulurJSONResponse({"results": results})
+
+# Doctor endpoints
+@app.get("/doctors")
+async def get_doctors(ids: str, request: Request, doctor_service: AsyncService = Depends(get_doctor_service)):
+    """Fetch many doctors by comma-separated ID"""
+    doctor_ids = list(dict.fromkeys(doctor_id for doctor_id in ids.split(",") if doctor_id))
+    check_batch_size(len(doctor_ids))
+    found = await doctor_service.get_doctors(doctor_ids)
+    etag = make_etag("doctors", [(doctor_id, found[doctor_id].version if doctor_id in found else None)
+                                 for doctor_id in doctor_ids])
+    return conditional_response(request, etag, CATALOG_CACHE_CONTROL, {
+        "doctors": [found[doctor_id].to_dict() for doctor_id in doctor_ids if doctor_id in found],
+        "missing": [doctor_id for doctor_id in doctor_ids if doctor_id not in found],
+    })
 
 # Appointment endpoints
 @app.post("/appointments/", response_model=Appointment)
-async def create_appointment(appointment: Appointment):
-    created_appointment = AppointmentService.create_appointment(appointment)
+async def create_appointment(
+    appointment: Appointment,
+    appointment_service: AsyncService = Depends(get_appointment_service)
+):
+    created_appointment = await appointment_service.create_appointment(appointment)
     if not created_appointment:
         raise HTTPException(status_code=400, detail="Could not create appointment. Check user/provider IDs, insurance compatibility, and slot availability.")
     return created_appointment
 
+@app.post("/appointments:batch")
+async def create_appointments_batch(
+    items: List[Dict],
+    appointment_service: AsyncService = Depends(get_appointment_service)
+):
+    """Create many appointments, saving each user's shard once; returns a result per item, in order"""
+    valid, results = parse_batch(Appointment, items)
+    created = await appointment_service.create_appointments([appointment for _, appointment in valid])
+    for (index, _), appointment in zip(valid, created):
+        if appointment:
+            results[index] = {"index": index, "status": 201, "appointment": appointment.to_dict()}
+        else:
+            results[index] = {"index": index, "status": 404, "detail": "Doctor not found"}
+    return SchedulurJSONResponse({"results": results})
+
 @app.get("/appointments/{appointment_id}", response_model=Appointment)
-async def get_appointment(appointment_id: str):
-    appointment = AppointmentService.get_appointment(appointment_id)
+async def get_appointment(
+    appointment_id: str,
+    request: Request,
+    appointment_service: AsyncService = Depends(get_appointment_service)
+):
+    appointment = await appointment_service.get_appointment(appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
-    return appointment
+    etag = make_etag("appointment", appointment.id, appointment.version)
+    return conditional_response(request, etag, PRIVATE_CACHE_CONTROL, appointment)
 
 @app.put("/appointments/{appointment_id}", response_model=Appointment)
-async def update_appointment(appointment_id: str, appointment: Appointment):
-    updated_appointment = AppointmentService.update_appointment(appointment_id, appointment)
+async def update_appointment(
+    appointment_id: str,
+    appointment: Appointment,
+    appointment_service: AsyncService = Depends(get_appointment_service)
+):
+    try:
+        updated_appointment = await appointment_service.update_appointment(appointment_id, appointment)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not updated_appointment:
         raise HTTPException(status_code=400, detail="Could not update appointment. Check slot availability.")
     return updated_appointment
 
 @app.delete("/appointments/{appointment_id}")
-async def delete_appointment(appointment_id: str):
-    success = AppointmentService.delete_appointment(appointment_id)
+async def delete_appointment(
+    appointment_id: str,
+    appointment_service: AsyncService = Depends(get_appointment_service)
+):
+    success = await appointment_service.delete_appointment(appointment_id)
     if not success:
         raise HTTPException(status_code=404, detail="Appointment not found")
     return {"message": "Appointment deleted successfully"}
 
-@app.get("/appointments/", response_model=List[Appointment])
+@app.get("/appointments/")
 async def list_appointments(
     user_id: Optional[str] = None,
-    provider_id: Optional[str] = None
+    provider_id: Optional[str] = None,
+    params: ListParams = Depends(),
+    appointment_service: AsyncService = Depends(get_appointment_service)
 ):
-    if user_id:
-        return AppointmentService.get_user_appointments(user_id)
-    elif provider_id:
-        return AppointmentService.get_provider_appointments(provider_id)
-    else:
-        return AppointmentService.list_appointments()
+    return await list_response(params, Appointment, lambda limit, cursor: appointment_service.page_appointments(
+        limit, cursor, user_id=user_id, provider_id=provider_id))
 
 @app.post("/appointments/{appointment_id}/cancel")
-async def cancel_appointment(appointment_id: str):
-    success = AppointmentService.cancel_appointment(appointment_id)
+async def cancel_appointment(
+    appointment_id: str,
+    appointment_service: AsyncService = Depends(get_appointment_service)
+):
+    success = await appointment_service.cancel_appointment(appointment_id)
     if not success:
         raise HTTPException(status_code=404, detail="Appointment not found")
     return {"message": "Appointment cancelled successfully"}
@@ -160,30 +436,28 @@ async def cancel_appointment(appointment_id: str):
 async def get_available_slots(
     provider_id: str,
     date: str,
-    duration_minutes: Optional[int] = None
+    request: Request,
+    duration_minutes: Optional[int] = None,
+    provider_service: AsyncService = Depends(get_provider_service),
+    appointment_service: AsyncService = Depends(get_appointment_service)
 ):
     try:
         # Parse the date string into a datetime object
         parsed_date = datetime.strptime(date, "%Y-%m-%d")
         
-        # If duration is not specified, get it from the provider
-        if not duration_minutes:
-            provider = ProviderService.get_provider(provider_id)
-            if not provider:
-                raise HTTPException(status_code=404, detail="Provider not found")
-            duration_minutes = provider.appointment_duration
-        
-        slots = AppointmentService.find_available_slots(provider_id, parsed_date, duration_minutes)
-        
-        # Convert datetime objects to strings for JSON response
-        formatted_slots = [
-            {
-                'start_time': slot['start_time'].isoformat(),
-                'end_time': slot['end_time'].isoformat()
-            } for slot in slots
-        ]
+        provider = await provider_service.get_provider(provider_id)
+        if not provider:
+            raise HTTPException(status_code=404, detail="Provider not found")
         
-        return formatted_slots
+        # Open slots change when the provider or any booking changes
+        key = ("available-slots", provider.id, provider.version, await appointment_service.data_version(),
+               date, duration_minutes)
+        etag = make_etag(*key)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return conditional_response(request, etag, COMPUTED_CACHE_CONTROL)
+        body = await cached_body(key, lambda: SchedulingOptimizer.provider_slots(
+            provider, parsed_date, days=1, duration_minutes=duration_minutes))
+        return conditional_response(request, etag, COMPUTED_CACHE_CONTROL, body=body)
     
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
@@ -192,74 +466,96 @@ async def get_available_slots(
 @app.get("/users/{user_id}/best-providers")
 async def find_best_providers(
     user_id: str,
+    request: Request,
     specialization: Optional[str] = None,
-    max_results: Optional[int] = 5
+    max_results: Optional[int] = 5,
+    user_service: AsyncService = Depends(get_user_service),
+    provider_service: AsyncService = Depends(get_provider_service),
+    appointment_service: AsyncService = Depends(get_appointment_service)
 ):
-    user = UserService.get_user(user_id)
+    user = await user_service.get_user(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    results = SchedulingOptimizer.find_best_providers(user, specialization, max_results)
-    
-    # Format the results for JSON response
-    formatted_results = []
-    for result in results:
-        formatted_slots = [
-            {
-                'start_time': slot['start_time'].isoformat(),
-                'end_time': slot['end_time'].isoformat()
-            } for slot in result['available_slots']
-        ]
-        
-        formatted_results.append({
-            'provider': result['provider'],
-            'available_slots': formatted_slots,
-            'total_available_slots': result['total_available_slots']
-        }
-    
-    return formatted_results
+    # Slots are offered from today on, so the date is part of the key too
+    key = ("best-providers", user.id, user.version, specialization, max_results,
+           await provider_service.data_version(), await appointment_service.data_version(), calendar_date.today())
+    etag = make_etag(*key)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return conditional_response(request, etag, COMPUTED_CACHE_CONTROL)
+    body = await cached_body(key, SchedulingOptimizer.find_best_providers, user, specialization, max_results)
+    return conditional_response(request, etag, COMPUTED_CACHE_CONTROL, body=body)
 
 @app.post("/users/{user_id}/appointment-sequence")
 async def recommend_appointment_sequence(
     user_id: str,
-    required_specializations: List[str]
+    required_specializations: List[str],
+    user_service: AsyncService = Depends(get_user_service),
+    provider_service: AsyncService = Depends(get_provider_service),
+    appointment_service: AsyncService = Depends(get_appointment_service)
 ):
-    user = UserService.get_user(user_id)
+    user = await user_service.get_user(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    result = SchedulingOptimizer.recommend_appointment_sequence(user, required_specializations)
-    
-    # Format the results for JSON response
-    formatted_plan = []
-    for plan_item in result['appointment_plan']:
-        formatted_providers = []
-        
-        for provider_item in plan_item['providers']:
-            formatted_slots = [
-                {
-                    'start_time': slot['start_time'].isoformat(),
-                    'end_time': slot['end_time'].isoformat()
-                } for slot in provider_item['available_slots']
-            ]
-            
-            formatted_providers.append({
-                'provider': provider_item['provider'],
-                'available_slots': formatted_slots,
-                'total_available_slots': provider_item['total_available_slots']
-            }
-        
-        formatted_plan.append({
-            'specialization': plan_item['specialization'],
-            'status': plan_item['status'],
-            'providers': formatted_providers
-        })
-    
-    return {
-        'user': result['user'],
-        'appointment_plan': formatted_plan
-    }
+    key = ("appointment-sequence", user.id, user.version, tuple(required_specializations),
+           await provider_service.data_version(), await appointment_service.data_version(), calendar_date.today())
+    body = await cached_body(key, SchedulingOptimizer.recommend_appointment_sequence, user, required_specializations)
+    return Response(body, media_type="application/json")
+
+# Monitoring
+@app.get("/metrics")
+async def metrics():
+    """Counters, gauges and timings in the Prometheus text format"""
+    return Response(get_registry().render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/api/traces")
+async def traces(request: Request, limit: int = Query(20, ge=0, le=200), trace_id: Optional[str] = None):
+    """Recent traces from this process's span buffer, newest first (admin token required)"""
+    # Spans carry user and doctor IDs from every request, not just the caller's
+    if not admin_token_matches(request.headers.get("authorization")):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return {"traces": recent_traces(get_tracer().spans(trace_id), limit)}
+
+@app.get("/admin/profile")
+async def admin_profile(request: Request, seconds: float = Query(10, ge=0, le=MAX_SECONDS),
+                        interval: float = Query(DEFAULT_INTERVAL, gt=0),
+                        format: str = Query("collapsed", pattern="^(collapsed|json)$")):
+    """Sample this worker's stacks, event loop included, for a few seconds (admin token required)"""
+    if not admin_token_matches(request.headers.get("authorization")):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    # The sampler waits on the I/O pool, leaving the loop free to be sampled
+    profile = await run_blocking(sample_process, seconds, interval)
+    if profile is None:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    if format == "json":
+        return {"seconds": profile.seconds, "samples": profile.samples, "interval": profile.interval,
+                "top": profile.top_functions(), "collapsed": profile.collapsed()}
+    return Response(profile.collapsed(), media_type="text/plain",
+                    headers={"Content-Disposition": "attachment; filename=profile.folded",
+                             "X-Profile-Samples": str(profile.samples)})
+
+# Live updates
+@app.get("/api/stream/appointments")
+async def stream_appointments(user_id: str, request: Request):
+    """
+    Server-sent events for a user's appointments and calls, as they change
+
+    The JSON API has no user logins and is meant for trusted clients, so any
+    user's stream can be opened here; the admin token is required. Browsers
+    use the web app's stream, which is scoped to the logged-in user.
+    """
+    if not admin_token_matches(request.headers.get("authorization")):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    event_bus = get_container().event_bus
+    if event_bus.subscriber_count() >= MAX_STREAMS:
+        return Response(status_code=204)
+    last_event_id = parse_last_event_id(request.headers.get("last-event-id"))
+    subscription = event_bus.subscribe_async(user_id, last_event_id)
+    return StreamingResponse(sse_stream_async(subscription), media_type=SSE_MEDIA_TYPE,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 # Run the application
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("schedulur.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""
+In-process metrics, exported in the Prometheus text format
+
+Hot paths record into module-level metrics from the shared registry:
+
+    STORE_SAVE_SECONDS = get_registry().histogram(
+        "schedulur_store_save_seconds", "Time to write a store", ["store"])
+
+    with STORE_SAVE_SECONDS.time(store="users"):
+        ...
+
+Both apps serve the registry at /metrics for a Prometheus server (or curl)
+to scrape; nothing runs in the background and nothing is sent anywhere.
+Values are per process, like the stores' in-memory caches.
+"""
+
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from schedulur.utils.histogram import LogHistogram
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Quantiles exported for every histogram
+QUANTILES = (0.5, 0.9, 0.99)
+
+LabelValues = Tuple[str, ...]
+# One exported line: name suffix, (label, value) pairs and the value
+Sample = Tuple[str, Sequence[Tuple[str, str]], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """A named family of series, one per combination of label values"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {list(self.labelnames)}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, values: LabelValues, *extra: Tuple[str, str]) -> List[Tuple[str, str]]:
+        return list(zip(self.labelnames, values)) + list(extra)
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """A count that only goes up"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [("", self._labels(values), value) for values, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    """A value that goes up and down, set directly or read from a callback at scrape time"""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float], **labels) -> None:
+        """Read the value from fn whenever the metrics are exported"""
+        with self._lock:
+            self._functions[self._key(labels)] = fn
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        fn = self._functions.get(key)
+        return fn() if fn is not None else self._values.get(key, 0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = dict(self._values)
+            functions = dict(self._functions)
+        for values, fn in functions.items():
+            try:
+                items[values] = fn()
+            except Exception:
+                logger.exception("Error reading gauge %s", self.name)
+        return [("", self._labels(values), value) for values, value in sorted(items.items())]
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values (durations, sizes)
+
+    Each series is a LogHistogram, so quantiles stay within 1% of the true
+    value without choosing bucket bounds up front; it is exported as a
+    Prometheus summary (quantiles, _sum and _count).
+    """
+
+    type = "summary"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 relative_accuracy: float = 0.01):
+        super().__init__(name, documentation, labelnames)
+        self.relative_accuracy = relative_accuracy
+        self._histograms: Dict[LabelValues, LogHistogram] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LogHistogram(self.relative_accuracy)
+            histogram.add(value)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe how long the block takes, in seconds (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def timed(self, **labels) -> Callable[[Callable], Callable]:
+        """Decorator form of time()"""
+        def decorate(fn: Callable) -> Callable:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def histogram(self, **labels) -> Optional[LogHistogram]:
+        return self._histograms.get(self._key(labels))
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        with self._lock:
+            for values, histogram in sorted(self._histograms.items()):
+                for q in QUANTILES:
+                    samples.append(("", self._labels(values, ("quantile", str(q))), histogram.quantile(q)))
+                samples.append(("_sum", self._labels(values), histogram.sum))
+                samples.append(("_count", self._labels(values), histogram.count))
+        return samples
+
+
+class Registry:
+    """The metrics of one process; metrics are created on first request and shared after"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, metric_cls, name: str, documentation: str, labelnames: Sequence[str]) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_cls(name, documentation, labelnames)
+            elif type(metric) is not metric_cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered differently")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Histogram:
+        return self._get(Histogram, name, documentation, labelnames)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_registry = Registry()
+
+def get_registry() -> Registry:
+    """Get the process-wide metrics registry"""
+    return _registry
+
+
+# Metrics shared by several modules
+
+CACHE_REQUESTS = _registry.counter(
+    "schedulur_cache_requests_total", "Cache lookups, by cache and hit or miss", ["cache", "result"])
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+# Stages: total, local (mock data), geocode and provider_api (the real directory)
+SEARCH_SECONDS = _registry.histogram(
+    "schedulur_search_seconds", "Doctor search time, by stage", ["stage"])
+
+# Channels: retell (real calls) and communication (the provider facade);
+# outcomes: initiated, failed, not_configured, skipped
+OUTBOUND_CALLS = _registry.counter(
+    "schedulur_outbound_calls_total", "Calls placed to doctors' offices, by channel and outcome",
+    ["channel", "outcome"])
@@ -2,6 +2,8 @@ from pydantic import BaseModel
 from typing import Optional, Dict, List
 from datetime import datetime
 
+from schedulur.storage.blob_store import get_transcript_store
+
 class AppointmentStatus:
     REQUESTED = "requested"
     SCHEDULED = "scheduled"
@@ -27,29 +29,22 @@ class Appointment(BaseModel):
     location: Optional[str] = None
     virtual: bool = False
     
-    # Call details
-    call_transcript: Optional[str] = None
+    # Call details (transcript text lives in the transcript blob store)
+    call_transcript_ref: Optional[str] = None
     call_timestamp: Optional[datetime] = None
     call_duration_seconds: Optional[int] = None
     
     # Calendar event ID (once added to calendar)
     calendar_event_id: Optional[str] = None
+
+    # Bumped on every save; an update must carry the version it was read at
+    version: Optional[int] = None
+    
+    @property
+    def call_transcript(self) -> Optional[str]:
+        """Load the call transcript from the blob store"""
+        return get_transcript_store().get(self.call_transcript_ref)
     
     def to_dict(self) -> Dict:
-        """Convert model to dictionary for easier JSON serialization."""
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "doctor_id": self.doctor_id,
-            "start_time": self.start_time.isoformat() if self.start_time else None,
-            "end_time": self.end_time.isoformat() if self.end_time else None,
-            "status": self.status,
-            "reason": self.reason,
-            "notes": self.notes,
-            "location": self.location,
-            "virtual": self.virtual,
-            "call_transcript": self.call_transcript,
-            "call_timestamp": self.call_timestamp.isoformat() if self.call_timestamp else None,
-            "call_duration_seconds": self.call_duration_seconds,
-            "calendar_event_id": self.calendar_event_id
-        }
\ No newline at end of file
+        """Convert model to a dictionary; datetimes are left for the serializer to encode."""
+        return self.model_dump()
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+class Approval(BaseModel):
+    """A user's decision on whether a doctor may be called for them"""
+    user_id: str
+    doctor_id: str
+    approved: bool
+    decided_at: datetime = Field(default_factory=datetime.now)
+    
+    # Bumped on every save; an update must carry the version it was read at
+    version: Optional[int] = None
@@ -1,7 +1,9 @@
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import ClassVar, List, Optional, Dict
 from datetime import time
 
+from schedulur.storage.blob_store import get_transcript_store
+
 class DoctorAvailability(BaseModel):
     days: List[int] = []  # 0 = Monday, 6 = Sunday
     time_slots: List[dict] = []  # [{"day": 0, "start": "09:00", "end": "17:00"}, ...]
@@ -41,29 +43,76 @@ class Doctor(BaseModel):
     # Call tracking
     has_been_called: bool = False
     call_notes: Optional[str] = None
-    call_transcript: Optional[str] = None
+    call_transcript_ref: Optional[str] = None  # Hash of transcript in the blob store
     
     # User preferences
-    user_approval: Optional[bool] = None  # Whether user has approved calling this doctor
+    user_approval: Optional[bool] = None  # The viewing user's decision, filled in from ApprovalService
+    
+    # Bumped on every save; an update must carry the version it was read at
+    version: Optional[int] = None
+
+    @property
+    def call_transcript(self) -> Optional[str]:
+        """Load the call transcript from the blob store"""
+        return get_transcript_store().get(self.call_transcript_ref)
+
+    # Fields exposed by to_dict (the rest stay server-side)
+    PUBLIC_FIELDS: ClassVar[set] = {
+        "id", "name", "specialization", "practice_name", "address", "city", "state", "zip_code",
+        "phone", "email", "website", "accepted_insurance", "appointment_duration", "distance_miles",
+        "earliest_available_slot", "has_been_called", "user_approval", "version"
+    }
 
     def to_dict(self) -> Dict:
         """Convert model to dictionary for easier JSON serialization."""
-        return {
-            "id": self.id,
-            "name": self.name,
-            "specialization": self.specialization,
-            "practice_name": self.practice_name,
-            "address": self.address,
-            "city": self.city,
-            "state": self.state,
-            "zip_code": self.zip_code,
-            "phone": self.phone,
-            "email": self.email,
-            "website": self.website,
-            "accepted_insurance": self.accepted_insurance,
-            "appointment_duration": self.appointment_duration,
-            "distance_miles": self.distance_miles,
-            "earliest_available_slot": self.earliest_available_slot,
-            "has_been_called": self.has_been_called,
-            "user_approval": self.user_approval
-        }
\ No newline at end of file
+        return self.model_dump(include=self.PUBLIC_FIELDS)
+
+class DoctorSummary:
+    """
+    The fields search results and doctor lists render, without the rest of
+    the Doctor model.
+
+    Searches build these straight from the source records; to_doctor()
+    builds the full, validated Doctor when one is needed (e.g. to save it).
+    """
+
+    __slots__ = ("id", "name", "specialization", "practice_name", "address", "city", "state",
+                 "zip_code", "phone", "accepted_insurance", "appointment_duration", "distance_miles",
+                 "earliest_available_slot", "user_approval", "_source")
+
+    FIELDS = __slots__[:-1]
+
+    def __init__(self, source, **fields):
+        self._source = source
+        for name in self.FIELDS:
+            setattr(self, name, fields.get(name))
+        if self.accepted_insurance is None:
+            self.accepted_insurance = []
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DoctorSummary":
+        """Summarize a stored doctor record, keeping it for to_doctor()"""
+        return cls(data, **{name: data.get(name) for name in cls.FIELDS})
+
+    @classmethod
+    def from_doctor(cls, doctor: Doctor) -> "DoctorSummary":
+        """Summarize a Doctor model"""
+        return cls(doctor, **{name: getattr(doctor, name) for name in cls.FIELDS})
+
+    def to_doctor(self) -> Doctor:
+        """Build the full Doctor, including any fields changed on the summary"""
+        fields = {name: getattr(self, name) for name in self.FIELDS}
+        if isinstance(self._source, Doctor):
+            return self._source.model_copy(update=fields)
+        
+        # Fields the record never had stay unset so the model defaults apply
+        data = dict(self._source)
+        data.update((name, value) for name, value in fields.items() if value is not None or name in data)
+        return Doctor(**data)
+
+    def to_dict(self) -> Dict:
+        """Convert to a dictionary for JSON serialization"""
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"DoctorSummary(id={self.id!r}, name={self.name!r}, specialization={self.specialization!r})"
@@ -18,4 +18,7 @@ class Provider(BaseModel):
     accepted_insurance: List[str] = []
     
     # Average appointment duration in minutes
-    appointment_duration: int = 30
\ No newline at end of file
+    appointment_duration: int = 30
+    
+    # Bumped on every save
+    version: Optional[int] = None
\ No newline at end of file
@@ -0,0 +1,37 @@
+from typing import Dict, NamedTuple
+from datetime import datetime
+
+class Slot(NamedTuple):
+    """
+    A bookable time range, as local epoch seconds.
+
+    Slot finders can return thousands of these, so they are plain tuples of
+    two ints rather than dicts of datetimes; convert with start_time/end_time
+    or to_dict() when a view needs datetimes.
+    """
+    start: int
+    end: int
+
+    @classmethod
+    def from_datetimes(cls, start: datetime, end: datetime) -> "Slot":
+        return cls(int(start.timestamp()), int(end.timestamp()))
+
+    @property
+    def start_time(self) -> datetime:
+        return datetime.fromtimestamp(self.start)
+
+    @property
+    def end_time(self) -> datetime:
+        return datetime.fromtimestamp(self.end)
+
+    @property
+    def duration_minutes(self) -> int:
+        return (self.end - self.start) // 60
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """Check whether this slot overlaps the range [start, end)"""
+        return self.start < end and self.end > start
+
+    def to_dict(self) -> Dict:
+        """Convert to the {"start", "end"} datetime dict older callers expect"""
+        return {"start": self.start_time, "end": self.end_time}
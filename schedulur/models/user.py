@@ -21,6 +21,7 @@ class User(BaseModel):
     
     # User preferences
     preferred_contact_method: str = "email"  # email, sms, call
+    calendar_provider: str = "mock"  # google, outlook, mock
     availability: Optional[UserAvailability] = None
     max_travel_distance_miles: Optional[int] = 25
     
@@ -30,4 +31,7 @@ class User(BaseModel):
     # Location
     zip_code: Optional[str] = None
     city: Optional[str] = None
-    state: Optional[str] = None
\ No newline at end of file
+    state: Optional[str] = None
+    
+    # Bumped on every save; an update must carry the version it was read at
+    version: Optional[int] = None
\ No newline at end of file
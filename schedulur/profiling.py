@@ -0,0 +1,194 @@
+"""
+On-demand sampling profiler
+
+A StackSampler thread records the stack of every other thread at a fixed
+interval, so a live worker can be profiled in place (the admin profile
+endpoint of either app) with a cost bounded by the interval and the
+duration, and without restarting it under a profiler:
+
+    with StackSampler(interval=0.005) as sampler:
+        time.sleep(10)
+    sampler.profile.write("worker.folded")
+
+The `schedulur --profile FILE` flag samples one CLI command the same way.
+Profiles are written as collapsed stacks ("frame;frame;frame count" lines),
+which flamegraph.pl, speedscope and inferno read directly;
+top_functions() lists where the samples landed in the services and
+integrations.
+"""
+
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+
+ADMIN_TOKEN_ENV = "SCHEDULUR_ADMIN_TOKEN"
+
+DEFAULT_INTERVAL = 0.005
+MIN_INTERVAL = 0.001
+# Longest profile the endpoints will take
+MAX_SECONDS = 60
+
+# Functions reported by top_functions() unless asked otherwise
+APP_MODULES = ("schedulur.services", "schedulur.integrations")
+
+# A thread whose innermost frame is one of these is waiting, not working; its samples are dropped
+_IDLE_MODULES = {"threading", "queue", "selectors", "socket", "socketserver"}
+_IDLE_FUNCTIONS = {"concurrent.futures.thread:_worker", "logging.handlers:QueueListener.dequeue",
+                   "logging.handlers:dequeue"}
+
+Stack = Tuple[str, ...]
+
+
+def _frame_name(frame) -> str:
+    # co_qualname (Class.method) is Python 3.11+; older interpreters only have the bare name
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+def _is_idle(frame) -> bool:
+    return (frame.f_globals.get("__name__") in _IDLE_MODULES
+            or _frame_name(frame) in _IDLE_FUNCTIONS)
+
+
+class Profile:
+    """Sampled stacks and how often each was seen"""
+
+    def __init__(self, counts: Dict[Stack, int], samples: int, interval: float, seconds: float):
+        self.counts = counts
+        self.samples = samples
+        self.interval = interval
+        self.seconds = seconds
+
+    def collapsed(self) -> str:
+        """The stacks in the collapsed format, outermost frame first"""
+        return "".join(f"{';'.join(stack)} {count}\n"
+                       for stack, count in sorted(self.counts.items(), key=lambda item: -item[1]))
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+
+    def top_functions(self, modules: Sequence[str] = APP_MODULES, limit: int = 20) -> List[Dict]:
+        """
+        Functions from the given modules by the share of samples they were on the stack
+
+        Returns:
+            Dicts of function, total (samples on the stack), self (samples
+            as the innermost app frame) and both as percentages of all
+            samples, busiest first
+        """
+        total: Counter = Counter()
+        own: Counter = Counter()
+        stacks = sum(self.counts.values())
+        for stack, count in self.counts.items():
+            names = [name for name in stack if name.startswith(tuple(modules))]
+            for name in set(names):
+                total[name] += count
+            if names:
+                own[names[-1]] += count
+        percent = lambda count: round(100 * count / stacks, 1) if stacks else 0.0
+        return [{"function": name, "total": count, "self": own[name],
+                 "total_percent": percent(count), "self_percent": percent(own[name])}
+                for name, count in total.most_common(limit)]
+
+
+class StackSampler:
+    """
+    Samples the stacks of running threads on a background thread
+
+    Args:
+        interval: Seconds between samples
+        thread_ids: Only sample these threads (default: all but the sampler)
+        exclude_thread_ids: Never sample these threads
+        include_idle: Keep samples of threads blocked waiting on a lock, queue or socket
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, thread_ids: Optional[Collection[int]] = None,
+                 exclude_thread_ids: Collection[int] = (), include_idle: bool = False):
+        self.interval = max(MIN_INTERVAL, interval)
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.exclude_thread_ids = set(exclude_thread_ids)
+        self.include_idle = include_idle
+        self.profile: Optional[Profile] = None
+        self._counts: Counter = Counter()
+        self._samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own or thread_id in self.exclude_thread_ids:
+                continue
+            if self.thread_ids is not None and thread_id not in self.thread_ids:
+                continue
+            if not self.include_idle and _is_idle(frame):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            self._counts[tuple(reversed(stack))] += 1
+        self._samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> "StackSampler":
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="schedulur-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        self._thread.join()
+        self.profile = Profile(dict(self._counts), self._samples, self.interval,
+                               time.perf_counter() - self._started)
+        return self.profile
+
+    def __enter__(self) -> "StackSampler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+_profiling = threading.Lock()
+
+def sample_process(seconds: float, interval: float = DEFAULT_INTERVAL) -> Optional[Profile]:
+    """
+    Profile every thread of this process for a while (at most MAX_SECONDS)
+
+    Returns None when another profile is already running, so concurrent
+    requests can't stack samplers on a struggling worker.
+    """
+    if not _profiling.acquire(blocking=False):
+        return None
+    try:
+        # Leave out the thread waiting here for the result
+        with StackSampler(interval, exclude_thread_ids={threading.get_ident()}) as sampler:
+            time.sleep(min(max(seconds, 0), MAX_SECONDS))
+        return sampler.profile
+    finally:
+        _profiling.release()
+
+
+def admin_token_matches(supplied: Optional[str]) -> bool:
+    """
+    Whether a request carries the admin token (SCHEDULUR_ADMIN_TOKEN)
+
+    Accepts the bare token or an "Authorization: Bearer <token>" value.
+    Admin endpoints are off altogether while the variable is unset.
+    """
+    expected = os.environ.get(ADMIN_TOKEN_ENV)
+    if not expected or not supplied:
+        return False
+    if supplied.lower().startswith("bearer "):
+        supplied = supplied[7:]
+    return hmac.compare_digest(supplied.strip().encode("utf-8"), expected.encode("utf-8"))
@@ -1,9 +1,16 @@
-import requests
+import logging
 import os
 import time
 from typing import List, Dict, Optional
 from math import cos, radians
-from geopy.geocoders import Nominatim
+
+from schedulur.metrics import SEARCH_SECONDS
+from schedulur.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# requests and geopy are imported inside the methods that use them; they
+# dominate import time and most processes never reach the real API.
 
 # API Integration for Provider Directory
 
@@ -48,14 +55,16 @@ class ProviderDirectoryAPI:
         Returns:
             Provider details as a dictionary
         """
+        import requests
+
         url = f"https://api.stable.uaap.trillianthealth.com/api/provider-directory/providers/{npi}"
 
         try:
             response = requests.get(url, headers=self.headers)
             response.raise_for_status()
             return response.json()
-        except Exception as e:
-            print(f"Error fetching provider details: {e}")
+        except Exception:
+            logger.exception("Error fetching provider details")
             return {}
 
     def get_location_bounds(self, zip_code: str, radius_miles: int = 10) -> Dict:
@@ -70,9 +79,12 @@ class ProviderDirectoryAPI:
             Dictionary with northEast and southWest bounds
         """
         try:
+            from geopy.geocoders import Nominatim
+
             geolocator = Nominatim(user_agent="schedulur-app")
-            location = geolocator.geocode(f'{zip_code}, United States')
-            print(zip_code, location)
+            with span("provider_api.geocode"), SEARCH_SECONDS.time(stage="geocode"):
+                location = geolocator.geocode(f'{zip_code}, United States')
+            logger.debug("Geocoded %s to %s", zip_code, location)
 
             if location is None:
                 return None
@@ -97,8 +109,8 @@ class ProviderDirectoryAPI:
                     'lng': lon - lon_offset
                 }
             }
-        except Exception as e:
-            print(f"Error getting location bounds: {e}")
+        except Exception:
+            logger.exception("Error getting location bounds")
             return None
 
     def search_doctors(self,
@@ -118,6 +130,8 @@ class ProviderDirectoryAPI:
         Returns:
             List of doctors matching the criteria
         """
+        import requests
+
         url = 'https://api.stable.uaap.trillianthealth.com/api/provider-directory/providers:search?pageSize=100&pageNumber=0'
 
         # Get location bounds from zip code
@@ -159,15 +173,17 @@ class ProviderDirectoryAPI:
             payload['locationBounds'] = location_bounds
 
         try:
-            response = requests.post(url, headers=self.headers, json=payload)
-            print(payload, response, response.json())
+            with span("provider_api.search"), SEARCH_SECONDS.time(stage="provider_api"):
+                response = requests.post(url, headers=self.headers, json=payload)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Provider search %s returned %s", payload, response.text)
             response.raise_for_status()
             result = response.json()
 
             # Return the list of doctors
             return result.get('items', [])
-        except Exception as e:
-            print(f"Error searching for doctors: {e}")
+        except Exception:
+            logger.exception("Error searching for doctors")
             return []
 
     def doctor_to_model_format(self, doctor_data: Dict) -> Dict:
@@ -1,4 +1,4 @@
-import json
+import logging
 import os
 import uuid
 from typing import List, Optional, Dict, Tuple
@@ -8,71 +8,102 @@ from schedulur.models.appointment import Appointment, AppointmentStatus
 from schedulur.models.doctor import Doctor
 from schedulur.models.user import User
 from schedulur.services.doctor_service import DoctorService
+from schedulur.services.office_knowledge_service import OfficeKnowledgeService
 from schedulur.integrations.calendar import CalendarService
 from schedulur.integrations.communication import CommunicationService
+from schedulur.storage.blob_store import get_transcript_store
+from schedulur.storage.transcript_index import get_transcript_index
+from schedulur.services.approval_service import ApprovalService
+from schedulur.events import EventBus, get_event_bus
+from schedulur.metrics import OUTBOUND_CALLS
+from schedulur.storage.locking import file_lock
+from schedulur.storage.records import load_records, build_models, open_snapshot, store_stamp
+from schedulur.storage.shards import ShardedStore
+from schedulur.tracing import trace_context, traced
+from schedulur.utils.pagination import Page, page_by
+
+logger = logging.getLogger(__name__)
 
 
 class AppointmentService:
     """Service for managing appointments"""
 
-    def __init__(self, data_file: str = None, user_id: str = None):
+    def __init__(self,
+                 data_file: str = None,
+                 user_id: str = None,
+                 doctor_service: DoctorService = None,
+                 communication_service: CommunicationService = None,
+                 transcript_store=None,
+                 transcript_index=None,
+                 office_knowledge: OfficeKnowledgeService = None,
+                 approval_service: ApprovalService = None,
+                 event_bus: EventBus = None):
         self.data_file = data_file or os.path.join(
             os.path.dirname(__file__), "../data/appointments.json")
-        self.appointments = {}
-        self.doctor_service = DoctorService()
-        self.communication_service = CommunicationService()
+        # One shard per user: appointments/<user id>.json next to the old single file
+        self.store = ShardedStore(os.path.splitext(self.data_file)[0], Appointment, Appointment.to_dict)
+        # Pass shared instances (see schedulur.container) to avoid duplicate stores
+        self.doctor_service = doctor_service or DoctorService()
+        self.approval_service = approval_service or ApprovalService(doctor_service=self.doctor_service)
+        self.communication_service = communication_service or CommunicationService()
+        self.transcript_store = transcript_store or get_transcript_store()
+        self.transcript_index = transcript_index or get_transcript_index()
+        self.office_knowledge = office_knowledge or OfficeKnowledgeService()
+        self.event_bus = event_bus or get_event_bus()
         self.user_id = user_id
-        self.load_appointments()
+        self.migrate_legacy_file()
 
-    def load_appointments(self) -> None:
-        """Load appointments from data file"""
-        try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    appointment_data = json.load(f)
-
-                for appt_id, appt_dict in appointment_data.items():
-                    # Convert datetime strings to datetime objects
-                    if 'start_time' in appt_dict and isinstance(appt_dict['start_time'], str):
-                        appt_dict['start_time'] = datetime.fromisoformat(
-                            appt_dict['start_time'])
-
-                    if 'end_time' in appt_dict and isinstance(appt_dict['end_time'], str):
-                        appt_dict['end_time'] = datetime.fromisoformat(
-                            appt_dict['end_time'])
-
-                    if 'call_timestamp' in appt_dict and isinstance(appt_dict['call_timestamp'], str):
-                        appt_dict['call_timestamp'] = datetime.fromisoformat(
-                            appt_dict['call_timestamp'])
-
-                    self.appointments[appt_id] = Appointment(**appt_dict)
-        except Exception as e:
-            print(f"Error loading appointments: {e}")
-            self.appointments = {}
-
-    def save_appointments(self) -> None:
-        """Save appointments to data file"""
+    def migrate_legacy_file(self) -> None:
+        """Split the single appointments file used by older versions into per-user shards (once)"""
+        if os.path.isdir(self.store.root) or not os.path.exists(self.data_file):
+            return
         try:
-            # Ensure data directory exists
-            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-
-            appointment_data = {}
-            for appt_id, appointment in self.appointments.items():
-                # Convert model to dict for serialization
-                appt_dict = appointment.to_dict()
-                appointment_data[appt_id] = appt_dict
-
-            with open(self.data_file, 'w') as f:
-                json.dump(appointment_data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving appointments: {e}")
-
+            with file_lock(self.data_file):
+                if os.path.isdir(self.store.root):
+                    return
+                appointments = open_snapshot(self.data_file, Appointment)
+                if appointments is None:
+                    appointment_data, trusted = load_records(self.data_file)
+                    for appt_dict in appointment_data.values():
+                        # Move transcripts stored inline by older versions into the blob store
+                        if 'call_transcript' in appt_dict:
+                            appt_dict['call_transcript_ref'] = self.transcript_store.put(
+                                appt_dict.pop('call_transcript'))
+                    appointments = build_models(Appointment, appointment_data, trusted)
+
+                by_user = {}
+                for appt_id, appointment in appointments.items():
+                    by_user.setdefault(appointment.user_id, {})[appt_id] = appointment
+                # Writing the first shard creates the shard directory, which marks the
+                # migration done; the old file is left in place as a backup
+                for user_id, shard in by_user.items():
+                    self.store.replace(user_id, shard)
+        except Exception:
+            logger.exception("Error migrating appointments")
+
+    def _owner(self, appointment_id: str, user_id: Optional[str] = None) -> Optional[str]:
+        """Shard holding an appointment: the given user's, or found by searching the shards"""
+        if user_id is not None:
+            return user_id if appointment_id in self.store.models(user_id) else None
+        return self.store.find(appointment_id)
+
+    def _publish(self, appointment: Appointment) -> None:
+        """Tell the user's open pages that an appointment changed"""
+        self.event_bus.publish(appointment.user_id, "appointment", {
+            "id": appointment.id,
+            "doctor_id": appointment.doctor_id,
+            "status": appointment.status,
+            "start_time": appointment.start_time,
+            "version": appointment.version,
+        })
+
+    @traced("appointment.create_appointment")
     def create_appointment(self, appointment: Appointment) -> Optional[Appointment]:
         """Create a new appointment"""
         # Check if doctor exists
         doctor = self.doctor_service.get_doctor(appointment.doctor_id)
         if not doctor:
-            print(f"Doctor not found: {appointment.doctor_id}")
+            logger.warning("Doctor not found: %s", appointment.doctor_id)
             return None
 
         # Create the appointment
@@ -84,56 +115,146 @@ class AppointmentService:
             appointment.user_id = self.user_id
 
         # Save the appointment
-        self.appointments[appointment.id] = appointment
-        self.save_appointments()
+        try:
+            self.store.put(appointment.user_id, appointment.id, appointment)
+            self._publish(appointment)
+        except Exception:
+            logger.exception("Error saving appointments")
 
         return appointment
 
-    def get_appointment(self, appointment_id: str) -> Optional[Appointment]:
-        """Get an appointment by ID"""
-        return self.appointments.get(appointment_id)
+    def create_appointments(self, appointments: List[Appointment]) -> List[Optional[Appointment]]:
+        """
+        Create several appointments, writing each user's shard once
+
+        Returns:
+            One entry per appointment, in order: the created appointment, or
+            None when its doctor doesn't exist
+        """
+        results: List[Optional[Appointment]] = []
+        by_user: Dict[Optional[str], Dict[str, Appointment]] = {}
+        for appointment in appointments:
+            if not self.doctor_service.get_doctor(appointment.doctor_id):
+                results.append(None)
+                continue
+            if not appointment.id:
+                appointment.id = str(uuid.uuid4())
+            if not appointment.user_id and self.user_id:
+                appointment.user_id = self.user_id
+            by_user.setdefault(appointment.user_id, {})[appointment.id] = appointment
+            results.append(appointment)
+
+        for user_id, shard in by_user.items():
+            for appointment in self.store.put_many(user_id, shard):
+                self._publish(appointment)
+        return results
+
+    def get_appointment(self, appointment_id: str, user_id: Optional[str] = None) -> Optional[Appointment]:
+        """
+        Get an appointment by ID
+
+        Args:
+            appointment_id: The appointment
+            user_id: Its user, if known; otherwise every user's shard may be searched
+        """
+        owner = self._owner(appointment_id, user_id)
+        return self.store.models(owner).get(appointment_id) if owner is not None else None
 
     def update_appointment(self, appointment_id: str, appointment: Appointment) -> Optional[Appointment]:
-        """Update an appointment"""
-        if appointment_id in self.appointments:
-            appointment.id = appointment_id
-            self.appointments[appointment_id] = appointment
-            self.save_appointments()
-            return appointment
-        return None
-
-    def cancel_appointment(self, appointment_id: str) -> bool:
+        """
+        Update an appointment
+
+        Raises:
+            ConflictError: The appointment was saved by someone else after this copy was read
+            ValueError: The appointment's user_id names someone other than the user it belongs to
+        """
+        owner = self._owner(appointment_id, appointment.user_id)
+        if owner is None:
+            if appointment.user_id is not None and self.store.find(appointment_id) is not None:
+                raise ValueError("Appointment belongs to another user")
+            return None
+        appointment.id = appointment_id
+        # A body without user_id still belongs to (and notifies) the shard's user
+        appointment.user_id = owner
+        updated = self.store.update(owner, appointment_id, appointment)
+        if updated:
+            self._publish(updated)
+        return updated
+
+    def cancel_appointment(self, appointment_id: str, user_id: Optional[str] = None) -> bool:
         """Cancel an appointment"""
-        appointment = self.get_appointment(appointment_id)
-        if appointment:
-            appointment.status = AppointmentStatus.CANCELLED
-            self.update_appointment(appointment_id, appointment)
-            return True
+        owner = self._owner(appointment_id, user_id)
+        if owner is None:
+            return False
+        with self.store.transaction(owner) as appointments:
+            appointment = appointments.get(appointment_id)
+            if appointment:
+                appointment.status = AppointmentStatus.CANCELLED
+                self.store.update(owner, appointment_id, appointment)
+                self._publish(appointment)
+                return True
         return False
 
-    def delete_appointment(self, appointment_id: str) -> bool:
+    def delete_appointment(self, appointment_id: str, user_id: Optional[str] = None) -> bool:
         """Delete an appointment"""
-        appointment = self.get_appointment(appointment_id)
-        if appointment:
-            del self.appointments[appointment_id]
-            self.save_appointments()
-            return True
-        return False
+        owner = self._owner(appointment_id, user_id)
+        if owner is None or not self.store.delete(owner, appointment_id):
+            return False
+        self.event_bus.publish(owner, "appointment_deleted", {"id": appointment_id})
+        return True
 
     def list_appointments(self) -> List[Appointment]:
-        """List all appointments"""
-        return list(self.appointments.values())
+        """List all appointments (reads every user's shard)"""
+        return list(self.store.all_models())
 
-    def get_upcoming_appointments(self) -> List[Appointment]:
-        """Get upcoming appointments"""
+    def get_upcoming_appointments(self, user_id: Optional[str] = None) -> List[Appointment]:
+        """Get upcoming appointments, for one user or everyone"""
         now = datetime.now()
-        return [a for a in self.appointments.values()
+        appointments = self.get_user_appointments(user_id) if user_id else self.list_appointments()
+        return [a for a in appointments
                 if a.start_time > now and a.status != AppointmentStatus.CANCELLED]
 
     def get_user_appointments(self, user_id: str) -> List[Appointment]:
-        """Get appointments for a specific user"""
-        return [a for a in self.appointments.values() if a.user_id == user_id]
+        """Get appointments for a specific user (reads only that user's shard)"""
+        return list(self.store.models(user_id).values())
+
+    def get_provider_appointments(self, provider_id: str) -> List[Appointment]:
+        """Get appointments with a specific doctor or provider (reads every user's shard)"""
+        return [a for a in self.store.all_models() if a.doctor_id == provider_id]
+
+    def get_appointments_by_provider(self) -> Dict[str, List[Appointment]]:
+        """Every appointment grouped by doctor or provider, in one pass over the shards"""
+        by_provider: Dict[str, List[Appointment]] = {}
+        for appointment in self.store.all_models():
+            by_provider.setdefault(appointment.doctor_id, []).append(appointment)
+        return by_provider
+
+    def data_version(self, user_id: Optional[str] = None) -> tuple:
+        """Changes whenever the appointments (of one user, or anyone's) are written"""
+        if user_id is not None:
+            return store_stamp(self.store.shard_path(user_id))
+        return self.store.stamp()
+
+    def page_appointments(self, limit: Optional[int], cursor: Optional[str] = None,
+                          user_id: Optional[str] = None, provider_id: Optional[str] = None) -> Page:
+        """
+        Appointments ordered by start time, one page at a time
+
+        Args:
+            limit: Page size; None returns everything after the cursor
+            cursor: next_cursor of the previous page
+            user_id: Only this user's appointments (reads only their shard)
+            provider_id: Only appointments with this doctor or provider
+        """
+        if user_id:
+            appointments = self.get_user_appointments(user_id)
+        elif provider_id:
+            appointments = self.get_provider_appointments(provider_id)
+        else:
+            appointments = self.store.all_models()
+        return page_by(appointments, lambda a: (a.start_time.timestamp(), a.id), limit, cursor)
 
+    @traced("appointment.schedule_with_doctor")
     def schedule_with_doctor(self,
                              doctor: Doctor,
                              user: User,
@@ -151,6 +272,16 @@ class AppointmentService:
         Returns:
             Tuple of (appointment, call_details)
         """
+        # Don't pay for a call whose outcome we already know
+        skip_reason = self.office_knowledge.rejection_reason(doctor.id, user.insurance_provider)
+        if skip_reason:
+            self.office_knowledge.record_avoided_call(doctor.id, skip_reason)
+            OUTBOUND_CALLS.inc(channel="retell", outcome="skipped")
+            return None, {
+                'skipped': True,
+                'error': f"Skipped calling {doctor.name}: office {skip_reason} (learned from an earlier call)"
+            }
+
         # Use Retell to make the phone call
         from schedulur.integrations.retell import call_doctor as retell_call_doctor
 
@@ -163,11 +294,18 @@ class AppointmentService:
                 to_number=doctor_phone,
                 user_name=user.name,
                 doctor_name=doctor.name,
-                insurance_type=user.insurance_provider or "private insurance"
+                insurance_type=user.insurance_provider or "private insurance",
+                metadata={
+                    "doctor_id": doctor.id,
+                    "user_id": user.id or self.user_id,
+                    "insurance": user.insurance_provider,
+                    # The call's webhook continues this trace
+                    **trace_context()
+                }
             )
-            print(f"Initiated Retell call to {doctor_phone} for {doctor.name}")
-        except Exception as e:
-            print(f"Error using Retell to call doctor: {e}")
+            logger.info("Initiated Retell call", extra={"doctor_id": doctor.id, "user_id": user.id or self.user_id})
+        except Exception:
+            logger.exception("Error using Retell to call doctor")
 
         # Get scheduling preferences
         timeframe = scheduling_preferences.get(
@@ -266,7 +404,7 @@ class AppointmentService:
             timedelta(minutes=doctor.appointment_duration),
             status=AppointmentStatus.SCHEDULED,
             reason=reason,
-            call_transcript=call_result.get('transcript'),
+            call_transcript_ref=self.transcript_store.put(call_result.get('transcript')),
             call_timestamp=datetime.now(),
             call_duration_seconds=call_result.get('duration')
         )
@@ -274,13 +412,37 @@ class AppointmentService:
         # Save the appointment
         created_appointment = self.create_appointment(new_appointment)
 
+        # Make the transcript searchable as soon as the call completes
+        if created_appointment:
+            try:
+                self.transcript_index.index_appointment(created_appointment)
+            except Exception:
+                logger.exception("Error indexing call transcript")
+
         return created_appointment, call_result
 
-    def approve_doctor_for_scheduling(self, doctor_id: str, approved: bool = True) -> bool:
-        """Approve or reject a doctor for scheduling"""
-        doctor = self.doctor_service.get_doctor(doctor_id)
-        if doctor:
-            doctor.user_approval = approved
-            self.doctor_service.update_doctor(doctor_id, doctor)
-            return True
-        return False
+    def publish_call_result(self, call: Dict, outcome: Optional[Dict] = None) -> None:
+        """
+        Tell the user's open pages that a call to an office has finished
+
+        Args:
+            call: The call object from Retell's webhook; its metadata names
+                the user and doctor
+            outcome: The call's custom analysis data, if any
+        """
+        metadata = call.get('metadata') or {}
+        self.event_bus.publish(metadata.get('user_id'), "call", {
+            "call_id": call.get('call_id'),
+            "doctor_id": metadata.get('doctor_id'),
+            "appointment_id": metadata.get('appointment_id'),
+            "status": call.get('call_status'),
+            "outcome": outcome,
+        })
+
+    def approve_doctor_for_scheduling(self, doctor_id: str, approved: bool = True, user_id: str = None) -> bool:
+        """Approve or reject a doctor for scheduling on behalf of a user (default: this service's user)"""
+        user_id = user_id or self.user_id
+        if not user_id or not self.doctor_service.get_doctor(doctor_id):
+            return False
+        self.approval_service.set_approval(user_id, doctor_id, approved)
+        return True
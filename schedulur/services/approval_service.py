@@ -0,0 +1,88 @@
+import logging
+import os
+from typing import Dict, List, Optional
+
+from schedulur.models.approval import Approval
+from schedulur.models.doctor import Doctor
+from schedulur.services.doctor_service import DoctorService
+from schedulur.storage.locking import file_lock
+from schedulur.storage.shards import ShardedStore
+
+logger = logging.getLogger(__name__)
+
+class ApprovalService:
+    """
+    Service for each user's approve/reject decisions on doctors
+
+    Decisions are stored per user (one shard file per user), so users no
+    longer share a single approval flag on the doctor record.
+    """
+    
+    def __init__(self, data_dir: str = None, doctor_service: DoctorService = None, user_service=None):
+        self.data_dir = data_dir or os.path.join(os.path.dirname(__file__), "../data/approvals")
+        self.doctor_service = doctor_service or DoctorService()
+        self.store = ShardedStore(self.data_dir, Approval, Approval.model_dump)
+        if user_service is not None:
+            self.migrate_global_approvals(user_service)
+    
+    def migrate_global_approvals(self, user_service) -> None:
+        """Copy approvals stored on doctor records by older versions to every existing user (once)"""
+        if os.path.isdir(self.data_dir):
+            return
+        try:
+            with file_lock(self.data_dir):
+                if os.path.isdir(self.data_dir):
+                    return
+                legacy = {d.id: d.user_approval for d in self.doctor_service.list_doctors()
+                          if d.user_approval is not None}
+                if legacy:
+                    for user in user_service.list_users():
+                        self.store.replace(user.id, {
+                            doctor_id: Approval(user_id=user.id, doctor_id=doctor_id, approved=approved, version=1)
+                            for doctor_id, approved in legacy.items()
+                        })
+                os.makedirs(self.data_dir, exist_ok=True)
+        except Exception:
+            logger.exception("Error migrating doctor approvals")
+    
+    def set_approval(self, user_id: str, doctor_id: str, approved: bool) -> Approval:
+        """Record a user's decision on a doctor (the latest decision wins)"""
+        return self.store.put(user_id, doctor_id, Approval(user_id=user_id, doctor_id=doctor_id, approved=approved))
+    
+    def get_approval(self, user_id: str, doctor_id: str) -> Optional[bool]:
+        """True/False once the user has decided on the doctor, otherwise None"""
+        approval = self.store.models(user_id).get(doctor_id)
+        return approval.approved if approval else None
+    
+    def get_approvals(self, user_id: str) -> Dict[str, bool]:
+        """All of a user's decisions, by doctor ID"""
+        return {doctor_id: approval.approved for doctor_id, approval in self.store.models(user_id).items()}
+    
+    def annotate(self, user_id: str, doctors: List) -> List:
+        """Set user_approval on doctors (or search results) to this user's decisions"""
+        approvals = self.get_approvals(user_id)
+        for doctor in doctors:
+            doctor.user_approval = approvals.get(doctor.id)
+        return doctors
+    
+    def _decided_doctors(self, user_id: str, approved: bool) -> List[Doctor]:
+        doctors = []
+        for doctor_id, decision in self.get_approvals(user_id).items():
+            doctor = self.doctor_service.get_doctor(doctor_id) if decision is approved else None
+            if doctor:
+                doctors.append(doctor.model_copy(update={'user_approval': decision}))
+        return doctors
+    
+    def get_approved_doctors(self, user_id: str) -> List[Doctor]:
+        """Get doctors the user has approved"""
+        return self._decided_doctors(user_id, True)
+    
+    def get_rejected_doctors(self, user_id: str) -> List[Doctor]:
+        """Get doctors the user has rejected"""
+        return self._decided_doctors(user_id, False)
+    
+    def get_pending_doctors(self, user_id: str) -> List[Doctor]:
+        """Get doctors the user hasn't approved or rejected yet"""
+        decided = self.get_approvals(user_id)
+        return [d.model_copy(update={'user_approval': None}) for d in self.doctor_service.list_doctors()
+                if d.id not in decided]
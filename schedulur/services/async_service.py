@@ -0,0 +1,82 @@
+import asyncio
+import contextvars
+import functools
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+IO_THREADS_ENV = "SCHEDULUR_IO_THREADS"
+DEFAULT_IO_THREADS = 16
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    The bounded pool that blocking store and integration calls run on
+
+    Its size caps how many requests can be inside file I/O (or waiting on a
+    store lock) at once; further calls queue instead of piling up threads.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=int(os.environ.get(IO_THREADS_ENV, DEFAULT_IO_THREADS)),
+                                       thread_name_prefix="schedulur-io")
+    return _executor
+
+async def run_blocking(fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking call on the I/O pool without stalling the event loop"""
+    # Copy the caller's context so request-scoped context variables follow the call
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), call)
+
+
+class AsyncService:
+    """
+    Awaitable view of a synchronous service instance
+
+    Every method of the wrapped service becomes a coroutine that runs the
+    original on the I/O pool, so the stores keep one implementation (with
+    their file locks and version checks) for the CLI, the Flask app and
+    the async API:
+
+        users = AsyncService(container.user_service)
+        user = await users.get_user(user_id)
+    """
+
+    def __init__(self, service: Any):
+        self.service = service
+        self._methods: Dict[str, Callable] = {}
+
+    def __getattr__(self, name: str) -> Callable:
+        method = self._methods.get(name)
+        if method is None:
+            target = getattr(self.service, name)
+            if not callable(target):
+                raise AttributeError(f"{type(self.service).__name__}.{name} is not a method")
+
+            @functools.wraps(target)
+            async def method(*args, **kwargs):
+                return await run_blocking(target, *args, **kwargs)
+
+            self._methods[name] = method
+        return method
+
+
+_wrappers: "weakref.WeakKeyDictionary[Any, AsyncService]" = weakref.WeakKeyDictionary()
+
+async def async_service(container, name: str) -> AsyncService:
+    """
+    A container service wrapped for async callers
+
+    A service that hasn't been built yet is built (loading its store from
+    disk) on the I/O pool as well.
+    """
+    if container.built(name):
+        service = getattr(container, name)
+    else:
+        service = await run_blocking(getattr, container, name)
+    wrapper = _wrappers.get(service)
+    if wrapper is None:
+        wrapper = _wrappers.setdefault(service, AsyncService(service))
+    return wrapper
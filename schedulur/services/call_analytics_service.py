@@ -0,0 +1,191 @@
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+
+from schedulur.storage.serialization import read_file, write_file
+from schedulur.tracing import traced
+from schedulur.utils.histogram import LogHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class CallAnalyticsService:
+    """
+    Rolling latency and cost analytics for outbound calls.
+
+    Each Retell ``call_analyzed`` webhook is folded into one aggregate per
+    (day, agent): counters for calls, outcomes and disconnection reasons,
+    plus streaming histograms for duration, cost and LLM/end-to-end/TTS
+    latency. Raw payloads are never kept, so storage stays bounded by the
+    number of days retained times the number of agents.
+    """
+
+    DEFAULT_RETENTION_DAYS = 90
+
+    HISTOGRAMS = ("duration_ms", "cost", "latency_e2e_ms", "latency_llm_ms", "latency_tts_ms")
+
+    def __init__(self, data_file: str = None, retention_days: int = None):
+        self.data_file = data_file or os.path.join(os.path.dirname(__file__), "../data/call_analytics.json")
+        self.retention_days = retention_days or self.DEFAULT_RETENTION_DAYS
+        self.buckets = {}  # {day: {agent_id: aggregate}}
+        self._lock = threading.Lock()
+        self.load_analytics()
+
+    def load_analytics(self) -> None:
+        """Load aggregates from data file"""
+        try:
+            if os.path.exists(self.data_file):
+                data = read_file(self.data_file)
+
+                self.buckets = {}
+                for day, agents in data.get('buckets', {}).items():
+                    self.buckets[day] = {}
+                    for agent_id, aggregate in agents.items():
+                        aggregate['histograms'] = {
+                            name: LogHistogram.from_dict(h) for name, h in aggregate.get('histograms', {}).items()
+                        }
+                        self.buckets[day][agent_id] = aggregate
+        except Exception:
+            logger.exception("Error loading call analytics")
+            self.buckets = {}
+
+    def save_analytics(self) -> None:
+        """Save aggregates to data file"""
+        try:
+            buckets = {}
+            for day, agents in self.buckets.items():
+                buckets[day] = {}
+                for agent_id, aggregate in agents.items():
+                    buckets[day][agent_id] = dict(aggregate, histograms={
+                        name: h.to_dict() for name, h in aggregate['histograms'].items()
+                    })
+
+            write_file(self.data_file, {'buckets': buckets})
+        except Exception:
+            logger.exception("Error saving call analytics")
+
+    @classmethod
+    def _new_aggregate(cls) -> Dict:
+        return {
+            'calls': 0,
+            'successful': 0,
+            'voicemail': 0,
+            'disconnection_reasons': {},
+            'histograms': {name: LogHistogram() for name in cls.HISTOGRAMS}
+        }
+
+    @staticmethod
+    def _latency_values(latency: Dict, name: str) -> List[float]:
+        """Per-turn latencies if the payload has them, otherwise its median"""
+        stats = latency.get(name) or {}
+        if stats.get('values'):
+            return stats['values']
+        if stats.get('p50') is not None:
+            return [stats['p50']]
+        return []
+
+    @traced("call_analytics.record_webhook_call")
+    def record_webhook_call(self, call: Dict) -> None:
+        """
+        Fold one analyzed call into the aggregates
+
+        Args:
+            call: The 'call' object from a Retell call_analyzed webhook
+        """
+        start_timestamp = call.get('start_timestamp')
+        started = datetime.fromtimestamp(start_timestamp / 1000) if start_timestamp else datetime.now()
+        day = started.strftime('%Y-%m-%d')
+        agent_id = call.get('agent_id') or 'unknown'
+
+        latency = call.get('latency') or {}
+        call_cost = call.get('call_cost') or {}
+        call_analysis = call.get('call_analysis') or {}
+        reason = call.get('disconnection_reason') or 'unknown'
+
+        with self._lock:
+            aggregate = self.buckets.setdefault(day, {}).setdefault(agent_id, self._new_aggregate())
+            histograms = aggregate['histograms']
+
+            aggregate['calls'] += 1
+            if call_analysis.get('call_successful'):
+                aggregate['successful'] += 1
+            if call_analysis.get('in_voicemail'):
+                aggregate['voicemail'] += 1
+            reasons = aggregate['disconnection_reasons']
+            reasons[reason] = reasons.get(reason, 0) + 1
+
+            histograms['duration_ms'].add(call.get('duration_ms'))
+            histograms['cost'].add(call_cost.get('combined_cost'))
+            for value in self._latency_values(latency, 'e2e'):
+                histograms['latency_e2e_ms'].add(value)
+            for value in self._latency_values(latency, 'llm'):
+                histograms['latency_llm_ms'].add(value)
+            for value in self._latency_values(latency, 'tts'):
+                histograms['latency_tts_ms'].add(value)
+
+            self._expire_old_days()
+            self.save_analytics()
+
+    def _expire_old_days(self) -> None:
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).strftime('%Y-%m-%d')
+        for day in [d for d in self.buckets if d < cutoff]:
+            del self.buckets[day]
+
+    def _fold(self, aggregates: List[Dict]) -> Dict:
+        total = self._new_aggregate()
+        for aggregate in aggregates:
+            total['calls'] += aggregate['calls']
+            total['successful'] += aggregate['successful']
+            total['voicemail'] += aggregate['voicemail']
+            for reason, count in aggregate['disconnection_reasons'].items():
+                total['disconnection_reasons'][reason] = total['disconnection_reasons'].get(reason, 0) + count
+            for name, histogram in aggregate['histograms'].items():
+                total['histograms'][name].merge(histogram)
+        return total
+
+    @staticmethod
+    def _summarize(aggregate: Dict) -> Dict:
+        return {
+            'calls': aggregate['calls'],
+            'successful': aggregate['successful'],
+            'voicemail': aggregate['voicemail'],
+            'disconnection_reasons': dict(aggregate['disconnection_reasons']),
+            **{name: h.summary() for name, h in aggregate['histograms'].items()}
+        }
+
+    def report(self, days: int = 7, agent_id: Optional[str] = None) -> Dict:
+        """
+        Summarize the most recent days
+
+        Args:
+            days: Number of days to include, counting today
+            agent_id: Only include this agent
+
+        Returns:
+            Totals for the period, plus per-day and per-agent breakdowns
+
+        Raises:
+            ValueError: days is less than 1
+        """
+        if days < 1:
+            raise ValueError(f"days must be at least 1, got {days}")
+        since = (datetime.now() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+
+        with self._lock:
+            per_day, per_agent = {}, {}
+            for day in sorted(d for d in self.buckets if d >= since):
+                for agent, aggregate in self.buckets[day].items():
+                    if agent_id and agent != agent_id:
+                        continue
+                    per_day.setdefault(day, []).append(aggregate)
+                    per_agent.setdefault(agent, []).append(aggregate)
+
+            return {
+                'since': since,
+                'days': days,
+                'total': self._summarize(self._fold([a for aggs in per_day.values() for a in aggs])),
+                'by_day': {day: self._summarize(self._fold(aggs)) for day, aggs in per_day.items()},
+                'by_agent': {agent: self._summarize(self._fold(aggs)) for agent, aggs in per_agent.items()}
+            }
@@ -1,37 +1,46 @@
-import requests
+import logging
 import os
-import json
 from typing import List, Dict, Optional
 import uuid
 from datetime import datetime
 
-from schedulur.models.doctor import Doctor
+from schedulur.models.doctor import Doctor, DoctorSummary
 from schedulur.models.user import User
-from schedulur.services.api_integration import ProviderDirectoryAPI
+from schedulur.metrics import SEARCH_SECONDS
+from schedulur.services.office_knowledge_service import OfficeKnowledgeService
+from schedulur.storage.serialization import read_file, write_file
+from schedulur.tracing import span
+
+logger = logging.getLogger(__name__)
 
 class DoctorSearchService:
     """Service for searching for doctors"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, office_knowledge: OfficeKnowledgeService = None):
         # In future, use a real healthcare provider API
         self.api_key = api_key or os.environ.get('HEALTHCARE_API_KEY')
+        self.office_knowledge = office_knowledge or OfficeKnowledgeService()
         self.mock_data_file = os.path.join(os.path.dirname(__file__), "../data/mock_doctors.json")
         self._ensure_mock_data()
         
-        # Initialize the API integration
-        self.api = ProviderDirectoryAPI()
-        
         # Flag to use real API or mock data
         self.use_real_api = os.environ.get('USE_REAL_API', 'false').lower() == 'true'
-        print(f"API Integration enabled: {self.use_real_api} (set USE_REAL_API=true to enable)")
+        self._api = None
+    
+    @property
+    def api(self):
+        """Provider directory API client, created the first time it's needed"""
+        if self._api is None:
+            # Imported here so mock-only runs never load requests/geopy
+            from schedulur.services.api_integration import ProviderDirectoryAPI
+            self._api = ProviderDirectoryAPI()
+        return self._api
         
     def _ensure_mock_data(self):
         """Create mock doctor data if it doesn't exist"""
         if not os.path.exists(self.mock_data_file):
             doctors = self._generate_mock_doctors()
-            os.makedirs(os.path.dirname(self.mock_data_file), exist_ok=True)
-            with open(self.mock_data_file, 'w') as f:
-                json.dump([doc.dict() for doc in doctors], f, indent=2)
+            write_file(self.mock_data_file, doctors)
     
     def _generate_mock_doctors(self, count: int = 20) -> List[Doctor]:
         """Generate mock doctor data for testing"""
@@ -95,7 +104,7 @@ class DoctorSearchService:
                        specialization: str, 
                        insurance: Optional[str] = None,
                        zip_code: Optional[str] = None,
-                       max_distance: Optional[int] = 25) -> List[Doctor]:
+                       max_distance: Optional[int] = 25) -> List[DoctorSummary]:
         """
         Search for doctors based on criteria
         
@@ -106,26 +115,36 @@ class DoctorSearchService:
             max_distance: Maximum distance in miles
             
         Returns:
-            List of matching doctors
+            Summaries of matching doctors (to_doctor() gives the full model)
         """
         try:
-            # Check if we should use the real API
-            if self.use_real_api:
-                return self._search_doctors_api(specialization, insurance, zip_code, max_distance)
-            else:
-                return self._search_doctors_mock(specialization, insurance, zip_code, max_distance)
-        except Exception as e:
-            print(f"Error searching for doctors: {e}")
+            with span("doctor_search.search_doctors", specialization=specialization,
+                      source="api" if self.use_real_api else "local") as search, SEARCH_SECONDS.time(stage="total"):
+                # Check if we should use the real API
+                if self.use_real_api:
+                    doctors = self._search_doctors_api(specialization, insurance, zip_code, max_distance)
+                else:
+                    with span("doctor_search.local"), SEARCH_SECONDS.time(stage="local"):
+                        doctors = self._search_doctors_mock(specialization, insurance, zip_code, max_distance)
+                
+                # Leave out offices known to turn this patient away; known-good offices go first
+                with span("office_knowledge.rank_doctors"):
+                    doctors, _ = self.office_knowledge.rank_doctors(doctors, insurance)
+                search.set_attribute("results", len(doctors))
+            return doctors
+        except Exception:
+            logger.exception("Error searching for doctors")
             return []
             
     def _search_doctors_api(self, 
                            specialization: str, 
                            insurance: Optional[str] = None,
                            zip_code: Optional[str] = None,
-                           max_distance: Optional[int] = 25) -> List[Doctor]:
+                           max_distance: Optional[int] = 25) -> List[DoctorSummary]:
         """Search for doctors using the real API"""
         try:
-            print(f"Using real API to search for {specialization} doctors near {zip_code} within {max_distance} miles")
+            logger.debug("Searching the provider directory", extra={
+                "specialization": specialization, "zip_code": zip_code, "max_distance": max_distance})
             
             # Search doctors via API
             results = self.api.search_doctors(
@@ -134,10 +153,9 @@ class DoctorSearchService:
                 radius_miles=max_distance
             )
             
-            print(f"API search results: {len(results) if results else 0} doctors found")
+            logger.debug("Provider directory returned %d doctors", len(results) if results else 0)
             
             if not results:
-                print("No results from API search")
                 return []
                 
             # Convert API results to Doctor objects
@@ -165,37 +183,38 @@ class DoctorSearchService:
                     # In a real implementation, we would use a proper distance calculation
                     formatted_data["distance_miles"] = (i * 2) % max_distance
                 
-                # Create a Doctor object
+                # API data is validated before it is summarized
                 doctor = Doctor(**formatted_data)
-                doctors.append(doctor)
+                doctors.append(DoctorSummary.from_doctor(doctor))
             
             # Sort by earliest available slot (most favorable) and distance (closest)
             doctors.sort(key=lambda d: (d.earliest_available_slot or "", d.distance_miles or float('inf')))
             
             return doctors
-        except Exception as e:
-            print(f"Error in API doctor search: {e}")
+        except Exception:
+            logger.exception("Error in API doctor search")
             return []
             
     def _search_doctors_mock(self, 
                             specialization: str, 
                             insurance: Optional[str] = None,
                             zip_code: Optional[str] = None,
-                            max_distance: Optional[int] = 25) -> List[Doctor]:
+                            max_distance: Optional[int] = 25) -> List[DoctorSummary]:
         """Search for doctors using mock data"""
         try:
-            with open(self.mock_data_file, 'r') as f:
-                doctor_data = json.load(f)
+            doctor_data = read_file(self.mock_data_file)
             
-            doctors = [Doctor(**doc) for doc in doctor_data]
-            
-            # Filter by specialization
+            # Filter the raw records first so only matches get summarized
             if specialization:
-                doctors = [d for d in doctors if d.specialization.lower() == specialization.lower()]
+                specialization = specialization.lower()
+                doctor_data = [d for d in doctor_data if d['specialization'].lower() == specialization]
             
-            # Filter by insurance
             if insurance:
-                doctors = [d for d in doctors if any(ins.lower() == insurance.lower() for ins in d.accepted_insurance)]
+                insurance = insurance.lower()
+                doctor_data = [d for d in doctor_data
+                               if any(ins.lower() == insurance for ins in d.get('accepted_insurance', []))]
+            
+            doctors = [DoctorSummary.from_dict(doc) for doc in doctor_data]
             
             # Add mock distance and sort by "distance"
             # In a real implementation, we would use geolocation APIs
@@ -219,11 +238,11 @@ class DoctorSearchService:
             
             return doctors
         
-        except Exception as e:
-            print(f"Error in mock doctor search: {e}")
+        except Exception:
+            logger.exception("Error in mock doctor search")
             return []
     
-    def search_with_claude(self, query: str) -> List[Doctor]:
+    def search_with_claude(self, query: str) -> List[DoctorSummary]:
         """
         Use Claude to search for doctors based on unstructured query
         
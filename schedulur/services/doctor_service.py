@@ -1,97 +1,165 @@
-import json
+import logging
 import os
 import uuid
-from typing import List, Optional, Dict
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Dict
 from datetime import datetime, time
 
 from schedulur.models.doctor import Doctor
+from schedulur.storage.blob_store import get_transcript_store
+from schedulur.storage.locking import file_lock
+from schedulur.metrics import record_cache_lookup
+from schedulur.tracing import traced
+from schedulur.storage.records import (load_records, build_models, open_snapshot, save_models, snapshots_enabled,
+                                       check_version, store_stamp)
+
+logger = logging.getLogger(__name__)
 
 class DoctorService:
     """Service for managing doctor information"""
     
-    def __init__(self, data_file: str = None):
+    def __init__(self, data_file: str = None, transcript_store=None):
         self.data_file = data_file or os.path.join(os.path.dirname(__file__), "../data/doctors.json")
         self.doctors = {}
+        self.transcript_store = transcript_store or get_transcript_store()
         self.load_doctors()
     
+    @traced("doctor_service.load_doctors")
     def load_doctors(self) -> None:
         """Load doctors from data file"""
+        self._stamp = store_stamp(self.data_file)
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    doctor_data = json.load(f)
-                    
-                for doctor_id, doctor_dict in doctor_data.items():
-                    # Convert time strings to time objects
-                    if 'available_times' in doctor_dict:
-                        for time_slot in doctor_dict['available_times']:
-                            if 'start_time' in time_slot and isinstance(time_slot['start_time'], str):
-                                time_parts = time_slot['start_time'].split(':')
-                                time_slot['start_time'] = time(int(time_parts[0]), int(time_parts[1]))
-                            
-                            if 'end_time' in time_slot and isinstance(time_slot['end_time'], str):
-                                time_parts = time_slot['end_time'].split(':')
-                                time_slot['end_time'] = time(int(time_parts[0]), int(time_parts[1]))
-                    
-                    self.doctors[doctor_id] = Doctor(**doctor_dict)
-        except Exception as e:
-            print(f"Error loading doctors: {e}")
-            self.doctors = {}
-    
-    def save_doctors(self) -> None:
-        """Save doctors to data file"""
-        try:
-            # Ensure data directory exists
-            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+            snapshot = open_snapshot(self.data_file, Doctor)
+            if snapshot is not None:
+                # Records are read from the snapshot as they are asked for
+                self.doctors = snapshot
+                return
             
-            doctor_data = {}
-            for doctor_id, doctor in self.doctors.items():
-                doctor_dict = doctor.dict()
+            doctor_data, trusted = load_records(self.data_file)
+            if trusted:
+                # Our own current-schema file: skip validation
+                self.doctors = build_models(Doctor, doctor_data, trusted=True)
+                if doctor_data and snapshots_enabled():
+                    self.save_doctors()
+                return
+            
+            for doctor_id, doctor_dict in doctor_data.items():
+                # Move transcripts stored inline by older versions into the blob store
+                if 'call_transcript' in doctor_dict:
+                    doctor_dict['call_transcript_ref'] = self.transcript_store.put(
+                        doctor_dict.pop('call_transcript'))
                 
-                # Convert time objects to strings for JSON serialization
+                # Convert time strings to time objects
                 if 'available_times' in doctor_dict:
                     for time_slot in doctor_dict['available_times']:
-                        if 'start_time' in time_slot and hasattr(time_slot['start_time'], 'strftime'):
-                            time_slot['start_time'] = time_slot['start_time'].strftime('%H:%M')
+                        if 'start_time' in time_slot and isinstance(time_slot['start_time'], str):
+                            time_parts = time_slot['start_time'].split(':')
+                            time_slot['start_time'] = time(int(time_parts[0]), int(time_parts[1]))
                         
-                        if 'end_time' in time_slot and hasattr(time_slot['end_time'], 'strftime'):
-                            time_slot['end_time'] = time_slot['end_time'].strftime('%H:%M')
+                        if 'end_time' in time_slot and isinstance(time_slot['end_time'], str):
+                            time_parts = time_slot['end_time'].split(':')
+                            time_slot['end_time'] = time(int(time_parts[0]), int(time_parts[1]))
                 
-                doctor_data[doctor_id] = doctor_dict
+                self.doctors[doctor_id] = Doctor(**doctor_dict)
             
-            with open(self.data_file, 'w') as f:
-                json.dump(doctor_data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving doctors: {e}")
+            # Rewrite legacy files once so later loads take the trusted path
+            if doctor_data:
+                self.save_doctors()
+        except Exception:
+            logger.exception("Error loading doctors")
+            self.doctors = {}
+    
+    def save_doctors(self) -> None:
+        """Save doctors to data file"""
+        try:
+            with file_lock(self.data_file):
+                save_models(self.data_file, self.doctors, self.doctor_record)
+                self._stamp = store_stamp(self.data_file)
+        except Exception:
+            logger.exception("Error saving doctors")
+    
+    def refresh(self) -> None:
+        """Reload doctors if another process has saved them since we loaded"""
+        current = store_stamp(self.data_file) == self._stamp
+        record_cache_lookup("doctors", current)
+        if not current:
+            self.load_doctors()
+    
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Lock the doctor store across processes for a read-modify-write
+        
+        Changes saved by other workers are loaded first, so reads inside the
+        block see the current records and updates are checked against them.
+        """
+        with file_lock(self.data_file):
+            self.refresh()
+            yield
+    
+    @staticmethod
+    def doctor_record(doctor: Doctor) -> Dict:
+        """Stored form of a doctor"""
+        doctor_dict = doctor.model_dump()
+        
+        # Convert time objects to strings for JSON serialization
+        if 'available_times' in doctor_dict:
+            for time_slot in doctor_dict['available_times']:
+                if 'start_time' in time_slot and hasattr(time_slot['start_time'], 'strftime'):
+                    time_slot['start_time'] = time_slot['start_time'].strftime('%H:%M')
+                
+                if 'end_time' in time_slot and hasattr(time_slot['end_time'], 'strftime'):
+                    time_slot['end_time'] = time_slot['end_time'].strftime('%H:%M')
+        
+        return doctor_dict
     
     def create_doctor(self, doctor: Doctor) -> Doctor:
         """Create a new doctor"""
         if not doctor.id:
             doctor.id = str(uuid.uuid4())
         
-        self.doctors[doctor.id] = doctor
-        self.save_doctors()
+        with self.transaction():
+            doctor.version = (self.doctors[doctor.id].version or 0) + 1 if doctor.id in self.doctors else 1
+            self.doctors[doctor.id] = doctor
+            self.save_doctors()
         return doctor
     
     def get_doctor(self, doctor_id: str) -> Optional[Doctor]:
         """Get a doctor by ID"""
         return self.doctors.get(doctor_id)
     
+    def get_doctors(self, doctor_ids: List[str]) -> Dict[str, Doctor]:
+        """Get the doctors that exist among doctor_ids, keyed by ID"""
+        found = {}
+        for doctor_id in doctor_ids:
+            doctor = self.doctors.get(doctor_id)
+            if doctor is not None:
+                found[doctor_id] = doctor
+        return found
+    
     def update_doctor(self, doctor_id: str, doctor: Doctor) -> Optional[Doctor]:
-        """Update a doctor"""
-        if doctor_id in self.doctors:
+        """
+        Update a doctor
+        
+        Raises:
+            ConflictError: The doctor was saved by someone else after this copy was read
+        """
+        with self.transaction():
+            if doctor_id not in self.doctors:
+                return None
+            check_version(doctor_id, doctor, self.doctors[doctor_id])
             doctor.id = doctor_id
             self.doctors[doctor_id] = doctor
             self.save_doctors()
             return doctor
-        return None
     
     def delete_doctor(self, doctor_id: str) -> bool:
         """Delete a doctor"""
-        if doctor_id in self.doctors:
-            del self.doctors[doctor_id]
-            self.save_doctors()
-            return True
+        with self.transaction():
+            if doctor_id in self.doctors:
+                del self.doctors[doctor_id]
+                self.save_doctors()
+                return True
         return False
     
     def list_doctors(self) -> List[Doctor]:
@@ -105,21 +173,3 @@ class DoctorService:
     def filter_doctors_by_specialization(self, specialization: str) -> List[Doctor]:
         """Filter doctors by specialization"""
         return [d for d in self.doctors.values() if specialization.lower() in d.specialization.lower()]
-    
-    def get_approved_doctors(self) -> List[Doctor]:
-        """Get doctors that have been approved by the user"""
-        # Make sure we have the latest data
-        self.load_doctors()
-        return [d for d in self.doctors.values() if d.user_approval is True]
-    
-    def get_rejected_doctors(self) -> List[Doctor]:
-        """Get doctors that have been rejected by the user"""
-        # Make sure we have the latest data
-        self.load_doctors()
-        return [d for d in self.doctors.values() if d.user_approval is False]
-    
-    def get_pending_doctors(self) -> List[Doctor]:
-        """Get doctors that haven't been approved or rejected yet"""
-        # Make sure we have the latest data
-        self.load_doctors()
-        return [d for d in self.doctors.values() if d.user_approval is None]
\ No newline at end of file
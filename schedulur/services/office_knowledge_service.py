@@ -0,0 +1,249 @@
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from schedulur.metrics import get_registry
+from schedulur.storage.serialization import read_file, write_file
+from schedulur.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+CALL_OUTCOMES = get_registry().counter(
+    "schedulur_call_outcomes_total", "Analyzed calls, by whether an appointment was booked", ["outcome"])
+
+class OfficeKnowledgeService:
+    """
+    What we have learned from calling doctors' offices.
+
+    Retell's post-call analysis reports whether an office accepts the
+    patient's insurance and whether it is taking new patients. Those answers
+    are kept per doctor (new patients) and per doctor and insurance
+    (insurance), each with the time it was observed. Facts older than the
+    TTL are ignored so offices get re-checked eventually.
+
+    Search ranking and the call orchestrator consult this service so we don't
+    pay for calls whose outcome we already know. Counts kept for get_stats()
+    live in memory and are written out with the next recorded call.
+    """
+
+    DEFAULT_TTL_DAYS = 90
+
+    def __init__(self, data_file: str = None, ttl_days: int = None):
+        self.data_file = data_file or os.path.join(os.path.dirname(__file__), "../data/office_knowledge.json")
+        self.ttl = timedelta(days=ttl_days or self.DEFAULT_TTL_DAYS)
+        self.facts = {}
+        self.stats = {}
+        self._lock = threading.Lock()
+        self.load_knowledge()
+
+    def load_knowledge(self) -> None:
+        """Load knowledge from data file"""
+        try:
+            if os.path.exists(self.data_file):
+                data = read_file(self.data_file)
+                self.facts = data.get('facts', {})
+                self.stats = data.get('stats', {})
+        except Exception:
+            logger.exception("Error loading office knowledge")
+            self.facts = {}
+            self.stats = {}
+
+    def save_knowledge(self) -> None:
+        """Save knowledge to data file"""
+        try:
+            write_file(self.data_file, {'facts': self.facts, 'stats': self.stats})
+        except Exception:
+            logger.exception("Error saving office knowledge")
+
+    @staticmethod
+    def _normalize_insurance(insurance: Optional[str]) -> str:
+        return (insurance or "").strip().lower()
+
+    @staticmethod
+    def _parse_flag(value) -> Optional[bool]:
+        """Retell reports booleans, but custom analysis fields can come back as strings"""
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str):
+            if value.strip().lower() in ("true", "yes"):
+                return True
+            if value.strip().lower() in ("false", "no"):
+                return False
+        return None
+
+    def _is_fresh(self, fact: Optional[Dict], now: Optional[datetime] = None) -> bool:
+        if not fact or not fact.get('observed_at'):
+            return False
+        observed_at = datetime.fromisoformat(fact['observed_at'])
+        return (now or datetime.now()) - observed_at <= self.ttl
+
+    def record_call_result(self,
+                           doctor_id: str,
+                           insurance: Optional[str] = None,
+                           accepts_insurance: Optional[bool] = None,
+                           accepting_new_patients: Optional[bool] = None,
+                           appointment_booked: Optional[bool] = None,
+                           call_id: Optional[str] = None,
+                           observed_at: Optional[datetime] = None) -> None:
+        """
+        Record what an office told us on a call
+
+        Args:
+            doctor_id: Doctor whose office was called
+            insurance: Insurance the call asked about
+            accepts_insurance: Whether the office accepts that insurance
+            accepting_new_patients: Whether the office takes new patients
+            appointment_booked: Whether an appointment was booked
+            call_id: Call the answers came from
+            observed_at: When the call took place
+        """
+        observed = (observed_at or datetime.now()).isoformat()
+
+        with self._lock:
+            doctor_facts = self.facts.setdefault(doctor_id, {})
+
+            if accepting_new_patients is not None:
+                doctor_facts['new_patients'] = {
+                    'accepting': accepting_new_patients,
+                    'observed_at': observed,
+                    'call_id': call_id
+                }
+
+            insurance_key = self._normalize_insurance(insurance)
+            if insurance_key and accepts_insurance is not None:
+                doctor_facts.setdefault('insurance', {})[insurance_key] = {
+                    'accepts': accepts_insurance,
+                    'observed_at': observed,
+                    'call_id': call_id
+                }
+
+            if appointment_booked is not None:
+                doctor_facts['last_booking'] = {
+                    'booked': appointment_booked,
+                    'observed_at': observed,
+                    'call_id': call_id
+                }
+
+            self.save_knowledge()
+
+    @traced("office_knowledge.record_webhook_call")
+    def record_webhook_call(self, call: Dict) -> bool:
+        """
+        Record the analysis results of a Retell call_analyzed webhook
+
+        Args:
+            call: The 'call' object from the webhook payload
+
+        Returns:
+            True if anything was recorded
+        """
+        custom_data = (call.get('call_analysis') or {}).get('custom_analysis_data') or {}
+        booked = self._parse_flag(custom_data.get('appointment_booked'))
+        CALL_OUTCOMES.inc(outcome="unknown" if booked is None else ("booked" if booked else "not_booked"))
+
+        metadata = call.get('metadata') or {}
+        doctor_id = metadata.get('doctor_id')
+        if not doctor_id:
+            return False
+
+        insurance = metadata.get('insurance') or \
+            (call.get('retell_llm_dynamic_variables') or {}).get('insurance_type')
+        start_timestamp = call.get('start_timestamp')
+
+        self.record_call_result(
+            doctor_id=doctor_id,
+            insurance=insurance,
+            accepts_insurance=self._parse_flag(custom_data.get('accepts_insurance')),
+            accepting_new_patients=self._parse_flag(custom_data.get('accepting_new_patients')),
+            appointment_booked=booked,
+            call_id=call.get('call_id'),
+            observed_at=datetime.fromtimestamp(start_timestamp / 1000) if start_timestamp else None
+        )
+        return True
+
+    def rejection_reason(self, doctor_id: str, insurance: Optional[str] = None) -> Optional[str]:
+        """
+        Check whether calling a doctor's office is known to be pointless
+
+        Returns:
+            A reason if a fresh fact says the office would turn the patient away, else None
+        """
+        doctor_facts = self.facts.get(doctor_id)
+        if not doctor_facts:
+            return None
+
+        new_patients = doctor_facts.get('new_patients')
+        if self._is_fresh(new_patients) and new_patients['accepting'] is False:
+            return "not accepting new patients"
+
+        insurance_key = self._normalize_insurance(insurance)
+        insurance_fact = doctor_facts.get('insurance', {}).get(insurance_key)
+        if insurance_key and self._is_fresh(insurance_fact) and insurance_fact['accepts'] is False:
+            return f"does not accept {insurance}"
+
+        return None
+
+    def is_known_good(self, doctor_id: str, insurance: Optional[str] = None) -> bool:
+        """Check whether a fresh fact says the office accepts the patient's insurance"""
+        insurance_fact = self.facts.get(doctor_id, {}).get('insurance', {}).get(
+            self._normalize_insurance(insurance))
+        return self._is_fresh(insurance_fact) and insurance_fact['accepts'] is True
+
+    def rank_doctors(self, doctors: List, insurance: Optional[str] = None) -> Tuple[List, List]:
+        """
+        Drop doctors known to reject the patient and move known-good ones first
+
+        Args:
+            doctors: Doctors in their current order
+            insurance: Patient's insurance
+
+        Returns:
+            Tuple of (ranked doctors, dropped doctors)
+        """
+        kept, dropped = [], []
+        for doctor in doctors:
+            if self.rejection_reason(doctor.id, insurance):
+                dropped.append(doctor)
+            else:
+                kept.append(doctor)
+
+        # Stable sort keeps the existing order within each group
+        kept.sort(key=lambda d: 0 if self.is_known_good(d.id, insurance) else 1)
+
+        if dropped:
+            self._count('search_results_filtered', len(dropped))
+        return kept, dropped
+
+    def record_avoided_call(self, doctor_id: str, reason: str) -> None:
+        """Count a call the orchestrator skipped because of a known fact"""
+        with self._lock:
+            self.stats['calls_avoided'] = self.stats.get('calls_avoided', 0) + 1
+            by_reason = self.stats.setdefault('calls_avoided_by_reason', {})
+            by_reason[reason] = by_reason.get(reason, 0) + 1
+            self.stats['last_avoided_at'] = datetime.now().isoformat()
+            self.save_knowledge()
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        # Searches count here on the request thread; the file is rewritten by the next real write
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + amount
+
+    def get_stats(self) -> Dict:
+        """Hit counts showing how much the knowledge base saved"""
+        now = datetime.now()
+        fresh_facts = 0
+        for doctor_facts in self.facts.values():
+            if self._is_fresh(doctor_facts.get('new_patients'), now):
+                fresh_facts += 1
+            fresh_facts += sum(1 for f in doctor_facts.get('insurance', {}).values() if self._is_fresh(f, now))
+
+        return {
+            'doctors_known': len(self.facts),
+            'fresh_facts': fresh_facts,
+            'calls_avoided': self.stats.get('calls_avoided', 0),
+            'calls_avoided_by_reason': dict(self.stats.get('calls_avoided_by_reason', {})),
+            'search_results_filtered': self.stats.get('search_results_filtered', 0),
+            'last_avoided_at': self.stats.get('last_avoided_at')
+        }
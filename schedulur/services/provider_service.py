@@ -2,16 +2,36 @@ from schedulur.models.provider import Provider
 from typing import List, Optional
 import uuid
 
+from schedulur.utils.pagination import Page, page_by_key
+
 # In-memory storage for demo
 providers = {}
 
+# Bumped on every write, so cached results computed from the catalog can be keyed by it
+_generation = 0
+
+def _saved(provider: Provider) -> Provider:
+    global _generation
+    existing = providers.get(provider.id)
+    provider.version = (existing.version or 0) + 1 if existing is not None else 1
+    providers[provider.id] = provider
+    _generation += 1
+    return provider
+
 class ProviderService:
     @staticmethod
     def create_provider(provider: Provider) -> Provider:
         if not provider.id:
             provider.id = str(uuid.uuid4())
-        providers[provider.id] = provider
-        return provider
+        return _saved(provider)
+    
+    @staticmethod
+    def create_providers(new_providers: List[Provider]) -> List[Provider]:
+        for provider in new_providers:
+            if not provider.id:
+                provider.id = str(uuid.uuid4())
+            _saved(provider)
+        return new_providers
     
     @staticmethod
     def get_provider(provider_id: str) -> Optional[Provider]:
@@ -21,17 +41,23 @@ class ProviderService:
     def update_provider(provider_id: str, updated_provider: Provider) -> Optional[Provider]:
         if provider_id in providers:
             updated_provider.id = provider_id
-            providers[provider_id] = updated_provider
-            return updated_provider
+            return _saved(updated_provider)
         return None
     
     @staticmethod
     def delete_provider(provider_id: str) -> bool:
+        global _generation
         if provider_id in providers:
             del providers[provider_id]
+            _generation += 1
             return True
         return False
     
+    @staticmethod
+    def data_version() -> int:
+        """Changes whenever any provider is created, updated or deleted"""
+        return _generation
+    
     @staticmethod
     def list_providers() -> List[Provider]:
         return list(providers.values())
@@ -42,4 +68,14 @@ class ProviderService:
     
     @staticmethod
     def filter_providers_by_specialization(specialization: str) -> List[Provider]:
-        return [p for p in providers.values() if specialization.lower() in p.specialization.lower()]
\ No newline at end of file
+        return [p for p in providers.values() if specialization.lower() in p.specialization.lower()]
+    
+    @staticmethod
+    def page_providers(limit: Optional[int], cursor: Optional[str] = None,
+                       specialization: Optional[str] = None, insurance: Optional[str] = None) -> Page:
+        matches = providers
+        if specialization or insurance:
+            matches = {p.id: p for p in providers.values()
+                       if (not specialization or specialization.lower() in p.specialization.lower())
+                       and (not insurance or insurance in p.accepted_insurance)}
+        return page_by_key(matches, limit, cursor)
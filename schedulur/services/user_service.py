@@ -1,9 +1,17 @@
-import json
+import logging
 import os
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
 import uuid
 
 from schedulur.models.user import User
+from schedulur.storage.locking import file_lock
+from schedulur.metrics import record_cache_lookup
+from schedulur.storage.records import (load_records, build_models, open_snapshot, save_models, snapshots_enabled,
+                                       check_version, store_stamp)
+from schedulur.utils.pagination import Page, page_by_key
+
+logger = logging.getLogger(__name__)
 
 class UserService:
     """Service for managing users"""
@@ -15,39 +23,56 @@ class UserService:
     
     def load_users(self) -> None:
         """Load users from data file"""
+        self._stamp = store_stamp(self.data_file)
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    user_data = json.load(f)
-                
-                for user_id, user_dict in user_data.items():
-                    self.users[user_id] = User(**user_dict)
-        except Exception as e:
-            print(f"Error loading users: {e}")
+            snapshot = open_snapshot(self.data_file, User)
+            if snapshot is not None:
+                self.users = snapshot
+                return
+            
+            user_data, trusted = load_records(self.data_file)
+            self.users = build_models(User, user_data, trusted)
+            
+            # Rewrite legacy files once so later loads take the trusted path,
+            # and imported JSON into the snapshot when snapshots are enabled
+            if user_data and (not trusted or snapshots_enabled()):
+                self.save_users()
+        except Exception:
+            logger.exception("Error loading users")
             self.users = {}
     
     def save_users(self) -> None:
         """Save users to data file"""
         try:
-            # Ensure data directory exists
-            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-            
-            user_data = {}
-            for user_id, user in self.users.items():
-                user_data[user_id] = user.dict()
-            
-            with open(self.data_file, 'w') as f:
-                json.dump(user_data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving users: {e}")
+            with file_lock(self.data_file):
+                save_models(self.data_file, self.users, User.model_dump)
+                self._stamp = store_stamp(self.data_file)
+        except Exception:
+            logger.exception("Error saving users")
+    
+    def refresh(self) -> None:
+        """Reload users if another process has saved them since we loaded"""
+        current = store_stamp(self.data_file) == self._stamp
+        record_cache_lookup("users", current)
+        if not current:
+            self.load_users()
+    
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Lock the user store across processes for a read-modify-write (see DoctorService.transaction)"""
+        with file_lock(self.data_file):
+            self.refresh()
+            yield
     
     def create_user(self, user: User) -> Optional[User]:
         """Create a new user"""
         if not user.id:
             user.id = str(uuid.uuid4())
         
-        self.users[user.id] = user
-        self.save_users()
+        with self.transaction():
+            user.version = (self.users[user.id].version or 0) + 1 if user.id in self.users else 1
+            self.users[user.id] = user
+            self.save_users()
         return user
     
     def get_user(self, user_id: str) -> Optional[User]:
@@ -55,22 +80,34 @@ class UserService:
         return self.users.get(user_id)
     
     def update_user(self, user_id: str, user: User) -> Optional[User]:
-        """Update a user"""
-        if user_id in self.users:
+        """
+        Update a user
+        
+        Raises:
+            ConflictError: The user was saved by someone else after this copy was read
+        """
+        with self.transaction():
+            if user_id not in self.users:
+                return None
+            check_version(user_id, user, self.users[user_id])
             user.id = user_id
             self.users[user_id] = user
             self.save_users()
             return user
-        return None
     
     def delete_user(self, user_id: str) -> bool:
         """Delete a user"""
-        if user_id in self.users:
-            del self.users[user_id]
-            self.save_users()
-            return True
+        with self.transaction():
+            if user_id in self.users:
+                del self.users[user_id]
+                self.save_users()
+                return True
         return False
     
     def list_users(self) -> List[User]:
         """List all users"""
-        return list(self.users.values())
\ No newline at end of file
+        return list(self.users.values())
+    
+    def page_users(self, limit: Optional[int], cursor: Optional[str] = None) -> Page:
+        """Users in id order, one page at a time (limit None streams the rest)"""
+        return page_by_key(self.users, limit, cursor)
\ No newline at end of file
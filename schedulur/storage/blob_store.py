@@ -0,0 +1,105 @@
+import os
+import gzip
+import hashlib
+import tempfile
+from typing import Optional
+
+# zstandard is optional; gzip from the standard library is the fallback
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class BlobStore:
+    """Content-addressed store for compressed text blobs.
+
+    Blobs are keyed by the SHA-256 of their uncompressed UTF-8 bytes and laid
+    out as ``<root>/<first two hex chars>/<digest>.<ext>``, so identical
+    content is only stored once and a reference never goes stale.
+    """
+
+    def __init__(self, root: str, compression: Optional[str] = None):
+        self.root = root
+        if compression is None:
+            compression = "zstd" if zstandard else "gzip"
+        if compression == "zstd" and not zstandard:
+            raise ValueError("zstd compression requires the zstandard package")
+        self.compression = compression
+
+    def put(self, text: Optional[str]) -> Optional[str]:
+        """Store text and return its content hash"""
+        if not text:
+            return None
+
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        if self.exists(digest):
+            return digest
+
+        path = self._path(digest, self.compression)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temp file and rename so readers never see partial blobs
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._compress(data))
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return digest
+
+    def get(self, digest: Optional[str]) -> Optional[str]:
+        """Load text by content hash"""
+        if not digest:
+            return None
+
+        for compression in ("zstd", "gzip"):
+            path = self._path(digest, compression)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    return self._decompress(f.read(), compression).decode("utf-8")
+        return None
+
+    def exists(self, digest: str) -> bool:
+        """Check whether a blob is stored"""
+        return any(os.path.exists(self._path(digest, c)) for c in ("zstd", "gzip"))
+
+    def delete(self, digest: str) -> bool:
+        """Remove a blob"""
+        removed = False
+        for compression in ("zstd", "gzip"):
+            path = self._path(digest, compression)
+            if os.path.exists(path):
+                os.remove(path)
+                removed = True
+        return removed
+
+    def _path(self, digest: str, compression: str) -> str:
+        ext = "zst" if compression == "zstd" else "gz"
+        return os.path.join(self.root, digest[:2], f"{digest}.{ext}")
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=9, mtime=0)
+
+    def _decompress(self, data: bytes, compression: str) -> bytes:
+        if compression == "zstd":
+            if not zstandard:
+                raise ValueError("Reading zstd blobs requires the zstandard package")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+
+_transcript_store = None
+
+def get_transcript_store() -> BlobStore:
+    """Get the default store for call transcripts"""
+    global _transcript_store
+    if _transcript_store is None:
+        _transcript_store = BlobStore(os.path.join(os.path.dirname(__file__), "../data/transcripts"))
+    return _transcript_store
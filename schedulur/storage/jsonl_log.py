@@ -0,0 +1,126 @@
+import os
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from schedulur.storage.serialization import dumps, loads
+
+
+class JsonlLog:
+    """Append-only JSON Lines log with size-based rotation.
+
+    Each record is written as a single line, so appending costs the size of
+    the record rather than the size of the history. When the active file grows
+    past ``max_bytes`` it is renamed to ``<name>.1.jsonl`` (older segments are
+    shifted up) and a fresh active file is started. Reads stream records
+    oldest-first across all segments without loading them into memory.
+
+    Use ``JsonlLog.open(path)`` to get the process-wide shared instance for a
+    file so that every writer goes through the same lock.
+    """
+
+    DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+
+    _instances: Dict[str, "JsonlLog"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, max_segments: Optional[int] = None):
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str, **kwargs) -> "JsonlLog":
+        """Get the shared log instance for a data file"""
+        key = os.path.abspath(path)
+        with cls._instances_lock:
+            log = cls._instances.get(key)
+            if log is None:
+                log = cls(key, **kwargs)
+                cls._instances[key] = log
+            return log
+
+    def append(self, record: Dict) -> Dict:
+        """Append a record to the end of the log"""
+        line = dumps(record, pretty=False) + b"\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if self.max_bytes and self._active_size() + len(line) > self.max_bytes:
+                self._rotate()
+            with open(self.path, "ab") as f:
+                f.write(line)
+        return record
+
+    def extend(self, records: List[Dict]) -> None:
+        """Append several records"""
+        for record in records:
+            self.append(record)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.iter_records()
+
+    def iter_records(self, kind: Optional[str] = None) -> Iterator[Dict]:
+        """Stream records oldest-first, optionally only those of one kind"""
+        for segment in self.segments():
+            try:
+                with open(segment, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            record = loads(line)
+                        except ValueError:
+                            # A torn final line from a crashed writer
+                            continue
+                        if kind is None or record.get("kind") == kind:
+                            yield record
+            except FileNotFoundError:
+                # Segment was rotated away while we were reading
+                continue
+
+    def tail(self, n: int, kind: Optional[str] = None) -> List[Dict]:
+        """Return the last ``n`` records"""
+        from collections import deque
+        return list(deque(self.iter_records(kind), maxlen=n))
+
+    def segments(self) -> List[str]:
+        """Paths of all log segments, oldest first"""
+        rotated = []
+        index = 1
+        while os.path.exists(self._segment_path(index)):
+            rotated.append(self._segment_path(index))
+            index += 1
+        paths = list(reversed(rotated))
+        if os.path.exists(self.path):
+            paths.append(self.path)
+        return paths
+
+    def size_bytes(self) -> int:
+        """Total size of all segments on disk"""
+        return sum(os.path.getsize(p) for p in self.segments())
+
+    def _segment_path(self, index: int) -> str:
+        base, ext = os.path.splitext(self.path)
+        return f"{base}.{index}{ext}"
+
+    def _active_size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def _rotate(self) -> None:
+        """Shift rotated segments up by one and retire the active file"""
+        index = 1
+        while os.path.exists(self._segment_path(index)):
+            index += 1
+
+        for i in range(index - 1, 0, -1):
+            if self.max_segments and i + 1 > self.max_segments:
+                os.remove(self._segment_path(i))
+            else:
+                os.replace(self._segment_path(i), self._segment_path(i + 1))
+
+        if os.path.exists(self.path):
+            os.replace(self.path, self._segment_path(1))
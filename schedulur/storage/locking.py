@@ -0,0 +1,69 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+# fcntl is POSIX-only; elsewhere the lock only serializes threads in this process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class _FileLock:
+    """Exclusive flock on one lock file, reentrant within a process"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self) -> None:
+        self._thread_lock.acquire()
+        try:
+            if self._depth == 0:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                self._fd = fd
+            self._depth += 1
+        except Exception:
+            self._thread_lock.release()
+            raise
+
+    def release(self) -> None:
+        try:
+            self._depth -= 1
+            if self._depth == 0:
+                # Closing the descriptor drops the flock
+                os.close(self._fd)
+                self._fd = None
+        finally:
+            self._thread_lock.release()
+
+
+_locks: Dict[str, _FileLock] = {}
+_locks_lock = threading.Lock()
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock for path (on path + ".lock")
+
+    Serializes read-modify-write cycles across gunicorn workers and threads.
+    Nested use by the same thread is allowed.
+    """
+    lock_path = os.path.abspath(path) + ".lock"
+    with _locks_lock:
+        lock = _locks.get(lock_path)
+        if lock is None:
+            os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+            lock = _locks[lock_path] = _FileLock(lock_path)
+
+    lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
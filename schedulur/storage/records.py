@@ -0,0 +1,346 @@
+import gc
+import logging
+import os
+import typing
+from contextlib import contextmanager
+from datetime import date, datetime, time
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from schedulur.metrics import get_registry
+from schedulur.storage.serialization import read_file, write_file
+from schedulur.storage.snapshot import LazyModels, Snapshot, open_lazy_models, write_snapshot
+from schedulur.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Version of the on-disk record layout written by save_records. Bump it
+# whenever a model changes in a way older files would not satisfy (a new
+# required field, a changed type); files stamped with an older version are
+# then loaded through full validation once and rewritten with the new stamp.
+SCHEMA_VERSION = 1
+
+SCHEMA_NAME = "schedulur.records"
+
+# Set to "snapshot" to keep stores in memory-mapped binary snapshots
+# (<store>.snap next to the JSON file) that are loaded one record at a time.
+# JSON stays the import/export format: a JSON file newer than its snapshot
+# is loaded instead and the snapshot rewritten from it on the next save.
+STORE_FORMAT_ENV = "SCHEDULUR_STORE_FORMAT"
+
+
+STORE_LOAD_SECONDS = get_registry().histogram(
+    "schedulur_store_load_seconds", "Time to read and parse a store file", ["store"])
+STORE_LOAD_BYTES = get_registry().counter(
+    "schedulur_store_load_bytes_total", "Bytes of store files read", ["store"])
+STORE_SAVE_SECONDS = get_registry().histogram(
+    "schedulur_store_save_seconds", "Time to write a store file", ["store"])
+STORE_SAVE_BYTES = get_registry().counter(
+    "schedulur_store_save_bytes_total", "Bytes of store files written", ["store"])
+
+
+def store_name(path: str) -> str:
+    """Metrics label for a store file: its name without the extension"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def snapshots_enabled() -> bool:
+    return os.environ.get(STORE_FORMAT_ENV, "json").lower() == "snapshot"
+
+
+def snapshot_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".snap"
+
+
+def load_records(path: str, store: Optional[str] = None) -> Tuple[Dict[str, Dict], bool]:
+    """
+    Read a record file written by save_records
+
+    Args:
+        path: JSON file holding records keyed by id
+        store: Name the load is recorded under in the metrics (default: the file name)
+
+    Returns:
+        (records, trusted) where trusted is True only when the file carries
+        the current schema stamp. Legacy files (a bare {id: record} mapping)
+        and files from other schema versions are returned untrusted.
+    """
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    if size == 0:
+        return {}, True
+
+    store = store or store_name(path)
+    with span("store.load", store=store, bytes=size), STORE_LOAD_SECONDS.time(store=store), _gc_paused():
+        data = read_file(path)
+    STORE_LOAD_BYTES.inc(size, store=store)
+
+    if isinstance(data, dict) and data.get("schema") == SCHEMA_NAME:
+        return data.get("records", {}), data.get("version") == SCHEMA_VERSION
+    return data, False
+
+
+def save_records(path: str, records: Dict[str, Dict]) -> None:
+    """Write records with the current schema stamp, replacing the file atomically"""
+    write_file(path, {"schema": SCHEMA_NAME, "version": SCHEMA_VERSION, "records": records})
+
+
+def open_snapshot(path: str, model_cls: Type[BaseModel], use_warmstart: bool = True) -> Optional[LazyModels]:
+    """
+    Open a store's snapshot for lazy loading
+
+    Uses the store's own snapshot when snapshots are enabled, otherwise its
+    section of the warm-start file (see schedulur.warmstart) unless
+    use_warmstart is off. Returns None
+    when neither is usable or the JSON file is newer; the caller then loads
+    the JSON file as usual.
+    """
+    snap = snapshot_path(path)
+    if not snapshots_enabled() or not os.path.exists(snap):
+        if not use_warmstart:
+            return None
+        # Fall back to the deploy-time warm-start file, if there is one
+        from schedulur import warmstart
+        return warmstart.open_store(path, model_cls)
+    if newer_than(path, snap):
+        return None
+
+    try:
+        return open_lazy_models(snap, model_cls, SCHEMA_VERSION)
+    except (OSError, ValueError):
+        logger.exception("Error opening snapshot %s", snap)
+        return None
+
+
+def newer_than(path: str, other: str) -> bool:
+    """Whether path exists and was modified after other"""
+    return os.path.exists(path) and os.path.getmtime(path) > os.path.getmtime(other)
+
+
+def save_models(path: str, models: Mapping[str, BaseModel], dump: Callable[[BaseModel], Dict],
+                store: Optional[str] = None) -> None:
+    """
+    Save a store's models in its configured format
+
+    Args:
+        path: The store's JSON file (the snapshot lives next to it)
+        models: Models keyed by id, a plain dict or LazyModels
+        dump: Converts one model to its stored record
+        store: Name the save is recorded under in the metrics (default: the file name)
+    """
+    store = store or store_name(path)
+    with span("store.save", store=store), STORE_SAVE_SECONDS.time(store=store):
+        if not snapshots_enabled():
+            save_records(path, {key: dump(model) for key, model in models.items()})
+            written = path
+        else:
+            written = snapshot_path(path)
+            if isinstance(models, LazyModels):
+                write_snapshot(written, models.encoded_items(dump), SCHEMA_VERSION)
+                models.rebase(Snapshot(written))
+            else:
+                write_snapshot(written, ((key, dump(model)) for key, model in models.items()), SCHEMA_VERSION)
+    STORE_SAVE_BYTES.inc(os.path.getsize(written), store=store)
+
+
+def export_snapshot(path: str) -> int:
+    """Write a store's snapshot out as its JSON file; returns the record count"""
+    snapshot = Snapshot(snapshot_path(path))
+    try:
+        records = {key: snapshot.get(key) for key in snapshot.keys()}
+    finally:
+        snapshot.close()
+    save_records(path, records)
+    # Keep the snapshot authoritative: it must not look older than the export
+    os.utime(snapshot_path(path))
+    return len(records)
+
+
+class ConflictError(Exception):
+    """A record was changed by another writer after it was read"""
+
+    def __init__(self, key: str, expected: int, actual: int):
+        super().__init__(f"Record {key} was changed by someone else "
+                         f"(now at version {actual}, update was based on version {expected})")
+        self.key = key
+        self.expected = expected
+        self.actual = actual
+
+
+def check_version(key: str, model: BaseModel, current: Optional[BaseModel]) -> None:
+    """
+    Compare-and-swap check before storing model under key
+
+    model.version must match the stored record's version, i.e. the model was
+    read from (or is) the current record; a version of None skips the check
+    (last write wins). On success the model's version is bumped for the save.
+    Call with the store's file lock held and the store freshly loaded.
+
+    Raises:
+        ConflictError: The stored record has moved on since model was read
+    """
+    stored = (current.version or 0) if current is not None else 0
+    if model.version is not None and model.version != stored:
+        raise ConflictError(key, model.version, stored)
+    model.version = stored + 1
+
+
+def store_stamp(path: str) -> Tuple:
+    """Changes whenever a store's JSON file or snapshot is rewritten"""
+    stamp = []
+    for file in (path, snapshot_path(path)):
+        try:
+            stat = os.stat(file)
+            stamp.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def build_model(model_cls: Type[BaseModel], data: Dict, trusted: bool = False) -> BaseModel:
+    """
+    Build a model from a stored record
+
+    Trusted records (our own files, see load_records) skip Pydantic
+    validation: nested models and date/time fields are converted directly
+    and the instance is assembled the way model_construct does. A trusted record
+    missing a required field falls back to full validation. Anything that
+    did not come from our own store (API responses, form input) must use
+    trusted=False.
+    """
+    if trusted:
+        plan = _construct_plan(model_cls)
+        if plan.required.issubset(data.keys()):
+            return plan.construct(data)
+    return model_cls(**data)
+
+
+def build_models(model_cls: Type[BaseModel], records: Dict[str, Dict], trusted: bool = False) -> Dict[str, BaseModel]:
+    """Build every record in a store with build_model, keyed like the input"""
+    with _gc_paused():
+        return {key: build_model(model_cls, record, trusted) for key, record in records.items()}
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Suspend the cyclic garbage collector around a bulk load.
+
+    Parsing and building a large store allocates hundreds of thousands of
+    acyclic objects, each batch of which would otherwise trigger a
+    collection pass over everything allocated so far.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+class _ConstructPlan:
+    """
+    Per-model field converters and defaults used by build_model's trusted path.
+
+    Instances are assembled the way BaseModel.model_construct does it, but
+    with the defaults resolved once per model instead of once per record,
+    which is what makes skipping validation pay off for large stores.
+    """
+
+    def __init__(self, model_cls: Type[BaseModel]):
+        self.model_cls = model_cls
+        fields = model_cls.model_fields
+        self.field_names = frozenset(fields)
+        self.required = frozenset(name for name, field in fields.items() if field.is_required())
+        self.converters: Dict[str, Callable[[Any], Any]] = {}
+        for name, field in fields.items():
+            converter = _converter_for(field.annotation)
+            if converter is not None:
+                self.converters[name] = converter
+
+        # Immutable defaults are shared; mutable ones are copied per instance
+        self.defaults: Dict[str, Any] = {}
+        self.default_factories: Dict[str, Callable[[], Any]] = {}
+        for name, field in fields.items():
+            if field.is_required():
+                continue
+            if field.default_factory is not None:
+                self.default_factories[name] = field.default_factory
+            elif isinstance(field.default, (list, dict, set)):
+                self.default_factories[name] = field.default.copy
+            else:
+                self.defaults[name] = field.default
+
+        # Anything unusual goes through model_construct itself
+        self.simple = (not model_cls.__pydantic_post_init__
+                       and model_cls.model_config.get('extra') != 'allow'
+                       and not any(field.alias for field in fields.values()))
+
+    def construct(self, data: Dict) -> BaseModel:
+        if not self.simple:
+            data = dict(data)
+            for name, converter in self.converters.items():
+                if data.get(name) is not None:
+                    data[name] = converter(data[name])
+            return self.model_cls.model_construct(**data)
+
+        fields_set = set(data)
+        if not fields_set <= self.field_names:
+            fields_set &= self.field_names
+            data = {name: data[name] for name in fields_set}
+
+        values = dict(self.defaults)
+        values.update(data)
+        for name, factory in self.default_factories.items():
+            if name not in fields_set:
+                values[name] = factory()
+        for name, converter in self.converters.items():
+            value = values.get(name)
+            if value is not None:
+                values[name] = converter(value)
+
+        instance = self.model_cls.__new__(self.model_cls)
+        object.__setattr__(instance, '__dict__', values)
+        object.__setattr__(instance, '__pydantic_fields_set__', fields_set)
+        object.__setattr__(instance, '__pydantic_extra__', None)
+        object.__setattr__(instance, '__pydantic_private__', None)
+        return instance
+
+
+_plans: Dict[Type[BaseModel], _ConstructPlan] = {}
+
+def _construct_plan(model_cls: Type[BaseModel]) -> _ConstructPlan:
+    plan = _plans.get(model_cls)
+    if plan is None:
+        plan = _plans[model_cls] = _ConstructPlan(model_cls)
+    return plan
+
+
+def _parse_iso(parse: Callable[[str], Any]) -> Callable[[Any], Any]:
+    return lambda value: parse(value) if isinstance(value, str) else value
+
+
+def _converter_for(annotation: Any) -> Optional[Callable[[Any], Any]]:
+    """Converter from stored JSON to the field's Python type, or None if none is needed"""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return _converter_for(args[0]) if len(args) == 1 else None
+    if origin is list:
+        args = typing.get_args(annotation)
+        item = _converter_for(args[0]) if args else None
+        if item is None:
+            return None
+        return lambda values: [item(v) if v is not None else v for v in values]
+
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return lambda value: _construct_plan(annotation).construct(value) if isinstance(value, dict) else value
+        if issubclass(annotation, datetime):
+            return _parse_iso(datetime.fromisoformat)
+        if issubclass(annotation, date):
+            return _parse_iso(date.fromisoformat)
+        if issubclass(annotation, time):
+            return _parse_iso(time.fromisoformat)
+    return None
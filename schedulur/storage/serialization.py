@@ -0,0 +1,115 @@
+import os
+import json
+import tempfile
+from datetime import date, datetime, time
+from typing import Any, Optional, Union
+
+from pydantic import BaseModel
+
+from schedulur.models.slot import Slot
+
+# orjson is optional; the standard library json module is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Stores and API responses are compact by default. Set SCHEDULUR_JSON_PRETTY=1
+# to write indented JSON while debugging.
+PRETTY_ENV = "SCHEDULUR_JSON_PRETTY"
+
+
+def pretty_default() -> bool:
+    return os.environ.get(PRETTY_ENV, "").lower() in ("1", "true", "yes")
+
+
+def _default(obj: Any) -> Any:
+    """Encode the non-JSON types our stores and responses carry"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, Slot):
+        return {"start_time": obj.start_time, "end_time": obj.end_time}
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _stdlib_default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    return _default(obj)
+
+
+def _replace_slots(obj: Any) -> Any:
+    """The stdlib encoder writes tuple subclasses as arrays without asking
+    default(), so Slots have to be swapped out before encoding"""
+    if isinstance(obj, Slot):
+        return _default(obj)
+    if isinstance(obj, dict):
+        return {key: _replace_slots(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_replace_slots(value) for value in obj]
+    return obj
+
+
+def dumps(obj: Any, pretty: Optional[bool] = None) -> bytes:
+    """
+    Serialize to UTF-8 JSON bytes
+
+    datetime, date and time values are written as ISO 8601 strings, Pydantic
+    models as their fields and Slots as start_time/end_time pairs.
+
+    Args:
+        obj: Value to serialize
+        pretty: Indent the output; defaults to the SCHEDULUR_JSON_PRETTY setting
+    """
+    return _encode(obj, pretty, may_contain_slots=True)
+
+
+def _encode(obj: Any, pretty: Optional[bool], may_contain_slots: bool) -> bytes:
+    if pretty is None:
+        pretty = pretty_default()
+
+    if orjson:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+
+    if may_contain_slots:
+        obj = _replace_slots(obj)
+    if pretty:
+        return json.dumps(obj, default=_stdlib_default, indent=2).encode("utf-8")
+    return json.dumps(obj, default=_stdlib_default, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON produced by dumps (ISO timestamps stay strings)"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def write_file(path: str, obj: Any, pretty: Optional[bool] = None) -> None:
+    """Serialize to a file, replacing it atomically"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            # Stores never hold Slots, so the stdlib path can skip looking for them
+            f.write(_encode(obj, pretty, may_contain_slots=False))
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_file(path: str) -> Any:
+    """Parse a JSON file"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
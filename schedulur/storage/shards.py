@@ -0,0 +1,203 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Type
+from urllib.parse import quote, unquote
+
+from pydantic import BaseModel
+
+from schedulur.metrics import record_cache_lookup
+from schedulur.storage.locking import file_lock
+from schedulur.storage.records import (build_models, check_version, load_records, open_snapshot, save_models,
+                                       store_stamp)
+
+logger = logging.getLogger(__name__)
+
+# Shard for records that belong to no user
+UNASSIGNED = "_unassigned"
+
+# A directory modified this recently may be modified again within the same
+# timestamp tick, so its mtime alone can't prove nothing changed since
+RACY_MTIME_NS = 1_000_000_000
+
+
+class _Shard:
+    def __init__(self, path: str):
+        self.path = path
+        self.models: Dict[str, BaseModel] = {}
+        self.stamp = None
+
+
+class ShardedStore:
+    """
+    Records split into one store file per user: <root>/<user id>.json
+
+    A shard is loaded the first time its user is touched and reloaded when
+    another process has saved it. Each shard has its own file lock, so
+    writes for different users never wait on each other, and a user's data
+    can be moved to another node by moving its files. Shards use the same
+    record format (and snapshots, when enabled) as the single-file stores.
+    """
+
+    def __init__(self, root: str, model_cls: Type[BaseModel], dump: Callable[[BaseModel], Dict]):
+        self.root = root
+        # Label for this store's metrics
+        self.name = os.path.basename(root)
+        self.model_cls = model_cls
+        self.dump = dump
+        self._shards: Dict[str, _Shard] = {}
+        self._lock = threading.Lock()
+        # Bumped by every save in this process
+        self._generation = 0
+
+    @staticmethod
+    def shard_id(user_id: Optional[str]) -> str:
+        return user_id or UNASSIGNED
+
+    def shard_path(self, user_id: Optional[str]) -> str:
+        return os.path.join(self.root, quote(self.shard_id(user_id), safe="") + ".json")
+
+    def user_ids(self) -> List[str]:
+        """Shards on disk"""
+        if not os.path.isdir(self.root):
+            return []
+        names = set()
+        for filename in os.listdir(self.root):
+            name, ext = os.path.splitext(filename)
+            if ext in (".json", ".snap"):
+                names.add(unquote(name))
+        return sorted(names)
+
+    def stamp(self) -> tuple:
+        """
+        Changes whenever any shard is written, by this process or another
+
+        Saves here bump a counter. Other processes' saves rename a file into
+        the shard directory, which changes its mtime, so one stat covers
+        every shard; only right after a change are the shards stat'ed too.
+        """
+        try:
+            modified = os.stat(self.root).st_mtime_ns
+        except FileNotFoundError:
+            return (self._generation, None)
+        if time.time_ns() - modified < RACY_MTIME_NS:
+            return (self._generation, modified, self.shard_stamps())
+        return (self._generation, modified)
+
+    def shard_stamps(self) -> tuple:
+        """store_stamp() of every shard (a directory listing and two stats per user)"""
+        return tuple((user_id, store_stamp(self.shard_path(user_id))) for user_id in self.user_ids())
+
+    def _shard(self, user_id: Optional[str]) -> _Shard:
+        shard_id = self.shard_id(user_id)
+        shard = self._shards.get(shard_id)
+        if shard is None:
+            with self._lock:
+                shard = self._shards.setdefault(shard_id, _Shard(self.shard_path(user_id)))
+        return shard
+
+    def _load(self, shard: _Shard) -> None:
+        shard.stamp = store_stamp(shard.path)
+        try:
+            snapshot = open_snapshot(shard.path, self.model_cls, use_warmstart=False)
+            if snapshot is not None:
+                shard.models = snapshot
+                return
+            records, trusted = load_records(shard.path, store=self.name)
+            shard.models = build_models(self.model_cls, records, trusted)
+        except Exception:
+            logger.exception("Error loading shard %s", shard.path)
+            shard.models = {}
+
+    def _refresh(self, shard: _Shard) -> None:
+        current = shard.stamp is not None and store_stamp(shard.path) == shard.stamp
+        record_cache_lookup(self.name, current)
+        if not current:
+            self._load(shard)
+
+    def models(self, user_id: Optional[str]) -> Dict[str, BaseModel]:
+        """A user's records, keyed by id"""
+        shard = self._shard(user_id)
+        self._refresh(shard)
+        return shard.models
+
+    def all_models(self) -> Iterator[BaseModel]:
+        """Every user's records (loads every shard)"""
+        for user_id in self.user_ids():
+            yield from self.models(user_id).values()
+
+    def find(self, key: str) -> Optional[str]:
+        """Shard id holding key, checking shards already in memory first"""
+        loaded = list(self._shards)
+        for shard_id in loaded + [u for u in self.user_ids() if u not in loaded]:
+            if key in self.models(shard_id):
+                return shard_id
+        return None
+
+    @contextmanager
+    def transaction(self, user_id: Optional[str]) -> Iterator[Dict[str, BaseModel]]:
+        """Lock a user's shard for a read-modify-write and yield its current records"""
+        shard = self._shard(user_id)
+        with file_lock(shard.path):
+            self._refresh(shard)
+            yield shard.models
+
+    def save(self, user_id: Optional[str]) -> None:
+        """Write a user's shard"""
+        shard = self._shard(user_id)
+        os.makedirs(self.root, exist_ok=True)
+        with file_lock(shard.path):
+            save_models(shard.path, shard.models, self.dump, store=self.name)
+            shard.stamp = store_stamp(shard.path)
+        with self._lock:
+            self._generation += 1
+
+    def replace(self, user_id: Optional[str], models: Dict[str, BaseModel]) -> None:
+        """Overwrite a user's shard"""
+        with self.transaction(user_id):
+            self._shard(user_id).models = dict(models)
+            self.save(user_id)
+
+    def put(self, user_id: Optional[str], key: str, model: BaseModel) -> BaseModel:
+        """Store a record, replacing any with the same key"""
+        with self.transaction(user_id) as models:
+            existing = models.get(key)
+            model.version = (existing.version or 0) + 1 if existing is not None else 1
+            models[key] = model
+            self.save(user_id)
+        return model
+
+    def put_many(self, user_id: Optional[str], models: Dict[str, BaseModel]) -> List[BaseModel]:
+        """Store several records in one locked read-modify-write and one save"""
+        with self.transaction(user_id) as current:
+            for key, model in models.items():
+                existing = current.get(key)
+                model.version = (existing.version or 0) + 1 if existing is not None else 1
+                current[key] = model
+            self.save(user_id)
+        return list(models.values())
+
+    def update(self, user_id: Optional[str], key: str, model: BaseModel) -> Optional[BaseModel]:
+        """
+        Replace an existing record (compare-and-swap on version)
+
+        Raises:
+            ConflictError: The record was saved by someone else after model was read
+        """
+        with self.transaction(user_id) as models:
+            if key not in models:
+                return None
+            check_version(key, model, models[key])
+            models[key] = model
+            self.save(user_id)
+        return model
+
+    def delete(self, user_id: Optional[str], key: str) -> bool:
+        with self.transaction(user_id) as models:
+            if key not in models:
+                return False
+            del models[key]
+            self.save(user_id)
+        return True
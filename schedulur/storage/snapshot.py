@@ -0,0 +1,287 @@
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from datetime import date, datetime, time
+from typing import Any, Callable, Dict, Iterable, Iterator, MutableMapping, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from schedulur.storage import serialization
+
+# msgpack is optional; records fall back to compact JSON inside the snapshot
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MAGIC = b"SCHSNP01"
+# Several stores in one file, each with its own index (see write_sections)
+MAGIC_SECTIONS = b"SCHSEC01"
+
+# magic, codec, schema version, index offset, index length, record count
+HEADER = struct.Struct("<8scxxxIQQI")
+
+CODEC_MSGPACK = b"m"
+CODEC_JSON = b"j"
+
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not serializable: {type(obj).__name__}")
+
+
+def _codec(name: bytes) -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    """(encode, decode) for a codec byte"""
+    if name == CODEC_MSGPACK:
+        if not msgpack:
+            raise ValueError("snapshot was written with msgpack, which is not installed")
+        return (lambda obj: msgpack.packb(obj, default=_msgpack_default, use_bin_type=True),
+                lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False))
+    if name == CODEC_JSON:
+        return (lambda obj: serialization.dumps(obj, pretty=False), serialization.loads)
+    raise ValueError(f"unknown snapshot codec {name!r}")
+
+
+def write_snapshot(path: str, records: Iterable[Tuple[str, Any]], schema_version: int,
+                   codec: Optional[bytes] = None) -> None:
+    """
+    Write records to a snapshot file, replacing it atomically
+
+    Args:
+        path: Snapshot file
+        records: (key, value) pairs; a bytes value is taken as an already
+            encoded record (see LazyModels.encoded_items) and copied as is
+        schema_version: Stamp checked by readers before trusting the records
+        codec: CODEC_MSGPACK or CODEC_JSON; msgpack when installed by default
+    """
+    _write(path, MAGIC, {None: records}, schema_version, codec)
+
+
+def write_sections(path: str, sections: Dict[str, Iterable[Tuple[str, Any]]], schema_version: int,
+                   codec: Optional[bytes] = None) -> None:
+    """
+    Write several stores to one snapshot file, replacing it atomically
+
+    Each section gets its own index, so Snapshot.section() decodes only the
+    index of the store it opens.
+
+    Args:
+        path: Snapshot file
+        sections: Section name to (key, value) pairs, as for write_snapshot
+        schema_version: Stamp checked by readers before trusting the records
+        codec: CODEC_MSGPACK or CODEC_JSON; msgpack when installed by default
+    """
+    _write(path, MAGIC_SECTIONS, sections, schema_version, codec)
+
+
+def _write(path: str, magic: bytes, sections: Dict[Optional[str], Iterable[Tuple[str, Any]]],
+           schema_version: int, codec: Optional[bytes]) -> None:
+    codec = codec or _default_codec()
+    encode, _ = _codec(codec)
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"\0" * HEADER.size)
+            offset = HEADER.size
+            indexes = {}
+            for name, records in sections.items():
+                index = indexes[name] = {}
+                for key, value in records:
+                    data = value if isinstance(value, bytes) else encode(value)
+                    f.write(data)
+                    index[key] = (offset, len(data))
+                    offset += len(data)
+
+            if magic == MAGIC_SECTIONS:
+                # The top-level index points at each section's own index
+                table = {}
+                for name, index in indexes.items():
+                    data = encode(index)
+                    f.write(data)
+                    table[name] = (offset, len(data))
+                    offset += len(data)
+                indexes = {None: table}
+
+            index_data = encode(indexes[None])
+            f.write(index_data)
+            f.seek(0)
+            f.write(HEADER.pack(magic, codec, schema_version, offset, len(index_data), len(indexes[None])))
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class Snapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file.
+
+    Opening one decodes only the header and the offset index; get() decodes
+    a single record by slicing the mapping, so a lookup never touches the
+    rest of the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._owner = True
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else None
+        if self._mmap is None or len(self._mmap) < HEADER.size:
+            raise ValueError(f"{path} is not a snapshot")
+
+        magic, codec, self.schema_version, index_offset, index_length, count = HEADER.unpack_from(self._mmap, 0)
+        if magic not in (MAGIC, MAGIC_SECTIONS):
+            raise ValueError(f"{path} is not a snapshot")
+        self.sectioned = magic == MAGIC_SECTIONS
+        self.codec = codec
+        self._encode, self._decode = _codec(codec)
+        # key -> [offset, length]; for a sectioned file, section name -> its index
+        self._index: Dict[str, Tuple[int, int]] = self._decode(self._mmap[index_offset:index_offset + index_length])
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    def keys(self):
+        return self._index.keys()
+
+    def raw(self, key: str) -> bytes:
+        """Encoded bytes of one record"""
+        offset, length = self._index[key]
+        return self._mmap[offset:offset + length]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Decode one record"""
+        if key not in self._index:
+            return default
+        return self._decode(self.raw(key))
+
+    def section(self, name: str) -> Optional["Snapshot"]:
+        """
+        View of one store in a file written by write_sections
+
+        Decodes only that store's index. Returns None when the file has no
+        such section.
+        """
+        if not self.sectioned:
+            raise ValueError(f"{self.path} has no sections")
+        if name not in self._index:
+            return None
+        offset, length = self._index[name]
+        view = object.__new__(Snapshot)
+        view.__dict__.update(self.__dict__, _index=self._decode(self._mmap[offset:offset + length]),
+                             _owner=False, sectioned=False)
+        return view
+
+    def close(self) -> None:
+        # Sections share their parent's mapping and leave it open
+        if self._mmap is not None and self._owner:
+            self._mmap.close()
+        self._mmap = None
+
+
+class LazyModels(MutableMapping):
+    """
+    Dict of models backed by a snapshot.
+
+    Records are decoded and built on first access and then cached; writes
+    and deletes stay in memory until the owning service saves. Saving only
+    re-encodes models that were loaded (and so may have been changed);
+    untouched records are copied across as raw bytes.
+    """
+
+    def __init__(self, snapshot: Snapshot, build: Callable[[Dict], BaseModel], reuse_raw: bool = True):
+        self._snapshot = snapshot
+        self._build = build
+        self._reuse_raw = reuse_raw
+        self._loaded: Dict[str, BaseModel] = {}
+        self._deleted = set()
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key: str) -> BaseModel:
+        model = self._loaded.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            if key in self._deleted or key not in self._snapshot:
+                raise KeyError(key)
+            model = self._loaded.get(key)
+            if model is None:
+                model = self._loaded[key] = self._build(self._snapshot.get(key))
+            return model
+
+    def __setitem__(self, key: str, model: BaseModel) -> None:
+        with self._lock:
+            self._loaded[key] = model
+            self._deleted.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            if key not in self:
+                raise KeyError(key)
+            self._loaded.pop(key, None)
+            self._deleted.add(key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._loaded or (key in self._snapshot and key not in self._deleted)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._snapshot.keys():
+            if key not in self._deleted:
+                yield key
+        for key in list(self._loaded):
+            if key not in self._snapshot:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    @property
+    def loaded_count(self) -> int:
+        """How many records have been decoded so far"""
+        return len(self._loaded)
+
+    def encoded_items(self, dump: Callable[[BaseModel], Dict]) -> Iterator[Tuple[str, Any]]:
+        """(key, record) pairs for write_snapshot: raw bytes where the record was never loaded"""
+        for key in self:
+            model = self._loaded.get(key)
+            if model is None and self._reuse_raw and self._snapshot.codec == _default_codec():
+                yield key, self._snapshot.raw(key)
+            else:
+                yield key, dump(self[key])
+
+    def rebase(self, snapshot: Snapshot) -> None:
+        """Point at a freshly written snapshot that holds every pending change"""
+        with self._lock:
+            self._snapshot = snapshot
+            self._deleted.clear()
+            self._reuse_raw = True
+
+
+def _default_codec() -> bytes:
+    return CODEC_MSGPACK if msgpack else CODEC_JSON
+
+
+def open_lazy_models(path: str, model_cls: Type[BaseModel], schema_version: int) -> LazyModels:
+    """Open a snapshot as LazyModels, trusting it only if it carries schema_version"""
+    return lazy_models(Snapshot(path), model_cls, schema_version)
+
+
+def lazy_models(snapshot: Snapshot, model_cls: Type[BaseModel], schema_version: int) -> LazyModels:
+    """LazyModels over an open snapshot or section"""
+    from schedulur.storage.records import build_model
+
+    trusted = snapshot.schema_version == schema_version
+    # Records from another schema version are re-encoded on the next save
+    return LazyModels(snapshot, lambda record: build_model(model_cls, record, trusted), reuse_raw=trusted)
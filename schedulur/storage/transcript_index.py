@@ -0,0 +1,215 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+from datetime import datetime
+
+from schedulur.storage.blob_store import BlobStore, get_transcript_store
+
+
+class TranscriptIndex:
+    """Full-text index over call transcripts backed by SQLite FTS5.
+
+    Call metadata lives in a regular ``calls`` table with indexes on doctor,
+    user and call time. Transcript text is tokenized into a contentless FTS5
+    table that shares rowids with ``calls``, so the index stores only the
+    inverted lists; the text itself stays in the transcript blob store.
+
+    Queries use FTS5 syntax: bare words, ``"quoted phrases"``, ``a AND b``,
+    ``a OR b``, ``a NOT b``, ``NEAR(...)`` and ``prefix*``. Words are
+    stemmed, so ``accepting`` also matches ``accept``.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS calls (
+            id INTEGER PRIMARY KEY,
+            call_key TEXT NOT NULL UNIQUE,
+            appointment_id TEXT,
+            doctor_id TEXT,
+            user_id TEXT,
+            call_time INTEGER,
+            transcript_ref TEXT
+        );
+        CREATE INDEX IF NOT EXISTS calls_doctor ON calls(doctor_id, call_time);
+        CREATE INDEX IF NOT EXISTS calls_user ON calls(user_id, call_time);
+        CREATE INDEX IF NOT EXISTS calls_time ON calls(call_time);
+        CREATE VIRTUAL TABLE IF NOT EXISTS calls_fts USING fts5(
+            transcript, content='', tokenize='porter unicode61'
+        );
+    """
+
+    def __init__(self, db_file: str = None, transcript_store: Optional[BlobStore] = None):
+        self.db_file = db_file or os.path.join(os.path.dirname(__file__), "../data/transcripts.db")
+        self.transcript_store = transcript_store or get_transcript_store()
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Per-thread connection to the index database"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+            conn = sqlite3.connect(self.db_file)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def index_call(self,
+                   call_key: str,
+                   transcript: Optional[str] = None,
+                   transcript_ref: Optional[str] = None,
+                   appointment_id: Optional[str] = None,
+                   doctor_id: Optional[str] = None,
+                   user_id: Optional[str] = None,
+                   call_time: Optional[datetime] = None) -> bool:
+        """
+        Add or replace one call in the index
+
+        Args:
+            call_key: Stable identifier for the call (Retell call ID or appointment ID)
+            transcript: Transcript text; loaded from the blob store when omitted
+            transcript_ref: Blob store hash of the transcript
+            appointment_id: Appointment the call was made for
+            doctor_id: Doctor whose office was called
+            user_id: Patient the call was made for
+            call_time: When the call took place
+
+        Returns:
+            True if the index changed
+        """
+        if transcript is None:
+            transcript = self.transcript_store.get(transcript_ref)
+        elif transcript_ref is None:
+            transcript_ref = self.transcript_store.put(transcript)
+        if not transcript:
+            return False
+
+        conn = self.connection
+        with self._write_lock, conn:
+            existing = conn.execute(
+                "SELECT id, transcript_ref FROM calls WHERE call_key = ?", (call_key,)).fetchone()
+            if existing:
+                if existing["transcript_ref"] == transcript_ref:
+                    return False
+                self._delete_row(conn, existing["id"], existing["transcript_ref"])
+
+            cursor = conn.execute(
+                "INSERT INTO calls (call_key, appointment_id, doctor_id, user_id, call_time, transcript_ref) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (call_key, appointment_id, doctor_id, user_id,
+                 int(call_time.timestamp()) if call_time else None, transcript_ref))
+            conn.execute("INSERT INTO calls_fts (rowid, transcript) VALUES (?, ?)",
+                         (cursor.lastrowid, transcript))
+        return True
+
+    def index_appointment(self, appointment) -> bool:
+        """Index the call transcript attached to an appointment"""
+        if not appointment.call_transcript_ref:
+            return False
+        return self.index_call(
+            call_key=f"appointment:{appointment.id}",
+            transcript_ref=appointment.call_transcript_ref,
+            appointment_id=appointment.id,
+            doctor_id=appointment.doctor_id,
+            user_id=appointment.user_id,
+            call_time=appointment.call_timestamp
+        )
+
+    def remove_call(self, call_key: str) -> bool:
+        """Remove a call from the index"""
+        conn = self.connection
+        with self._write_lock, conn:
+            existing = conn.execute(
+                "SELECT id, transcript_ref FROM calls WHERE call_key = ?", (call_key,)).fetchone()
+            if not existing:
+                return False
+            self._delete_row(conn, existing["id"], existing["transcript_ref"])
+        return True
+
+    def _delete_row(self, conn: sqlite3.Connection, row_id: int, transcript_ref: Optional[str]) -> None:
+        # Contentless FTS tables need the original text to remove its tokens
+        old_text = self.transcript_store.get(transcript_ref)
+        if old_text:
+            conn.execute("INSERT INTO calls_fts (calls_fts, rowid, transcript) VALUES ('delete', ?, ?)",
+                         (row_id, old_text))
+        conn.execute("DELETE FROM calls WHERE id = ?", (row_id,))
+
+    def search(self,
+               query: str,
+               doctor_id: Optional[str] = None,
+               user_id: Optional[str] = None,
+               since: Optional[datetime] = None,
+               until: Optional[datetime] = None,
+               limit: int = 20) -> List[Dict]:
+        """
+        Search transcripts
+
+        Args:
+            query: FTS5 query, e.g. '"not taking new patients"' or 'medicaid NOT medicare'
+            doctor_id: Only calls to this doctor
+            user_id: Only calls made for this user
+            since: Only calls at or after this time
+            until: Only calls before this time
+            limit: Maximum number of results
+
+        Returns:
+            Matching calls, best match first
+        """
+        sql = ("SELECT c.call_key, c.appointment_id, c.doctor_id, c.user_id, c.call_time, c.transcript_ref "
+               "FROM calls_fts JOIN calls c ON c.id = calls_fts.rowid "
+               "WHERE calls_fts MATCH ?")
+        params: List = [query]
+        if doctor_id:
+            sql += " AND c.doctor_id = ?"
+            params.append(doctor_id)
+        if user_id:
+            sql += " AND c.user_id = ?"
+            params.append(user_id)
+        if since:
+            sql += " AND c.call_time >= ?"
+            params.append(int(since.timestamp()))
+        if until:
+            sql += " AND c.call_time < ?"
+            params.append(int(until.timestamp()))
+        sql += " ORDER BY calls_fts.rank LIMIT ?"
+        params.append(limit)
+
+        try:
+            rows = self.connection.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query: {e}")
+
+        results = []
+        for row in rows:
+            result = dict(row)
+            if result["call_time"] is not None:
+                result["call_time"] = datetime.fromtimestamp(result["call_time"]).isoformat()
+            results.append(result)
+        return results
+
+    def count(self) -> int:
+        """Number of indexed calls"""
+        return self.connection.execute("SELECT COUNT(*) FROM calls").fetchone()[0]
+
+    def snippet(self, transcript_ref: str, query: str, width: int = 80) -> str:
+        """Return the part of a transcript around the first query term"""
+        text = self.transcript_store.get(transcript_ref) or ""
+        terms = [t.strip('"()*').lower() for t in query.split()
+                 if t.upper() not in ("AND", "OR", "NOT") and t.strip('"()*')]
+        lowered = text.lower()
+        position = min((lowered.find(t) for t in terms if t in lowered), default=0)
+        start = max(position - width // 2, 0)
+        return " ".join(text[start:start + width].split())
+
+
+_transcript_index = None
+
+def get_transcript_index() -> TranscriptIndex:
+    """Get the default transcript index"""
+    global _transcript_index
+    if _transcript_index is None:
+        _transcript_index = TranscriptIndex()
+    return _transcript_index
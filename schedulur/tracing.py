@@ -0,0 +1,261 @@
+"""
+Request tracing: nested, timed spans across search, scheduling and calls
+
+Service methods are wrapped in spans; a span started while another is
+running becomes its child, so one request yields a tree showing where its
+time went:
+
+    with span("appointment.schedule_with_doctor", doctor_id=doctor.id):
+        ...
+
+    @traced("retell.create_call")
+    def call_doctor(...):
+
+A request's trace id is its correlation id (see schedulur.logs), so a
+trace and the request's log lines share one id. Context variables carry
+the current span into I/O pool calls (see run_blocking) and into threads
+started with propagate(); trace_context() packs it into metadata that
+comes back with a webhook, which continues the trace with span(parent=...).
+
+Finished spans go to an in-memory ring buffer (served at /api/traces and
+shown by `schedulur traces`) and, when SCHEDULUR_TRACE_FILE is set, are
+appended to that JSON Lines file. Nothing is sent to an external collector.
+"""
+
+import contextvars
+import functools
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+from schedulur.logs import get_correlation_id
+from schedulur.storage.jsonl_log import JsonlLog
+
+TRACE_FILE_ENV = "SCHEDULUR_TRACE_FILE"
+TRACE_BUFFER_ENV = "SCHEDULUR_TRACE_BUFFER"
+
+# Finished spans kept in memory
+DEFAULT_BUFFER_SIZE = 4096
+# Rotate the trace file at this size, keeping a few old segments
+TRACE_FILE_MAX_BYTES = 20 * 1024 * 1024
+TRACE_FILE_SEGMENTS = 5
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "error",
+                 "start_time", "duration_ms", "_start", "_token", "_tracer")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.start_time = time.time()
+        self.duration_ms: Optional[float] = None
+        self._start = time.perf_counter()
+        self._token: Optional[contextvars.Token] = None
+        self._tracer = tracer
+
+    def set_attribute(self, name: str, value: Any) -> None:
+        self.attributes[name] = value
+
+    def record_error(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self) -> None:
+        """Stop the clock, make the parent current again and export the span"""
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # Ended from another context (a streamed response's close); nothing to restore
+                pass
+            self._token = None
+        self._tracer.export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": datetime.fromtimestamp(self.start_time, timezone.utc).isoformat(timespec="microseconds"),
+            "duration_ms": round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            "attributes": self.attributes,
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+class Tracer:
+    """Starts spans and keeps the finished ones"""
+
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE, path: Optional[str] = None):
+        self._spans: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self.log = JsonlLog.open(path, max_bytes=TRACE_FILE_MAX_BYTES,
+                                 max_segments=TRACE_FILE_SEGMENTS) if path else None
+
+    def start_span(self, name: str, parent: Optional[Dict[str, str]] = None, **attributes) -> Span:
+        """
+        Start a span and make it current; end it with span.end()
+
+        Args:
+            name: Operation name, e.g. "doctor_search.search_doctors"
+            parent: A trace_context() from elsewhere (a webhook's metadata) to
+                continue instead of the current span
+            attributes: Fields recorded with the span (ids, counts)
+        """
+        if parent and parent.get("trace_id"):
+            trace_id, parent_id = parent["trace_id"], parent.get("span_id")
+        else:
+            current = _current_span.get()
+            if current is not None:
+                trace_id, parent_id = current.trace_id, current.span_id
+            else:
+                trace_id, parent_id = get_correlation_id() or uuid.uuid4().hex, None
+        started = Span(self, name, trace_id, parent_id, attributes)
+        started._token = _current_span.set(started)
+        return started
+
+    def export(self, finished: Span) -> None:
+        record = finished.to_dict()
+        with self._lock:
+            self._spans.append(record)
+        if self.log is not None:
+            self.log.append(record)
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Finished spans in the buffer, oldest first"""
+        with self._lock:
+            spans = list(self._spans)
+        if trace_id is not None:
+            spans = [s for s in spans if s["trace_id"] == trace_id]
+        return spans
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+@contextmanager
+def span(name: str, parent: Optional[Dict[str, str]] = None, **attributes) -> Iterator[Span]:
+    """Run the block in a span, a child of the current one (or of parent, see Tracer.start_span)"""
+    started = get_tracer().start_span(name, parent, **attributes)
+    try:
+        yield started
+    except BaseException as exc:
+        started.record_error(exc)
+        raise
+    finally:
+        started.end()
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorator running each call of a function in a span (named after it by default)"""
+    def decorate(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def trace_context() -> Dict[str, str]:
+    """The current span as metadata to send along with work that reports back later"""
+    current = _current_span.get()
+    if current is None:
+        return {}
+    return {"trace_id": current.trace_id, "span_id": current.span_id}
+
+def propagate(fn: Callable) -> Callable:
+    """Bind fn to the current context, so a thread running it continues this trace"""
+    context = contextvars.copy_context()
+    return functools.partial(context.run, fn)
+
+
+def group_traces(spans: Iterable[Dict[str, Any]]) -> "OrderedDict[str, List[Dict[str, Any]]]":
+    """Spans by trace id, traces in order of their first span"""
+    traces: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+    for record in spans:
+        traces.setdefault(record["trace_id"], []).append(record)
+    return traces
+
+def recent_traces(spans: Iterable[Dict[str, Any]], limit: int = 20) -> List[Dict[str, Any]]:
+    """The last `limit` traces among spans, newest first, as {"trace_id", "duration_ms", "spans"}"""
+    traces = list(group_traces(spans).items())[-limit:] if limit > 0 else []
+    return [{"trace_id": trace_id,
+             "duration_ms": max((s.get("duration_ms") or 0) for s in trace_spans),
+             "spans": trace_spans}
+            for trace_id, trace_spans in reversed(traces)]
+
+def format_trace(spans: List[Dict[str, Any]]) -> Iterator[str]:
+    """Lines showing a trace as an indented tree of spans with their durations"""
+    ids = {record["span_id"] for record in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for record in spans:
+        # Spans whose parent isn't here (it is still running, or fell out of the buffer) are shown as roots
+        parent = record.get("parent_id") if record.get("parent_id") in ids else None
+        children.setdefault(parent, []).append(record)
+
+    def walk(parent: Optional[str], depth: int) -> Iterator[str]:
+        for record in sorted(children.get(parent, ()), key=lambda r: r["start"]):
+            duration = record.get("duration_ms")
+            line = f"{duration if duration is not None else 0:>10.1f}ms  {'  ' * depth}{record['name']}"
+            if record.get("attributes"):
+                line += "  " + " ".join(f"{k}={v}" for k, v in record["attributes"].items())
+            if record.get("error"):
+                line += f"  !! {record['error']}"
+            yield line
+            yield from walk(record["span_id"], depth + 1)
+
+    yield from walk(None, 0)
+
+def read_trace_file(path: str, limit: int = DEFAULT_BUFFER_SIZE) -> List[Dict[str, Any]]:
+    """The last `limit` spans written to a trace file (including its rotated segments)"""
+    return list(deque(JsonlLog(path).iter_records(), maxlen=limit))
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(int(os.environ.get(TRACE_BUFFER_ENV, DEFAULT_BUFFER_SIZE)),
+                                 os.environ.get(TRACE_FILE_ENV) or None)
+    return _tracer
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """Replace the process-wide tracer (None makes a fresh one on next use)"""
+    global _tracer
+    _tracer = tracer
@@ -0,0 +1,114 @@
+import math
+from typing import Dict, Optional
+
+
+class LogHistogram:
+    """
+    Mergeable streaming histogram with bounded relative error.
+
+    Values are counted in logarithmically sized buckets (the DDSketch
+    layout), so any quantile is accurate to within ``relative_accuracy`` of
+    the true value while memory grows only with the dynamic range of the
+    data, not with the number of samples. Two histograms with the same
+    accuracy can be merged by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Record a value"""
+        if value is None or count <= 0:
+            return
+        value = float(value)
+        if value <= 0:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + count
+
+        self.count += count
+        self.sum += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "LogHistogram") -> None:
+        """Fold another histogram into this one"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge histograms with different accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the value at quantile q (0 <= q <= 1)"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+
+        seen = self.zero_count
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                # Midpoint of the bucket, in the relative sense
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def summary(self) -> Dict:
+        """Count, sum, mean and common percentiles"""
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "mean": round(self.mean, 4) if self.count else None,
+            "min": self.min,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max
+        }
+
+    def to_dict(self) -> Dict:
+        """Convert to a JSON-serializable dictionary"""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": {str(k): v for k, v in self.bins.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LogHistogram":
+        """Rebuild a histogram saved with to_dict"""
+        histogram = cls(data.get("relative_accuracy", 0.01))
+        histogram.bins = {int(k): v for k, v in data.get("bins", {}).items()}
+        histogram.zero_count = data.get("zero_count", 0)
+        histogram.count = data.get("count", 0)
+        histogram.sum = data.get("sum", 0.0)
+        histogram.min = data.get("min")
+        histogram.max = data.get("max")
+        return histogram
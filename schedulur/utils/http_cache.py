@@ -0,0 +1,92 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from schedulur.metrics import get_registry, record_cache_lookup
+
+# Cache-Control for catalog data (providers, doctors): any cache may keep it briefly
+CATALOG_CACHE_CONTROL = "public, max-age=300"
+# For a user's own records: browsers keep them but must revalidate with the ETag
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+# For results computed from a user's data (best providers and the like)
+COMPUTED_CACHE_CONTROL = "private, max-age=60"
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag for a response built from parts (record ids and versions, query inputs)"""
+    return 'W/"%s"' % hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:20]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison, per RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Small LRU cache for computed responses, shared by all requests in the process
+
+    Keys should include every input plus the version of the data the result
+    was computed from, so a write never serves a stale entry; the TTL only
+    bounds how long unused results are kept.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300, name: str = "responses"):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                record_cache_lookup(self.name, False)
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            record_cache_lookup(self.name, True)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide cache for computed responses"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+        get_registry().gauge("schedulur_cache_entries", "Entries held by a cache", ["cache"]).set_function(
+            lambda: len(_response_cache), cache=_response_cache.name)
+    return _response_cache
@@ -0,0 +1,133 @@
+import base64
+import binascii
+import heapq
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Set
+
+from schedulur.storage import serialization
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Response header carrying the cursor for the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class Page(NamedTuple):
+    """One page of records and the cursor to continue after it (None on the last page)"""
+    items: Iterable[Any]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(position: Sequence) -> str:
+    """Opaque cursor for a keyset position (the sort key of the last record returned)"""
+    return base64.urlsafe_b64encode(serialization.dumps(list(position), pretty=False)).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Keyset position from a cursor
+
+    Raises:
+        ValueError: The cursor wasn't produced by encode_cursor
+    """
+    try:
+        position = serialization.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(position, list):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return tuple(position)
+
+
+def page_by(items: Iterable[Any], sort_key: Callable[[Any], tuple], limit: Optional[int],
+            cursor: Optional[str] = None) -> Page:
+    """
+    Keyset page of items ordered by sort_key
+
+    Only the records after the cursor are considered, and only the next
+    limit + 1 of those are kept (a bounded heap), so a page costs one scan
+    of the keys and no full sort. sort_key must be unique per item (end it
+    with the id) and made of JSON-encodable values.
+
+    Args:
+        items: Records to page through, in any order
+        sort_key: Position of a record in the listing
+        limit: Page size; None returns everything after the cursor
+        cursor: next_cursor of the previous page
+
+    Raises:
+        ValueError: The cursor isn't a position in this listing
+    """
+    after = decode_cursor(cursor) if cursor else None
+
+    def is_after(key: tuple) -> bool:
+        try:
+            return key > after
+        except TypeError:
+            # A well-formed cursor from another listing, or a crafted one (e.g. a string for a timestamp)
+            raise ValueError(f"Invalid cursor: {cursor!r}") from None
+
+    candidates = (item for item in items if after is None or is_after(sort_key(item)))
+    if limit is None:
+        return Page(sorted(candidates, key=sort_key), None)
+    chosen = heapq.nsmallest(limit + 1, candidates, key=sort_key)
+    next_cursor = encode_cursor(sort_key(chosen[limit - 1])) if len(chosen) > limit else None
+    return Page(chosen[:limit], next_cursor)
+
+
+def page_by_key(models: Mapping[str, Any], limit: Optional[int], cursor: Optional[str] = None) -> Page:
+    """
+    Keyset page of a store ordered by id
+
+    Pages are picked from the keys alone, so lazily loaded stores only
+    build the models on the page. With no limit the models are yielded
+    one at a time, for streaming exports.
+    """
+    keys = page_by(models.keys(), lambda key: (key,), limit, cursor)
+    if limit is None:
+        return Page((models[key] for key in keys.items), None)
+    return Page([models[key] for key in keys.items], keys.next_cursor)
+
+
+def page_after(items: List[Any], limit: int, cursor: Optional[str] = None,
+               key: Callable[[Any], str] = lambda item: item.id) -> Page:
+    """
+    Page of an already ranked list (e.g. search results), continuing after
+    the record the cursor names
+
+    If that record has dropped out of the results, paging restarts from
+    the top.
+    """
+    start = 0
+    if cursor:
+        last = decode_cursor(cursor)
+        start = next((i + 1 for i, item in enumerate(items) if (key(item),) == last), 0)
+    chosen = items[start:start + limit]
+    next_cursor = encode_cursor((key(chosen[-1]),)) if start + limit < len(items) else None
+    return Page(chosen, next_cursor)
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[Set[str]]:
+    """
+    Field names from a comma-separated fields= parameter (None means all)
+
+    The id is always included.
+
+    Raises:
+        ValueError: A field isn't one of allowed
+    """
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested | {"id"}
+
+
+def ndjson_lines(records: Iterable[Dict]) -> Iterator[bytes]:
+    """Encode records as newline-delimited JSON, one line at a time"""
+    for record in records:
+        yield serialization.dumps(record, pretty=False) + b"\n"
@@ -1,65 +1,170 @@
 from schedulur.models.user import User
 from schedulur.models.provider import Provider
-from schedulur.services.appointment_service import AppointmentService
-from typing import List, Dict
-from datetime import datetime, timedelta
+from schedulur.models.slot import Slot
+from typing import List, Dict, Optional, Tuple
+from datetime import datetime, time, timedelta
+
+from schedulur.metrics import get_registry
+from schedulur.tracing import traced
+
+SLOT_ENGINE_SECONDS = get_registry().histogram(
+    "schedulur_slot_engine_seconds", "Slot engine run time, by operation", ["operation"])
+
+def _minutes(value) -> int:
+    """Minutes after midnight for a time or an "HH:MM" string"""
+    if isinstance(value, str):
+        hour, minute = map(int, value.split(":")[:2])
+        return hour * 60 + minute
+    return value.hour * 60 + value.minute
+
+def _clock(value) -> time:
+    """Time of day for a time or an "HH:MM" string"""
+    return time(*divmod(_minutes(value), 60))
 
 class SchedulingOptimizer:
     @staticmethod
+    @SLOT_ENGINE_SECONDS.timed(operation="provider_slots")
+    def provider_slots(provider: Provider,
+                       start_date: datetime,
+                       days: int = 1,
+                       duration_minutes: Optional[int] = None,
+                       busy: Optional[List[Tuple[int, int]]] = None) -> List[Slot]:
+        """Open slots within a provider's weekly hours, skipping busy (epoch start, end) ranges."""
+        duration = timedelta(minutes=duration_minutes or provider.appointment_duration)
+        if busy is None:
+            busy = SchedulingOptimizer._booked_ranges(provider.id)
+
+        slots = []
+        day = datetime(start_date.year, start_date.month, start_date.day)
+        for _ in range(days):
+            for window in provider.available_times:
+                if window.get('day') != day.weekday():
+                    continue
+                # Wall-clock times, so slots keep their hours on days the clocks change
+                slot_start = datetime.combine(day.date(), _clock(window['start_time']))
+                window_end = datetime.combine(day.date(), _clock(window['end_time']))
+                while slot_start + duration <= window_end:
+                    slot = Slot.from_datetimes(slot_start, slot_start + duration)
+                    if not any(slot.overlaps(busy_start, busy_end) for busy_start, busy_end in busy):
+                        slots.append(slot)
+                    slot_start += duration
+            day += timedelta(days=1)
+        return slots
+
+    @staticmethod
+    def _booked_ranges(provider_id: str) -> List[Tuple[int, int]]:
+        """Epoch ranges of a provider's active appointments"""
+        from schedulur.container import get_container
+
+        return SchedulingOptimizer._active_ranges(
+            get_container().appointment_service.get_provider_appointments(provider_id))
+
+    @staticmethod
+    def _booked_ranges_by_provider() -> Dict[str, List[Tuple[int, int]]]:
+        """Epoch ranges of every provider's active appointments, reading the appointments once"""
+        from schedulur.container import get_container
+
+        return {
+            provider_id: SchedulingOptimizer._active_ranges(appointments)
+            for provider_id, appointments in get_container().appointment_service.get_appointments_by_provider().items()
+        }
+
+    @staticmethod
+    def _active_ranges(appointments) -> List[Tuple[int, int]]:
+        from schedulur.models.appointment import AppointmentStatus
+
+        return [
+            (int(a.start_time.timestamp()), int(a.end_time.timestamp()))
+            for a in appointments
+            if a.status != AppointmentStatus.CANCELLED
+        ]
+
+    @staticmethod
+    def _user_windows(user: User) -> Optional[Dict[int, Optional[List[Tuple[int, int]]]]]:
+        """
+        The user's availability parsed once for checking many slots
+
+        Returns:
+            None when the user is free any time, else per weekday None (not
+            available), [] (any time that day) or (start, end) minute ranges
+        """
+        availability = user.availability
+        if not availability or not (availability.days or availability.time_slots):
+            return None
+        return {
+            weekday: None if availability.days and weekday not in availability.days else [
+                (_minutes(w.get('start', '00:00')), _minutes(w.get('end', '23:59')))
+                for w in availability.time_slots if w.get('day') == weekday
+            ]
+            for weekday in range(7)
+        }
+
+    @staticmethod
+    def _fits_windows(slot: Slot, windows: Optional[Dict[int, Optional[List[Tuple[int, int]]]]]) -> bool:
+        """Check a slot against _user_windows()"""
+        if windows is None:
+            return True
+        start, end = slot.start_time, slot.end_time
+        day = windows[start.weekday()]
+        if day is None:
+            return False
+        if not day:
+            return True
+        start_minutes = start.hour * 60 + start.minute
+        end_minutes = end.hour * 60 + end.minute
+        return any(window_start <= start_minutes and end_minutes <= window_end for window_start, window_end in day)
+
+    @staticmethod
+    @SLOT_ENGINE_SECONDS.timed(operation="check_user_slots")
+    def check_user_slots(user: User, slots: List[Slot], busy: List[Tuple[int, int]]) -> List[Optional[str]]:
+        """Why each slot doesn't work for the user (None when it does), against their availability and busy ranges"""
+        results = []
+        windows = SchedulingOptimizer._user_windows(user)
+        for slot in slots:
+            if slot.end <= slot.start:
+                results.append("Slot ends before it starts")
+            elif not SchedulingOptimizer._fits_windows(slot, windows):
+                results.append("Outside the user's availability")
+            elif any(slot.overlaps(busy_start, busy_end) for busy_start, busy_end in busy):
+                results.append("Conflicts with an existing appointment")
+            else:
+                results.append(None)
+        return results
+
+    @staticmethod
+    @traced("scheduling.find_best_providers")
+    @SLOT_ENGINE_SECONDS.timed(operation="find_best_providers")
     def find_best_providers(user: User, specialization: str = None, max_results: int = 5) -> List[Dict]:
         """Find the best providers based on insurance coverage and availability matching user's schedule."""
         from schedulur.services.provider_service import ProviderService
-        
+
         # Get all providers or filter by specialization
         if specialization:
             providers = ProviderService.filter_providers_by_specialization(specialization)
         else:
             providers = ProviderService.list_providers()
-        
+
         # Filter by insurance if user has insurance
         if user.insurance_provider:
             providers = [p for p in providers if user.insurance_provider in p.accepted_insurance]
-        
+
         # No matching providers
         if not providers:
             return []
-        
+
         results = []
-        
+        # One pass over the appointments for all providers, not one per provider
+        booked = SchedulingOptimizer._booked_ranges_by_provider()
+        windows = SchedulingOptimizer._user_windows(user)
+
         for provider in providers:
-            # Check for overlapping availability days
-            common_days = set(user.available_days).intersection(set(provider.available_days))
-            if not common_days:
-                continue
-            
-            # Find all available appointment slots for the next 30 days
-            available_slots = []
-            current_date = datetime.now()
-            end_date = current_date + timedelta(days=30)
-            
-            while current_date <= end_date:
-                # Only check on days that both user and provider are available
-                if current_date.weekday() in common_days:
-                    # Get provider's available slots for this day
-                    day_slots = AppointmentService.find_available_slots(
-                        provider.id, 
-                        current_date,
-                        provider.appointment_duration
-                    )
-                    
-                    # Filter slots based on user's available times
-                    for slot in day_slots:
-                        slot_start_time = slot['start_time'].time()
-                        slot_end_time = slot['end_time'].time()
-                        
-                        # Check if slot is within user's available times
-                        for user_time in user.available_times:
-                            if slot_start_time >= user_time['start_time'] and slot_end_time <= user_time['end_time']:
-                                available_slots.append(slot)
-                                break
-                
-                current_date += timedelta(days=1)
-            
+            # Find all available appointment slots for the next 30 days that fit the user's schedule
+            available_slots = [
+                slot for slot in SchedulingOptimizer.provider_slots(provider, datetime.now(), days=30,
+                                                                    busy=booked.get(provider.id, []))
+                if SchedulingOptimizer._fits_windows(slot, windows)
+            ]
+
             # Add provider to results if there are available slots
             if available_slots:
                 results.append({
@@ -67,21 +172,23 @@ class SchedulingOptimizer:
                     'available_slots': available_slots[:3],  # Just include first 3 slots as preview
                     'total_available_slots': len(available_slots)
                 })
-        
+
         # Sort by number of available slots (most flexible providers first)
         results.sort(key=lambda x: x['total_available_slots'], reverse=True)
-        
+
         return results[:max_results]
-    
+
     @staticmethod
+    @traced("scheduling.recommend_appointment_sequence")
+    @SLOT_ENGINE_SECONDS.timed(operation="recommend_appointment_sequence")
     def recommend_appointment_sequence(user: User, required_specializations: List[str]) -> Dict:
         """Recommend a sequence of appointments across multiple specializations."""
         appointment_plan = []
-        
+
         for specialization in required_specializations:
             # Find best providers for this specialization
             providers = SchedulingOptimizer.find_best_providers(user, specialization, max_results=3)
-            
+
             if not providers:
                 appointment_plan.append({
                     'specialization': specialization,
@@ -89,14 +196,14 @@ class SchedulingOptimizer:
                     'providers': []
                 })
                 continue
-            
+
             appointment_plan.append({
                 'specialization': specialization,
                 'status': 'providers_found',
                 'providers': providers
             })
-        
+
         return {
             'user': user,
             'appointment_plan': appointment_plan
-        }
\ No newline at end of file
+        }
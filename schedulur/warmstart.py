@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+
+"""
+Warm-start snapshot for scale-to-zero deployments
+
+Build once at deploy time, after the data files are in place:
+
+    python -m schedulur.warmstart
+
+This loads every store the way the app would (migrating legacy files and
+generating the mock doctor directory and transcript index on the way) and
+writes the user and doctor records into one memory-mapped
+snapshot file. With SCHEDULUR_WARMSTART=1 the services open their section
+of that file instead of parsing JSON on boot, so the first request only
+decodes the records it touches. Anything written after boot goes to the
+stores' own files, which win over the warm-start file from then on.
+"""
+
+import logging
+import os
+import threading
+from typing import Optional, Type
+
+from pydantic import BaseModel
+
+from schedulur.storage.records import SCHEMA_VERSION, newer_than
+from schedulur.storage.snapshot import LazyModels, Snapshot, lazy_models, write_sections
+from schedulur.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+WARMSTART_ENV = "SCHEDULUR_WARMSTART"
+WARMSTART_FILE_ENV = "SCHEDULUR_WARMSTART_FILE"
+
+# Section name in the warm-start file (the store's JSON file name) and
+# where its models live in the container. Per-user shards (appointments,
+# approvals) are small and loaded on demand, so they are not included.
+STORES = {
+    "users": ("user_service", "users"),
+    "doctors": ("doctor_service", "doctors"),
+}
+
+_snapshot: Optional[Snapshot] = None
+_snapshot_mtime: Optional[float] = None
+_snapshot_lock = threading.Lock()
+
+
+def warmstart_enabled() -> bool:
+    return os.environ.get(WARMSTART_ENV, "").lower() in ("1", "true", "yes")
+
+
+def warmstart_path() -> str:
+    return os.environ.get(WARMSTART_FILE_ENV) or os.path.join(os.path.dirname(__file__), "data", "warmstart.snap")
+
+
+def store_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _open_warmstart(path: str) -> Snapshot:
+    """The process-wide mapping of the warm-start file"""
+    global _snapshot, _snapshot_mtime
+    with _snapshot_lock:
+        mtime = os.path.getmtime(path)
+        if _snapshot is None or _snapshot.path != path or _snapshot_mtime != mtime:
+            _snapshot, _snapshot_mtime = Snapshot(path), mtime
+        return _snapshot
+
+
+def open_store(path: str, model_cls: Type[BaseModel]) -> Optional[LazyModels]:
+    """
+    Open a store's section of the warm-start file
+
+    Args:
+        path: The store's JSON file
+        model_cls: Model the records are built as
+
+    Returns:
+        LazyModels, or None when warm start is off, the file is missing or
+        unreadable, or the store's JSON file was written after it
+    """
+    if not warmstart_enabled():
+        return None
+    file = warmstart_path()
+    if not os.path.exists(file) or newer_than(path, file):
+        return None
+
+    try:
+        section = _open_warmstart(file).section(store_name(path))
+    except (OSError, ValueError):
+        logger.exception("Error opening warm-start snapshot %s", file)
+        return None
+    if section is None:
+        return None
+    return lazy_models(section, model_cls, SCHEMA_VERSION)
+
+
+def build(container=None, path: Optional[str] = None) -> int:
+    """
+    Write the warm-start file from the current stores
+
+    Args:
+        container: Services to read from (the process-wide container by default)
+        path: Output file (warmstart_path() by default)
+
+    Returns:
+        Number of records written
+    """
+    from schedulur.container import get_container
+    from schedulur.models.user import User
+    from schedulur.services.doctor_service import DoctorService
+
+    container = container or get_container()
+    dumps = {"users": User.model_dump, "doctors": DoctorService.doctor_record}
+
+    # Catalogs that live in their own files are materialized now rather
+    # than on the first request
+    container.doctor_search_service
+    container.transcript_index.count()
+
+    sections = {}
+    for name, (service_name, attribute) in STORES.items():
+        models = getattr(getattr(container, service_name), attribute)
+        sections[name] = [(key, dumps[name](model)) for key, model in models.items()]
+
+    write_sections(path or warmstart_path(), sections, SCHEMA_VERSION)
+    return sum(len(records) for records in sections.values())
+
+
+@traced("warmstart.warm_up")
+def warm_up(container=None) -> None:
+    """Build the remaining services and the Retell client ahead of the requests that need them"""
+    from schedulur.container import get_container
+
+    container = container or get_container()
+    try:
+        for name in ("user_service", "doctor_service", "office_knowledge", "call_analytics",
+                     "doctor_search_service", "appointment_service"):
+            getattr(container, name)
+        if os.environ.get("RETELL_API_KEY"):
+            from schedulur.integrations.retell import get_retell_client
+            get_retell_client()
+    except Exception:
+        logger.exception("Error warming up services")
+
+
+def main():
+    path = warmstart_path()
+    count = build(path=path)
+    print(f"Wrote {count} records to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,160 @@
+import logging
 import os
-import uuid
+import threading
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, session, jsonify, g
+from flask.json.provider import JSONProvider
 from schedulur.models.user import User
 from schedulur.models.doctor import Doctor
-from schedulur.services.user_service import UserService
-from schedulur.services.doctor_service import DoctorService
-from schedulur.services.doctor_search_service import DoctorSearchService
-from schedulur.services.appointment_service import AppointmentService
-from schedulur.integrations.retell import call_doctor, receive_webhook
+from schedulur.container import get_container
+from schedulur.integrations.retell import (SIGNATURE_HEADER, WEBHOOK_EVENTS, call_doctor, receive_webhook,
+                                          verify_webhook)
+from schedulur import warmstart
+from schedulur.cluster import NODE_HEADER, get_cluster, user_id_for_email
+from schedulur.events import SSE_MEDIA_TYPE, parse_last_event_id, sse_stream
+from schedulur.logs import (REQUEST_ID_HEADER, configure_logging, get_correlation_id, new_correlation_id,
+                            reset_correlation_id, set_correlation_id)
+from schedulur.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, get_registry
+from schedulur.profiling import DEFAULT_INTERVAL, admin_token_matches, sample_process
+from schedulur.storage import serialization
+from schedulur.storage.records import ConflictError
+from schedulur.tracing import get_tracer, propagate, recent_traces, span
+from schedulur.utils.http_cache import PRIVATE_CACHE_CONTROL, etag_matches, make_etag
+from schedulur.utils.pagination import page_after
+
+logger = logging.getLogger(__name__)
+
+# Records per page on the search and appointments pages
+PAGE_SIZE = 20
+
+# Endpoints describing this node, served by it whoever is logged in
+NODE_LOCAL_ENDPOINTS = {'metrics', 'traces', 'admin_profile'}
+# Node-local and long-lived endpoints, left out of the traces
+UNTRACED_ENDPOINTS = NODE_LOCAL_ENDPOINTS | {'appointment_stream', 'static'}
+
+
+class SchedulurJSONProvider(JSONProvider):
+    """Encode jsonify responses (and the session cookie) with schedulur's serializer"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return serialization.dumps(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return serialization.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(serialization.dumps(obj), mimetype="application/json")
 
 # Create Flask app
+configure_logging()
+
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-key-for-schedulur')
 app.config['TEMPLATES_AUTO_RELOAD'] = True
+app.json = SchedulurJSONProvider(app)
+
+# Shared services (one instance of each store per process). They are built
+# on first use rather than at import, so a cold start only pays for the
+# stores the first request touches; the rest are built after it is served.
+container = get_container()
+_warm_up_started = False
+
+# Event streams held open at once by this process. Each holds a worker thread
+# for as long as its page is open, so keep this below the thread count
+# (see the Procfile); further pages get no live updates.
+MAX_STREAMS = int(os.environ.get('SCHEDULUR_MAX_STREAMS', '16'))
+
+WEBHOOK_SECONDS = get_registry().histogram(
+    "schedulur_webhook_seconds", "Time to process a Retell webhook, by event", ["event"])
+
+@app.after_request
+def warm_up_after_first_response(response):
+    """Build the remaining services once the first response has gone out"""
+    global _warm_up_started
+    if not _warm_up_started:
+        _warm_up_started = True
+        # The warm-up is traced as part of the request that started it
+        warm_up = propagate(warmstart.warm_up)
+        response.call_on_close(
+            lambda: threading.Thread(target=warm_up, args=(container,), daemon=True).start())
+    return response
+
+@app.before_request
+def assign_correlation_id():
+    """Tag this request's log lines with the caller's request id, or a new one"""
+    g.correlation_token = set_correlation_id(request.headers.get(REQUEST_ID_HEADER) or new_correlation_id())
+
+@app.after_request
+def add_request_id_header(response):
+    response.headers.setdefault(REQUEST_ID_HEADER, get_correlation_id())
+    return response
 
-# Initialize services
-user_service = UserService()
-doctor_service = DoctorService()
-doctor_search_service = DoctorSearchService()
-appointment_service = AppointmentService()
+@app.teardown_request
+def clear_correlation_id(exc=None):
+    # Worker threads are reused; don't let this id tag the next request's lines
+    token = g.pop('correlation_token', None)
+    if token is not None:
+        reset_correlation_id(token)
+
+@app.before_request
+def start_request_span():
+    """Time the request in a span (its trace id is the request id) that service calls nest under"""
+    if request.endpoint not in UNTRACED_ENDPOINTS:
+        g.request_span = get_tracer().start_span(f"{request.method} {request.endpoint or 'unknown'}",
+                                                 path=request.path)
+
+@app.after_request
+def record_response_status(response):
+    if 'request_span' in g:
+        g.request_span.set_attribute('status', response.status_code)
+    return response
+
+@app.teardown_request
+def end_request_span(exc=None):
+    request_span = g.pop('request_span', None)
+    if request_span is not None:
+        if exc is not None:
+            request_span.record_error(exc)
+        request_span.end()
+
+@app.before_request
+def route_to_owner():
+    """Send requests for users this node doesn't own to the node that does"""
+    cluster = get_cluster()
+    if (cluster is None or cluster.is_forwarded(request.headers.get(NODE_HEADER))
+            or request.endpoint in NODE_LOCAL_ENDPOINTS):
+        return None
+
+    user_id = session.get('user_id')
+    if not user_id and request.endpoint == 'login' and request.method == 'POST':
+        user_id = user_id_for_email(request.form.get('email', ''))
+    if not user_id or cluster.is_local(user_id):
+        return None
+
+    owner = cluster.owner(user_id)
+    instance = cluster.fly_instance(owner)
+    if instance:
+        # Fly's proxy replays the whole request on the owning machine
+        return Response(status=307, headers={'fly-replay': f'instance={instance}'})
+    # Event streams are relayed as they arrive rather than read to the end
+    status, headers, body = cluster.forward(owner, request.method, request.full_path, request.headers.items(),
+                                            request.get_data(), stream=request.endpoint == 'appointment_stream')
+    return Response(body, status=status, headers=headers)
+
+@app.after_request
+def add_node_header(response):
+    """Name the node that served the response when running as a cluster"""
+    cluster = get_cluster()
+    if cluster is not None and NODE_HEADER not in response.headers:
+        response.headers[NODE_HEADER] = cluster.local
+    return response
+
+@app.errorhandler(ConflictError)
+def handle_conflict(e):
+    """Someone else saved the record first; send the user back to try again"""
+    flash("That record was just changed elsewhere. Please review it and try again.", "warning")
+    return redirect(request.referrer or url_for('index'))
 
 # Ensure data directory exists
 os.makedirs(os.path.join(os.path.dirname(__file__), "data"), exist_ok=True)
@@ -32,7 +167,7 @@ def index():
     user_id = session.get('user_id')
     user = None
     if user_id:
-        user = user_service.get_user(user_id)
+        user = container.user_service.get_user(user_id)
     
     return render_template('index.html', user=user)
 
@@ -44,7 +179,7 @@ def login():
         email = request.form['email']
         
         # Look for existing user by email
-        users = user_service.list_users()
+        users = container.user_service.list_users()
         existing_user = next((u for u in users if u.email == email), None)
         
         if form_type == 'login':
@@ -70,14 +205,15 @@ def login():
                 # Create new user
                 name = request.form['name']
                 user = User(
-                    id=str(uuid.uuid4()),
+                    # Derived from the email so login can find the owning node
+                    id=user_id_for_email(email),
                     name=name,
                     email=email,
                     phone=request.form.get('phone', ''),
                     zip_code=request.form.get('zip_code', ''),
                     insurance_provider=request.form.get('insurance', '')
                 )
-                user = user_service.create_user(user)
+                user = container.user_service.create_user(user)
                 flash(f"Account created successfully for {user.name}!", "success")
                 session['user_id'] = user.id
                 return redirect(url_for('profile'))
@@ -104,18 +240,23 @@ def profile():
         flash("Please log in first.", "warning")
         return redirect(url_for('login'))
     
-    user = user_service.get_user(user_id)
+    user = container.user_service.get_user(user_id)
     
     if request.method == 'POST':
         # Update user profile
         user.name = request.form['name']
-        user.email = request.form['email']
+        email = request.form['email']
+        if email != user.email and get_cluster() is not None:
+            # Login finds the owning node from the email, so a new one would route to a node without the record
+            flash("Your email can't be changed at the moment; the rest of your profile was saved.", "warning")
+        else:
+            user.email = email
         user.phone = request.form['phone']
         user.zip_code = request.form['zip_code']
         user.insurance_provider = request.form['insurance']
         
         # Update user
-        user = user_service.update_user(user_id, user)
+        user = container.user_service.update_user(user_id, user)
         flash("Profile updated successfully!", "success")
     
     return render_template('profile.html', user=user)
@@ -130,8 +271,9 @@ def search():
         flash("Please log in first.", "warning")
         return redirect(url_for('login'))
     
-    user = user_service.get_user(user_id)
+    user = container.user_service.get_user(user_id)
     doctors = []
+    next_cursor = None
     
     if request.method == 'POST':
         search_type = request.form['search_type']
@@ -142,7 +284,7 @@ def search():
             insurance = request.form.get('insurance') or user.insurance_provider
             zip_code = request.form.get('zip_code') or user.zip_code
             distance = int(request.form.get('distance', 25))
-            doctors = doctor_search_service.search_doctors(
+            doctors = container.doctor_search_service.search_doctors(
                 specialization=specialization,
                 insurance=insurance,
                 zip_code=zip_code,
@@ -152,19 +294,27 @@ def search():
         elif search_type == 'query':
             # Search by natural language query
             query = request.form['query']
-            doctors = doctor_search_service.search_with_claude(query)
+            doctors = container.doctor_search_service.search_with_claude(query)
             
+        # Only the page being shown is saved and annotated
+        try:
+            doctors, next_cursor = page_after(doctors, PAGE_SIZE, request.form.get('cursor'))
+        except ValueError:
+            doctors, next_cursor = page_after(doctors, PAGE_SIZE)
+        
         # Save doctors to database so they can be approved/rejected
         for doctor in doctors:
-            existing_doctor = doctor_service.get_doctor(doctor.id)
+            existing_doctor = container.doctor_service.get_doctor(doctor.id)
             if existing_doctor:
-                # Keep any existing approval status
-                doctor.user_approval = existing_doctor.user_approval
-                doctor_service.update_doctor(doctor.id, doctor)
+                updated = doctor.to_doctor()
+                updated.version = existing_doctor.version
+                container.doctor_service.update_doctor(doctor.id, updated)
             else:
-                doctor_service.create_doctor(doctor)
+                container.doctor_service.create_doctor(doctor.to_doctor())
+        # Show this user's own approve/reject decisions
+        container.approval_service.annotate(user_id, doctors)
     
-    return render_template('search.html', user=user, doctors=doctors)
+    return render_template('search.html', user=user, doctors=doctors, next_cursor=next_cursor)
 
 @app.route('/doctor/approve/<doctor_id>')
 def approve_doctor(doctor_id):
@@ -175,10 +325,10 @@ def approve_doctor(doctor_id):
         flash("Please log in first.", "warning")
         return redirect(url_for('login'))
     
-    success = appointment_service.approve_doctor_for_scheduling(doctor_id, True)
+    success = container.appointment_service.approve_doctor_for_scheduling(doctor_id, True, user_id)
     
     if success:
-        doctor = doctor_service.get_doctor(doctor_id)
+        doctor = container.doctor_service.get_doctor(doctor_id)
         flash(f"You approved {doctor.name} for scheduling.", "success")
         return redirect(url_for('approved_doctors'))
     else:
@@ -194,10 +344,10 @@ def reject_doctor(doctor_id):
         flash("Please log in first.", "warning")
         return redirect(url_for('login'))
     
-    success = appointment_service.approve_doctor_for_scheduling(doctor_id, False)
+    success = container.appointment_service.approve_doctor_for_scheduling(doctor_id, False, user_id)
     
     if success:
-        doctor = doctor_service.get_doctor(doctor_id)
+        doctor = container.doctor_service.get_doctor(doctor_id)
         flash(f"You rejected {doctor.name} for scheduling.", "warning")
     else:
         flash("Doctor not found.", "danger")
@@ -213,8 +363,8 @@ def approved_doctors():
         flash("Please log in first.", "warning")
         return redirect(url_for('login'))
     
-    user = user_service.get_user(user_id)
-    doctors = doctor_service.get_approved_doctors()
+    user = container.user_service.get_user(user_id)
+    doctors = container.approval_service.get_approved_doctors(user_id)
     
     return render_template('approved_doctors.html', user=user, doctors=doctors)
 
@@ -227,7 +377,7 @@ def schedule():
         flash("Please log in first.", "warning")
         return redirect(url_for('login'))
     
-    user = user_service.get_user(user_id)
+    user = container.user_service.get_user(user_id)
     appointment = None
     call_details = None
     
@@ -262,27 +412,32 @@ def schedule():
         
         # Update user with scheduling preferences
         user.scheduling_preferences = scheduling_preferences
-        user = user_service.update_user(user_id, user)
+        user = container.user_service.update_user(user_id, user)
         
         # Get approved doctors
-        approved_doctors = doctor_service.get_approved_doctors()
+        approved_doctors = container.approval_service.get_approved_doctors(user_id)
         
         if not approved_doctors:
             flash("No approved doctors found. Please approve some doctors first.", "warning")
             return redirect(url_for('search'))
         
-        # Try to schedule with first approved doctor
-        doctor = approved_doctors[0]
+        # Try approved doctors in order, skipping offices known to turn this patient away
+        for doctor in approved_doctors:
+            appointment, call_details = container.appointment_service.schedule_with_doctor(
+                doctor=doctor,
+                user=user,
+                reason=reason,
+                scheduling_preferences=scheduling_preferences
+            )
+            if not call_details.get('skipped'):
+                break
+            flash(call_details['error'], "info")
         
-        flash(f"Calling {doctor.name} at +1-847-814-3999 to schedule your appointment...", "info")
+        if call_details.get('skipped'):
+            flash("Every approved doctor is known to be unable to see you. Please approve other doctors.", "warning")
+            return redirect(url_for('search'))
         
-        # Schedule appointment
-        appointment, call_details = appointment_service.schedule_with_doctor(
-            doctor=doctor,
-            user=user,
-            reason=reason,
-            scheduling_preferences=scheduling_preferences
-        )
+        flash(f"Calling {doctor.name} at +1-847-814-3999 to schedule your appointment...", "info")
         
         if appointment:
             flash(f"Success! We called {doctor.name} at +1-847-814-3999 and your appointment has been scheduled.", "success")
@@ -290,7 +445,7 @@ def schedule():
         else:
             flash(f"Failed to schedule appointment with {doctor.name}", "danger")
     
-    return render_template('schedule.html', user=user, appointment=appointment, call_details=call_details, doctor_service=doctor_service)
+    return render_template('schedule.html', user=user, appointment=appointment, call_details=call_details, doctor_service=container.doctor_service)
 
 @app.route('/appointments')
 def appointments():
@@ -301,21 +456,26 @@ def appointments():
         flash("Please log in first.", "warning")
         return redirect(url_for('login'))
     
-    user = user_service.get_user(user_id)
+    user = container.user_service.get_user(user_id)
     
-    # Get user appointments
-    user_appointments = appointment_service.get_user_appointments(user_id)
+    # Get one page of the user's appointments
+    try:
+        user_appointments, next_cursor = container.appointment_service.page_appointments(
+            PAGE_SIZE, request.args.get('cursor'), user_id=user_id)
+    except ValueError:
+        user_appointments, next_cursor = container.appointment_service.page_appointments(PAGE_SIZE, user_id=user_id)
     
     # Get doctor information for each appointment
     appointments_with_doctors = []
     for appointment in user_appointments:
-        doctor = doctor_service.get_doctor(appointment.doctor_id)
+        doctor = container.doctor_service.get_doctor(appointment.doctor_id)
         appointments_with_doctors.append({
             'appointment': appointment,
             'doctor': doctor
         })
     
-    return render_template('appointments.html', user=user, appointments=appointments_with_doctors)
+    return render_template('appointments.html', user=user, appointments=appointments_with_doctors,
+                           next_cursor=next_cursor)
 
 @app.route('/appointment/<appointment_id>')
 def view_appointment(appointment_id):
@@ -326,18 +486,30 @@ def view_appointment(appointment_id):
         flash("Please log in first.", "warning")
         return redirect(url_for('login'))
     
-    user = user_service.get_user(user_id)
+    user = container.user_service.get_user(user_id)
     
     # Get appointment
-    appointment = appointment_service.get_appointment(appointment_id)
+    appointment = container.appointment_service.get_appointment(appointment_id, user_id)
     if not appointment:
         flash("Appointment not found.", "danger")
         return redirect(url_for('appointments'))
     
     # Get doctor
-    doctor = doctor_service.get_doctor(appointment.doctor_id)
+    doctor = container.doctor_service.get_doctor(appointment.doctor_id)
     
-    return render_template('appointment_detail.html', user=user, appointment=appointment, doctor=doctor)
+    # The page only changes with these records, so a revisit can skip rendering
+    # (unless a flashed message is waiting to be shown)
+    etag = make_etag("appointment", appointment.id, appointment.version, doctor and doctor.version,
+                     user and user.version)
+    if etag_matches(request.headers.get('If-None-Match'), etag) and '_flashes' not in session:
+        response = Response(status=304)
+    else:
+        response = app.make_response(render_template('appointment_detail.html', user=user,
+                                                      appointment=appointment, doctor=doctor))
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = PRIVATE_CACHE_CONTROL
+    response.vary.add('Cookie')
+    return response
 
 @app.route('/appointment/cancel/<appointment_id>')
 def cancel_appointment(appointment_id):
@@ -349,7 +521,7 @@ def cancel_appointment(appointment_id):
         return redirect(url_for('login'))
     
     # Cancel appointment
-    success = appointment_service.cancel_appointment(appointment_id)
+    success = container.appointment_service.cancel_appointment(appointment_id, user_id)
     
     if success:
         flash("Appointment cancelled successfully.", "success")
@@ -364,11 +536,141 @@ def retell_webhook():
     post_data = request.get_json()
     if not post_data:
         return jsonify({"error": "Invalid data"}), 400
-    # print("Received webhook data:", post_data)
+    # With an API key configured only Retell's signed webhooks are taken; without one
+    # (local runs, no real calls) they are processed but can't reach users' pages
+    signed = verify_webhook(post_data, request.headers.get(SIGNATURE_HEADER))
+    if not signed and os.environ.get('RETELL_API_KEY'):
+        return jsonify({"error": "Invalid signature"}), 401
+    call = post_data.get('call') or {}
+    # The event comes from the request body; a fixed set of labels keeps the metric's series bounded
+    event_label = post_data.get('event') if post_data.get('event') in WEBHOOK_EVENTS else 'other'
+    logger.debug("Received %s webhook", post_data.get('event'), extra={"call_id": call.get('call_id')})
 
-    receive_webhook(post_data)
+    # Calls placed while scheduling carry their trace in the metadata; the webhook continues it
+    with span("retell.webhook", parent=call.get('metadata'), event=post_data.get('event'),
+              call_id=call.get('call_id')), WEBHOOK_SECONDS.time(event=event_label):
+        custom_data = receive_webhook(post_data)
+        
+        # Remember what the office told us so we don't call it again for nothing
+        if custom_data is not None:
+            container.office_knowledge.record_webhook_call(post_data['call'])
+            container.call_analytics.record_webhook_call(post_data['call'])
+        
+        # Update the user's open pages (the user id comes from the body, so only when Retell signed it)
+        if signed and post_data.get('call'):
+            container.appointment_service.publish_call_result(post_data['call'], custom_data)
 
     return jsonify({"status": "success"}), 200
 
+@app.route('/metrics')
+def metrics():
+    """Counters, gauges and timings in the Prometheus text format"""
+    return Response(get_registry().render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/api/traces')
+def traces():
+    """Recent traces from this node's span buffer, newest first (admin token required)"""
+    # Spans carry user and doctor IDs from every request, not just the caller's
+    if not admin_token_matches(request.headers.get('Authorization')):
+        return jsonify({"error": "Forbidden"}), 403
+    try:
+        limit = max(0, min(int(request.args.get('limit', 20)), 200))
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    spans = get_tracer().spans(request.args.get('trace_id'))
+    return jsonify({"traces": recent_traces(spans, limit)})
+
+@app.route('/admin/profile')
+def admin_profile():
+    """Sample this worker's stacks for a few seconds (admin token required)"""
+    if not admin_token_matches(request.headers.get('Authorization')):
+        return jsonify({"error": "Forbidden"}), 403
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval = float(request.args.get('interval', DEFAULT_INTERVAL))
+    except ValueError:
+        return jsonify({"error": "Invalid seconds or interval"}), 400
+    
+    profile = sample_process(seconds, interval)
+    if profile is None:
+        return jsonify({"error": "A profile is already running"}), 409
+    if request.args.get('format') == 'json':
+        return jsonify({"seconds": profile.seconds, "samples": profile.samples, "interval": profile.interval,
+                        "top": profile.top_functions(), "collapsed": profile.collapsed()})
+    return Response(profile.collapsed(), mimetype='text/plain',
+                    headers={'Content-Disposition': 'attachment; filename=profile.folded',
+                             'X-Profile-Samples': str(profile.samples)})
+
+@app.route('/api/stream/appointments')
+def appointment_stream():
+    """Server-sent events for the logged-in user's appointments and calls"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not logged in"}), 401
+    if container.event_bus.subscriber_count() >= MAX_STREAMS:
+        # 204 tells EventSource not to reconnect; the page still works, just without live updates
+        return Response(status=204)
+    
+    # Subscribe now, so nothing published while the response starts is missed
+    subscription = container.event_bus.subscribe(user_id, parse_last_event_id(request.headers.get('Last-Event-ID')))
+    return Response(sse_stream(subscription), mimetype=SSE_MEDIA_TYPE,
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/office-knowledge/stats')
+def office_knowledge_stats():
+    """How many calls the office knowledge base has saved"""
+    if not session.get('user_id'):
+        return jsonify({"error": "Not logged in"}), 401
+    
+    return jsonify(container.office_knowledge.get_stats())
+
+@app.route('/api/calls/search')
+def search_calls():
+    """Full-text search over call transcripts"""
+    # Check if user is logged in
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not logged in"}), 401
+    
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Missing query parameter 'q'"}), 400
+    
+    try:
+        since = datetime.strptime(request.args['since'], '%Y-%m-%d') if request.args.get('since') else None
+        until = datetime.strptime(request.args['until'], '%Y-%m-%d') if request.args.get('until') else None
+        limit = max(1, min(int(request.args.get('limit', 20)), 200))
+    except ValueError:
+        return jsonify({"error": "Invalid since/until (YYYY-MM-DD) or limit"}), 400
+    
+    try:
+        results = container.transcript_index.search(
+            query,
+            doctor_id=request.args.get('doctor_id'),
+            # Only the user's own calls, whatever the query string asks for
+            user_id=user_id,
+            since=since,
+            until=until,
+            limit=limit
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({"query": query, "count": len(results), "results": results})
+
+@app.route('/api/calls/metrics')
+def call_metrics():
+    """Rolling call latency, duration and cost metrics"""
+    # Check if user is logged in
+    if not session.get('user_id'):
+        return jsonify({"error": "Not logged in"}), 401
+    
+    try:
+        days = max(1, min(int(request.args.get('days', 7)), container.call_analytics.retention_days))
+    except ValueError:
+        return jsonify({"error": "Invalid days"}), 400
+    
+    return jsonify(container.call_analytics.report(days=days, agent_id=request.args.get('agent_id')))
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
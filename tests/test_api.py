@@ -0,0 +1,197 @@
+import unittest
+import asyncio
+import tempfile
+import threading
+import time
+import os
+from datetime import datetime, timedelta
+from unittest import mock
+
+import httpx
+
+from schedulur import main
+from schedulur.container import ServiceContainer, set_container
+from schedulur.models.appointment import Appointment
+from schedulur.models.doctor import Doctor
+from schedulur.models.user import User, UserAvailability
+from schedulur.profiling import ADMIN_TOKEN_ENV
+from schedulur.services.appointment_service import AppointmentService
+from schedulur.services.async_service import AsyncService
+from schedulur.services.doctor_service import DoctorService
+from schedulur.services.user_service import UserService
+from schedulur.storage.blob_store import BlobStore
+from schedulur.tracing import Tracer, set_tracer
+from schedulur.utils.http_cache import get_response_cache
+
+class SlowUserService(UserService):
+    """A store whose reads block, as a slow disk would"""
+
+    def get_user(self, user_id):
+        time.sleep(0.2)
+        return super().get_user(user_id)
+
+class TestAsyncApi(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.users = SlowUserService(os.path.join(self.temp_dir.name, "users.json"))
+        set_container(ServiceContainer(user_service=self.users))
+
+    def tearDown(self):
+        set_container(None)
+        self.temp_dir.cleanup()
+
+    def request(self, *calls):
+        """Send requests to the app concurrently; returns the responses and the elapsed time"""
+        async def send():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                start = time.perf_counter()
+                responses = await asyncio.gather(*(client.request(method, url, **kwargs)
+                                                   for method, url, kwargs in calls))
+                return responses, time.perf_counter() - start
+        return asyncio.run(send())
+
+    def test_services_are_injected(self):
+        (created,), _ = self.request(("POST", "/users/", {"json": {"name": "Pat", "email": "pat@example.com"}}))
+        self.assertEqual(created.status_code, 200)
+        user_id = created.json()["id"]
+
+        (fetched, missing), _ = self.request(("GET", f"/users/{user_id}", {}), ("GET", "/users/nobody", {}))
+        self.assertEqual(fetched.json()["email"], "pat@example.com")
+        self.assertEqual(missing.status_code, 404)
+        self.assertIsNotNone(self.users.get_user(user_id))
+
+    def test_blocking_reads_run_off_the_event_loop(self):
+        responses, elapsed = self.request(*[("GET", "/users/nobody", {})] * 5)
+        self.assertEqual({r.status_code for r in responses}, {404})
+        # Five 0.2s reads overlap on the I/O pool instead of queueing on the loop
+        self.assertLess(elapsed, 0.6)
+
+    def test_methods_run_on_the_pool(self):
+        async def thread_name():
+            return await AsyncService(threading).current_thread()
+        self.assertTrue(asyncio.run(thread_name()).name.startswith("schedulur-io"))
+
+class TestBatchApi(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        store = BlobStore(os.path.join(self.temp_dir.name, "transcripts"))
+        self.doctors = DoctorService(os.path.join(self.temp_dir.name, "doctors.json"), transcript_store=store)
+        self.doctors.create_doctor(Doctor(id="d1", name="Dr. Smith", specialization="Cardiology"))
+        self.users = UserService(os.path.join(self.temp_dir.name, "users.json"))
+        self.appointments = AppointmentService(
+            os.path.join(self.temp_dir.name, "appointments.json"), doctor_service=self.doctors,
+            communication_service=mock.Mock(), transcript_store=store, transcript_index=mock.Mock(),
+            office_knowledge=mock.Mock(), approval_service=mock.Mock())
+        set_container(ServiceContainer(user_service=self.users, doctor_service=self.doctors,
+                                       appointment_service=self.appointments))
+
+    def tearDown(self):
+        set_container(None)
+        self.temp_dir.cleanup()
+
+    def call(self, method, url, **kwargs):
+        async def send():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+                return await client.request(method, url, **kwargs)
+        return asyncio.run(send())
+
+    def test_appointments_batch(self):
+        start = datetime(2030, 1, 7, 9, 0)
+        item = lambda user, doctor: {"user_id": user, "doctor_id": doctor, "start_time": start.isoformat(),
+                                     "end_time": (start + timedelta(minutes=30)).isoformat()}
+        items = [item("u1", "d1"), item("u1", "d1"), item("u2", "missing"), {"doctor_id": "d1"}]
+        with mock.patch.object(self.appointments.store, "save", wraps=self.appointments.store.save) as save:
+            response = self.call("POST", "/appointments:batch", json=items)
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], [201, 201, 404, 422])
+        # Both of u1's appointments were written in one save
+        self.assertEqual(save.call_count, 1)
+        self.assertEqual(len(self.appointments.get_user_appointments("u1")), 2)
+
+    def test_doctors_by_ids(self):
+        body = self.call("GET", "/doctors", params={"ids": "d1,nope,d1"}).json()
+        self.assertEqual([d["id"] for d in body["doctors"]], ["d1"])
+        self.assertEqual(body["missing"], ["nope"])
+
+    def test_availability_check(self):
+        availability = UserAvailability(days=[0], time_slots=[{"day": 0, "start": "09:00", "end": "12:00"}])
+        self.users.create_user(User(id="u1", name="Pat", email="pat@example.com", availability=availability))
+        monday = datetime(2030, 1, 7, 9, 0)
+        slot = lambda start, minutes=30: {"start_time": start.isoformat(),
+                                          "end_time": (start + timedelta(minutes=minutes)).isoformat()}
+        self.call("POST", "/appointments:batch", json=[{"user_id": "u1", "doctor_id": "d1", **slot(monday)}])
+        response = self.call("POST", "/users/u1/availability:check", json=[
+            slot(monday), slot(monday + timedelta(hours=1)), slot(monday + timedelta(days=1)),
+        ])
+        results = response.json()["results"]
+        self.assertEqual([r["available"] for r in results], [False, True, False])
+        self.assertEqual(results[0]["reason"], "Conflicts with an existing appointment")
+
+    def test_list_pages_projection_and_ndjson(self):
+        for i in range(5):
+            self.users.create_user(User(id=f"u{i}", name=f"User {i}", email=f"u{i}@example.com"))
+
+        first = self.call("GET", "/users/", params={"limit": 3, "fields": "name"})
+        self.assertEqual(first.json(), [{"id": f"u{i}", "name": f"User {i}"} for i in range(3)])
+        cursor = first.headers["X-Next-Cursor"]
+        rest = self.call("GET", "/users/", params={"limit": 3, "cursor": cursor})
+        self.assertEqual([u["id"] for u in rest.json()], ["u3", "u4"])
+        self.assertNotIn("X-Next-Cursor", rest.headers)
+
+        export = self.call("GET", "/users/", params={"format": "ndjson", "cursor": cursor})
+        self.assertEqual(export.headers["content-type"], "application/x-ndjson")
+        self.assertEqual([line for line in export.text.splitlines()][0][:11], '{"id":"u3",')
+        self.assertEqual(self.call("GET", "/users/", params={"fields": "password"}).status_code, 400)
+
+    def test_conditional_get_and_cached_results(self):
+        self.users.create_user(User(id="u1", name="Pat", email="pat@example.com"))
+        first = self.call("GET", "/users/u1")
+        etag = first.headers["ETag"]
+        self.assertEqual(self.call("GET", "/users/u1", headers={"If-None-Match": etag}).status_code, 304)
+
+        user = self.users.get_user("u1")
+        user.name = "Pat Smith"
+        self.users.update_user("u1", user)
+        changed = self.call("GET", "/users/u1", headers={"If-None-Match": etag})
+        self.assertEqual((changed.status_code, changed.json()["name"]), (200, "Pat Smith"))
+
+        get_response_cache().clear()
+        with mock.patch.object(main.SchedulingOptimizer, "find_best_providers", return_value=[]) as find:
+            ranked = self.call("GET", "/users/u1/best-providers")
+            again = self.call("GET", "/users/u1/best-providers")
+            revalidated = self.call("GET", "/users/u1/best-providers",
+                                    headers={"If-None-Match": ranked.headers["ETag"]})
+        self.assertEqual((ranked.json(), again.json(), revalidated.status_code), ([], [], 304))
+        # Computed once; the repeat came from the response cache
+        self.assertEqual(find.call_count, 1)
+
+    def test_update_without_user_id(self):
+        start = datetime(2030, 1, 7, 9, 0)
+        self.appointments.create_appointment(Appointment(id="a1", user_id="u1", doctor_id="d1", start_time=start,
+                                                         end_time=start + timedelta(minutes=30)))
+        body = self.appointments.get_appointment("a1", "u1").model_dump(mode="json", exclude={"user_id"})
+
+        updated = self.call("PUT", "/appointments/a1", json={**body, "notes": "Bring records"})
+        self.assertEqual((updated.status_code, updated.json()["user_id"]), (200, "u1"))
+        moved = self.call("PUT", "/appointments/a1", json={**updated.json(), "user_id": "u2"})
+        self.assertEqual((moved.status_code, moved.json()["detail"]), (400, "Appointment belongs to another user"))
+
+    def test_requests_are_traced(self):
+        set_tracer(Tracer())
+        self.addCleanup(set_tracer, None)
+        self.call("GET", "/users/nobody", headers={"X-Request-ID": "req-1"})
+        with mock.patch.dict(os.environ, {ADMIN_TOKEN_ENV: "secret"}):
+            self.assertEqual(self.call("GET", "/api/traces").status_code, 403)
+            traces = self.call("GET", "/api/traces", params={"trace_id": "req-1"},
+                               headers={"Authorization": "Bearer secret"}).json()["traces"]
+        self.assertEqual([(s["name"], s["attributes"]["status"]) for s in traces[0]["spans"]], [("GET get_user", 404)])
+
+    def test_oversized_batches_are_rejected(self):
+        response = self.call("POST", "/providers:batch", json=[{}] * (main.MAX_BATCH_SIZE + 1))
+        self.assertEqual(response.status_code, 413)
+
+if __name__ == "__main__":
+    unittest.main()
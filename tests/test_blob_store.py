@@ -0,0 +1,91 @@
+import unittest
+import tempfile
+import json
+import os
+from datetime import datetime, timedelta
+from unittest import mock
+
+from schedulur.models.appointment import Appointment
+from schedulur.models.doctor import Doctor
+from schedulur.services.appointment_service import AppointmentService
+from schedulur.services.doctor_service import DoctorService
+from schedulur.storage import blob_store
+from schedulur.storage.blob_store import BlobStore
+
+class TestBlobStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = BlobStore(self.path("blobs"), compression="gzip")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.temp_dir.name, name)
+
+    def blob_files(self):
+        return [name for _, _, names in os.walk(self.store.root) for name in names]
+
+    def test_round_trip(self):
+        digest = self.store.put("Agent: Are you accepting new patients?\nUser: Yes.")
+
+        self.assertEqual(len(digest), 64)
+        self.assertTrue(self.store.exists(digest))
+        self.assertEqual(self.store.get(digest), "Agent: Are you accepting new patients?\nUser: Yes.")
+        self.assertIsNone(self.store.put(""))
+        self.assertIsNone(self.store.get(None))
+        self.assertIsNone(self.store.get("0" * 64))
+
+        self.assertTrue(self.store.delete(digest))
+        self.assertFalse(self.store.exists(digest))
+
+    def test_identical_text_is_stored_once(self):
+        first = self.store.put("We take Aetna.")
+        second = self.store.put("We take Aetna.")
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, self.store.put("We take Cigna."))
+        self.assertEqual(len(self.blob_files()), 2)
+
+    def test_gzip_without_zstandard(self):
+        with mock.patch.object(blob_store, "zstandard", None):
+            store = BlobStore(self.path("fallback"))
+            self.assertEqual(store.compression, "gzip")
+            with self.assertRaises(ValueError):
+                BlobStore(self.path("zstd"), compression="zstd")
+
+            digest = store.put("Tuesday at 10 works.")
+            self.assertTrue(os.path.exists(os.path.join(store.root, digest[:2], f"{digest}.gz")))
+            self.assertEqual(store.get(digest), "Tuesday at 10 works.")
+
+            # A zstd blob written elsewhere can't be read without the package
+            os.rename(store._path(digest, "gzip"), store._path(digest, "zstd"))
+            with self.assertRaises(ValueError):
+                store.get(digest)
+
+    def test_inline_transcripts_are_migrated(self):
+        doctor = Doctor(id="d1", name="Dr. Smith", specialization="Cardiology").model_dump(mode="json")
+        with open(self.path("doctors.json"), "w") as f:
+            json.dump({"d1": {**doctor, "call_transcript": "Doctor call"}}, f)
+        start = datetime.now() + timedelta(days=1)
+        appointment = Appointment(id="a1", user_id="u1", doctor_id="d1", start_time=start,
+                                  end_time=start + timedelta(minutes=30)).to_dict()
+        with open(self.path("appointments.json"), "w") as f:
+            json.dump({"a1": {**appointment, "call_transcript": "Appointment call"}}, f, default=str)
+
+        doctors = DoctorService(data_file=self.path("doctors.json"), transcript_store=self.store)
+        appointments = AppointmentService(data_file=self.path("appointments.json"), doctor_service=doctors,
+                                          communication_service=mock.Mock(), transcript_store=self.store,
+                                          transcript_index=mock.Mock(), office_knowledge=mock.Mock(),
+                                          approval_service=mock.Mock())
+
+        self.assertEqual(self.store.get(doctors.get_doctor("d1").call_transcript_ref), "Doctor call")
+        migrated = appointments.get_appointment("a1", "u1")
+        self.assertEqual(self.store.get(migrated.call_transcript_ref), "Appointment call")
+        # The rewritten doctors file keeps only the reference
+        with open(self.path("doctors.json")) as f:
+            self.assertNotIn("Doctor call", f.read())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import tempfile
+import os
+import io
+from contextlib import redirect_stderr
+from datetime import datetime, timedelta
+from unittest import mock
+
+from schedulur import web_app
+from schedulur.cli import CLI
+from schedulur.container import ServiceContainer
+from schedulur.services.call_analytics_service import CallAnalyticsService
+
+class TestCallAnalyticsService(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "call_analytics.json")
+        self.analytics = CallAnalyticsService(data_file=self.path, retention_days=30)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def call(self, agent_id="agent-1", days_ago=0, **fields):
+        started = datetime.now() - timedelta(days=days_ago)
+        return {
+            "agent_id": agent_id,
+            "start_timestamp": int(started.timestamp() * 1000),
+            "duration_ms": 40000,
+            "disconnection_reason": "agent_hangup",
+            "latency": {"e2e": {"values": [2000, 3000]}, "llm": {"p50": 1500}},
+            "call_cost": {"combined_cost": 9.5},
+            "call_analysis": {"call_successful": True},
+            **fields,
+        }
+
+    def test_webhook_calls_are_aggregated_and_saved(self):
+        self.analytics.record_webhook_call(self.call())
+        self.analytics.record_webhook_call(self.call(disconnection_reason="user_hangup",
+                                                     call_analysis={"in_voicemail": True}))
+
+        total = CallAnalyticsService(data_file=self.path).report()["total"]
+        self.assertEqual(total["calls"], 2)
+        self.assertEqual(total["successful"], 1)
+        self.assertEqual(total["voicemail"], 1)
+        self.assertEqual(total["disconnection_reasons"], {"agent_hangup": 1, "user_hangup": 1})
+        self.assertEqual(total["latency_e2e_ms"]["count"], 4)
+        self.assertEqual(total["latency_llm_ms"]["count"], 2)
+        self.assertAlmostEqual(total["cost"]["sum"], 19.0)
+
+    def test_old_days_are_expired(self):
+        self.analytics.record_webhook_call(self.call(days_ago=45))
+        self.analytics.record_webhook_call(self.call(days_ago=1))
+
+        self.assertEqual(len(self.analytics.buckets), 1)
+
+    def test_report_rolls_up_by_day_and_agent(self):
+        self.analytics.record_webhook_call(self.call("agent-1", days_ago=0))
+        self.analytics.record_webhook_call(self.call("agent-2", days_ago=0))
+        self.analytics.record_webhook_call(self.call("agent-1", days_ago=3))
+        self.analytics.record_webhook_call(self.call("agent-1", days_ago=10))
+
+        report = self.analytics.report(days=7)
+        self.assertEqual(report["total"]["calls"], 3)
+        self.assertEqual(len(report["by_day"]), 2)
+        self.assertEqual({agent: r["calls"] for agent, r in report["by_agent"].items()},
+                         {"agent-1": 2, "agent-2": 1})
+        self.assertEqual(self.analytics.report(days=7, agent_id="agent-2")["total"]["calls"], 1)
+        self.assertEqual(self.analytics.report(days=1)["total"]["calls"], 2)
+
+    def test_report_needs_at_least_one_day(self):
+        with self.assertRaises(ValueError):
+            self.analytics.report(days=0)
+        cli = CLI(ServiceContainer(user_service=mock.Mock(), call_analytics=self.analytics))
+        with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            cli.run(["calls", "report", "--days", "0"])
+
+    def test_metrics_endpoint_requires_login(self):
+        self.analytics.record_webhook_call(self.call())
+        with mock.patch.object(web_app, "_warm_up_started", True), \
+                mock.patch.object(web_app, "container", mock.Mock(call_analytics=self.analytics)):
+            client = web_app.app.test_client()
+            self.assertEqual(client.get("/api/calls/metrics").status_code, 401)
+            with client.session_transaction() as session:
+                session["user_id"] = "user-1"
+            self.assertEqual(client.get("/api/calls/metrics").get_json()["total"]["calls"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import os
+import tempfile
+import threading
+from collections import Counter
+from unittest import mock
+
+from werkzeug.serving import make_server
+
+from schedulur import web_app
+from schedulur.cluster import NODE_HEADER, Cluster, HashRing, set_cluster, user_id_for_email
+from schedulur.models.user import User
+from schedulur.services.user_service import UserService
+
+class TestHashRing(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = [f"user-{i}" for i in range(5000)]
+
+    def test_keys_spread_across_nodes(self):
+        ring = HashRing(["a", "b", "c"])
+        counts = Counter(ring.node_for(key) for key in self.keys)
+        self.assertEqual(sorted(counts), ["a", "b", "c"])
+        for count in counts.values():
+            self.assertGreater(count, len(self.keys) / 3 * 0.7)
+
+    def test_adding_a_node_moves_only_its_share(self):
+        ring = HashRing(["a", "b", "c"])
+        before = {key: ring.node_for(key) for key in self.keys}
+        ring.add("d")
+        moved = [key for key in self.keys if ring.node_for(key) != before[key]]
+
+        # Every moved key went to the new node, and about a quarter moved
+        self.assertTrue(all(ring.node_for(key) == "d" for key in moved))
+        self.assertLess(len(moved), len(self.keys) * 0.35)
+
+        ring.remove("d")
+        self.assertEqual({key: ring.node_for(key) for key in self.keys}, before)
+
+class TestRequestRouting(unittest.TestCase):
+
+    def setUp(self):
+        # The owner node, served over HTTP like a second process would be
+        self.server = make_server("127.0.0.1", 0, web_app.app)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.cluster = Cluster({"a": f"http://127.0.0.1:{self.server.port}", "b": "fly:machine-b",
+                                "c": "http://127.0.0.1:1"}, local="c")
+        set_cluster(self.cluster)
+        patcher = mock.patch.object(web_app, "_warm_up_started", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = web_app.app.test_client()
+
+    def tearDown(self):
+        set_cluster(None)
+        self.server.shutdown()
+
+    def user_on(self, node):
+        return next(f"user-{i}" for i in range(1000) if self.cluster.owner(f"user-{i}") == node)
+
+    def login_as(self, user_id):
+        with self.client.session_transaction() as session:
+            session["user_id"] = user_id
+
+    def test_local_users_are_served_here(self):
+        self.login_as(self.user_on("c"))
+        response = self.client.get("/logout")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.headers[NODE_HEADER], "c")
+
+    def test_other_users_are_proxied_to_owner(self):
+        self.login_as(self.user_on("a"))
+        with mock.patch.object(self.cluster, "forward", wraps=self.cluster.forward) as forward:
+            response = self.client.get("/logout")
+        self.assertEqual(forward.call_args.args[0], "a")
+        # The owner's redirect is passed back rather than followed
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.headers["Location"].endswith("/"))
+
+    def test_node_header_from_clients_is_not_trusted(self):
+        self.login_as(self.user_on("b"))
+        for value in ("a", "a forged", self.cluster.forwarded_by().replace("c ", "a ")):
+            response = self.client.get("/profile", headers={NODE_HEADER: value})
+            self.assertEqual(response.headers["fly-replay"], "instance=machine-b")
+
+        response = self.client.get("/logout", headers={NODE_HEADER: self.cluster.forwarded_by()})
+        self.assertEqual(response.headers[NODE_HEADER], "c")
+
+    def test_fly_nodes_replay_at_the_proxy(self):
+        self.login_as(self.user_on("b"))
+        response = self.client.get("/profile")
+        self.assertEqual(response.headers["fly-replay"], "instance=machine-b")
+
+    def test_login_routes_by_email(self):
+        email = next(f"pat{i}@example.com" for i in range(1000)
+                     if self.cluster.owner(user_id_for_email(f"pat{i}@example.com")) == "b")
+        response = self.client.post("/login", data={"form_type": "login", "email": email})
+        self.assertEqual(response.headers["fly-replay"], "instance=machine-b")
+
+    def test_email_stays_routable_after_profile_edit(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        users = UserService(data_file=os.path.join(temp_dir.name, "users.json"))
+        email_on = lambda node: next(f"pat{i}@example.com" for i in range(1000)
+                                     if self.cluster.owner(user_id_for_email(f"pat{i}@example.com")) == node)
+        email, new_email = email_on("c"), email_on("b")
+        user = users.create_user(User(id=user_id_for_email(email), name="Pat", email=email))
+        self.login_as(user.id)
+
+        with mock.patch.object(web_app, "container", mock.Mock(user_service=users)):
+            self.client.post("/profile", data={"name": "Pat Lee", "email": new_email, "phone": "",
+                                               "zip_code": "", "insurance": ""})
+            # The old email still names the node holding the record, so login keeps working
+            self.assertEqual((users.get_user(user.id).name, users.get_user(user.id).email), ("Pat Lee", email))
+            response = self.client.post("/login", data={"form_type": "login", "email": email})
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(response.headers[NODE_HEADER], "c")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import multiprocessing
+import tempfile
+import os
+
+from schedulur.models.doctor import Doctor
+from schedulur.models.user import User
+from schedulur.services.doctor_service import DoctorService
+from schedulur.services.user_service import UserService
+from schedulur.storage.blob_store import BlobStore
+from schedulur.storage.records import ConflictError
+
+def create_users(path, worker, count):
+    service = UserService(data_file=path)
+    for i in range(count):
+        service.create_user(User(id=f"{worker}-{i}", name=f"User {i}", email=f"{worker}-{i}@example.com"))
+
+class TestConcurrency(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "doctors.json")
+        self.store = BlobStore(os.path.join(self.temp_dir.name, "transcripts"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_service(self):
+        return DoctorService(data_file=self.path, transcript_store=self.store)
+
+    def test_stale_update_conflicts(self):
+        worker_a, worker_b = self.make_service(), self.make_service()
+        worker_a.create_doctor(Doctor(id="d1", name="Dr. Smith", specialization="Cardiology"))
+
+        # Worker B picks up A's doctor, then both edit the same version
+        worker_b.refresh()
+        stale = worker_b.get_doctor("d1")
+        self.assertEqual(stale.version, 1)
+        fresh = worker_a.get_doctor("d1").model_copy()
+        fresh.user_approval = True
+        worker_a.update_doctor("d1", fresh)
+
+        stale = stale.model_copy(update={"call_notes": "Closed Fridays"})
+        with self.assertRaises(ConflictError) as raised:
+            worker_b.update_doctor("d1", stale)
+        self.assertEqual(raised.exception.actual, 2)
+
+        # Re-reading and retrying keeps both changes
+        retry = worker_b.get_doctor("d1").model_copy(update={"call_notes": "Closed Fridays"})
+        worker_b.update_doctor("d1", retry)
+        saved = self.make_service().get_doctor("d1")
+        self.assertEqual((saved.user_approval, saved.call_notes, saved.version), (True, "Closed Fridays", 3))
+
+    def test_unversioned_update_overwrites(self):
+        service = self.make_service()
+        service.create_doctor(Doctor(id="d1", name="Dr. Smith", specialization="Cardiology"))
+        service.update_doctor("d1", Doctor(name="Dr. Jones", specialization="Cardiology"))
+        self.assertEqual(self.make_service().get_doctor("d1").name, "Dr. Jones")
+
+    def test_workers_do_not_lose_writes(self):
+        path = os.path.join(self.temp_dir.name, "users.json")
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=create_users, args=(path, worker, 10)) for worker in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(len(UserService(data_file=path).list_users()), 40)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import tempfile
+import os
+from unittest import mock
+
+from schedulur.container import ServiceContainer
+from schedulur.services.doctor_search_service import DoctorSearchService
+from schedulur.services.doctor_service import DoctorService
+from schedulur.services.office_knowledge_service import OfficeKnowledgeService
+from schedulur.services.user_service import UserService
+from schedulur.storage.blob_store import BlobStore
+
+class TestServiceContainer(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        store = BlobStore(os.path.join(self.temp_dir.name, "transcripts"))
+        self.container = ServiceContainer(
+            transcript_store=store,
+            doctor_service=DoctorService(os.path.join(self.temp_dir.name, "doctors.json"), transcript_store=store),
+            office_knowledge=OfficeKnowledgeService(os.path.join(self.temp_dir.name, "knowledge.json")),
+            user_service=UserService(os.path.join(self.temp_dir.name, "users.json"))
+        )
+        # The search service is left for the container to build; keep its mock doctors out of the package
+        patcher = mock.patch.object(DoctorSearchService, "_ensure_mock_data")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_services_are_built_once(self):
+        self.assertIs(self.container.office_knowledge, self.container.office_knowledge)
+        self.assertIs(self.container.doctor_search_service, self.container.doctor_search_service)
+
+    def test_search_service_shares_office_knowledge(self):
+        self.assertIs(self.container.doctor_search_service.office_knowledge, self.container.office_knowledge)
+
+    def test_override_replaces_service(self):
+        replacement = DoctorService(os.path.join(self.temp_dir.name, "other.json"),
+                                    transcript_store=self.container.transcript_store)
+        self.container.override(doctor_service=replacement)
+        self.assertIs(self.container.doctor_service, replacement)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+import asyncio
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from unittest import mock
+
+import httpx
+
+from schedulur import main, web_app
+from schedulur.container import ServiceContainer, set_container
+from schedulur.events import EventBus, sse_message
+from schedulur.models.appointment import Appointment
+from schedulur.models.doctor import Doctor
+from schedulur.profiling import ADMIN_TOKEN_ENV
+from schedulur.services.appointment_service import AppointmentService
+from schedulur.services.doctor_service import DoctorService
+from schedulur.storage.blob_store import BlobStore
+
+class TestEventBus(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = EventBus()
+
+    def test_events_reach_only_their_user(self):
+        with self.bus.subscribe("u1") as mine, self.bus.subscribe("u2") as theirs:
+            self.bus.publish("u1", "appointment", {"id": "a1"})
+            self.assertEqual(mine.get(timeout=1).data, {"id": "a1"})
+            self.assertIsNone(theirs.get(timeout=0))
+        self.assertEqual(self.bus.subscriber_count(), 0)
+
+    def test_reconnect_replays_missed_events(self):
+        first = self.bus.publish("u1", "appointment", {"id": "a1"})
+        self.bus.publish("u2", "appointment", {"id": "b1"})
+        self.bus.publish("u1", "call", {"call_id": "c1"})
+        with self.bus.subscribe("u1", last_event_id=first.id) as events:
+            self.assertEqual(events.get(timeout=0).type, "call")
+            self.assertIsNone(events.get(timeout=0))
+
+    def test_async_subscribers_are_woken_from_other_threads(self):
+        async def receive():
+            with self.bus.subscribe_async("u1") as events:
+                threading.Timer(0.05, self.bus.publish, ("u1", "appointment", {"id": "a1"})).start()
+                return await events.get_async(timeout=5)
+        self.assertEqual(asyncio.run(receive()).data, {"id": "a1"})
+
+    def test_sse_encoding(self):
+        event = self.bus.publish("u1", "appointment", {"id": "a1"})
+        self.assertEqual(sse_message(event), b'id: 1\nevent: appointment\ndata: {"id":"a1"}\n\n')
+
+class TestAppointmentStream(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.bus = EventBus()
+        store = BlobStore(os.path.join(self.temp_dir.name, "transcripts"))
+        doctors = DoctorService(os.path.join(self.temp_dir.name, "doctors.json"), transcript_store=store)
+        doctors.create_doctor(Doctor(id="d1", name="Dr. Smith", specialization="Cardiology"))
+        self.appointments = AppointmentService(
+            os.path.join(self.temp_dir.name, "appointments.json"), doctor_service=doctors,
+            communication_service=mock.Mock(), transcript_store=store, transcript_index=mock.Mock(),
+            office_knowledge=mock.Mock(), approval_service=mock.Mock(), event_bus=self.bus)
+        container = ServiceContainer(event_bus=self.bus, appointment_service=self.appointments)
+        for name, value in (("container", container), ("_warm_up_started", True)):
+            patcher = mock.patch.object(web_app, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = web_app.app.test_client()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_appointment_changes_are_streamed(self):
+        with self.client.session_transaction() as session:
+            session["user_id"] = "u1"
+        response = self.client.get("/api/stream/appointments", buffered=False)
+        self.assertEqual(response.mimetype, "text/event-stream")
+        chunks = iter(response.response)
+        self.assertEqual(next(chunks), b": keepalive\n\n")
+
+        start = datetime(2030, 1, 7, 9, 0)
+        appointment = self.appointments.create_appointment(Appointment(
+            user_id="u1", doctor_id="d1", start_time=start, end_time=start + timedelta(minutes=30)))
+        self.appointments.cancel_appointment(appointment.id, "u1")
+        self.assertIn(b'"status":"requested"', next(chunks))
+        self.assertIn(b'"status":"cancelled"', next(chunks))
+
+        response.close()
+        self.assertEqual(self.bus.subscriber_count(), 0)
+
+    def test_stream_requires_login(self):
+        self.assertEqual(self.client.get("/api/stream/appointments").status_code, 401)
+
+    def test_streams_are_capped(self):
+        with self.client.session_transaction() as session:
+            session["user_id"] = "u1"
+        with mock.patch.object(web_app, "MAX_STREAMS", 0):
+            self.assertEqual(self.client.get("/api/stream/appointments").status_code, 204)
+
+    def test_api_stream_requires_admin_token_and_is_capped(self):
+        set_container(ServiceContainer(event_bus=self.bus))
+        self.addCleanup(set_container, None)
+
+        async def stream(**headers):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.get("/api/stream/appointments", params={"user_id": "u1"}, headers=headers)
+
+        with mock.patch.dict(os.environ, {ADMIN_TOKEN_ENV: "secret"}):
+            self.assertEqual(asyncio.run(stream()).status_code, 403)
+            with mock.patch.object(main, "MAX_STREAMS", 0):
+                self.assertEqual(asyncio.run(stream(authorization="Bearer secret")).status_code, 204)
+        self.assertEqual(self.bus.subscriber_count(), 0)
+
+    def test_only_signed_webhooks_reach_pages(self):
+        subscription = self.bus.subscribe("u1")
+        webhook = {"event": "call_ended", "call": {"call_id": "c1", "call_status": "ended",
+                                                   "metadata": {"user_id": "u1", "doctor_id": "d1"}}}
+
+        self.assertEqual(self.client.post("/api/retell_webhook", json=webhook).status_code, 200)
+        self.assertIsNone(subscription.get(timeout=0))
+
+        with mock.patch.dict(os.environ, {"RETELL_API_KEY": "key"}), \
+                mock.patch.object(web_app, "verify_webhook", return_value=False):
+            self.assertEqual(self.client.post("/api/retell_webhook", json=webhook).status_code, 401)
+        with mock.patch.dict(os.environ, {"RETELL_API_KEY": "key"}), \
+                mock.patch.object(web_app, "verify_webhook", return_value=True) as verify:
+            self.client.post("/api/retell_webhook", json=webhook, headers={"X-Retell-Signature": "v=1,d=abc"})
+        self.assertEqual(verify.call_args.args, (webhook, "v=1,d=abc"))
+        self.assertEqual(subscription.get(timeout=1).data["call_id"], "c1")
+        subscription.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import random
+
+from schedulur.utils.histogram import LogHistogram
+
+class TestLogHistogram(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(42)
+        self.values = [rng.lognormvariate(7.5, 0.5) for _ in range(5000)]
+
+    def test_quantiles_within_relative_accuracy(self):
+        histogram = LogHistogram(relative_accuracy=0.01)
+        for value in self.values:
+            histogram.add(value)
+
+        ordered = sorted(self.values)
+        for q in (0.5, 0.9, 0.99):
+            expected = ordered[int(q * (len(ordered) - 1))]
+            self.assertAlmostEqual(histogram.quantile(q), expected, delta=expected * 0.02)
+
+        self.assertEqual(histogram.count, len(self.values))
+        self.assertEqual(histogram.max, max(self.values))
+
+    def test_merge_matches_single_histogram(self):
+        whole, left, right = LogHistogram(), LogHistogram(), LogHistogram()
+        for i, value in enumerate(self.values):
+            whole.add(value)
+            (left if i % 2 else right).add(value)
+
+        left.merge(right)
+        self.assertEqual(left.bins, whole.bins)
+        self.assertEqual(left.quantile(0.95), whole.quantile(0.95))
+
+    def test_round_trip(self):
+        histogram = LogHistogram()
+        for value in self.values[:100]:
+            histogram.add(value)
+        histogram.add(0)
+
+        restored = LogHistogram.from_dict(histogram.to_dict())
+        self.assertEqual(restored.summary(), histogram.summary())
+
+    def test_empty(self):
+        self.assertIsNone(LogHistogram().quantile(0.5))
+
+if __name__ == "__main__":
+    unittest.main()
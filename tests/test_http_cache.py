@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+
+from schedulur.utils import http_cache
+from schedulur.utils.http_cache import ResponseCache, etag_matches, make_etag
+
+class TestEtags(unittest.TestCase):
+
+    def test_etag_follows_its_parts(self):
+        self.assertEqual(make_etag("user", "u1", 3), make_etag("user", "u1", 3))
+        self.assertNotEqual(make_etag("user", "u1", 3), make_etag("user", "u1", 4))
+
+    def test_if_none_match(self):
+        etag = make_etag("user", "u1", 3)
+        self.assertTrue(etag_matches(etag, etag))
+        # Weak comparison: the W/ prefix doesn't matter
+        self.assertTrue(etag_matches(f'"other", {etag[2:]}', etag))
+        self.assertTrue(etag_matches("*", etag))
+        self.assertFalse(etag_matches('"other"', etag))
+        self.assertFalse(etag_matches(None, etag))
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_least_recently_used_is_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_entries_expire(self):
+        cache = ResponseCache(ttl=10)
+        with mock.patch.object(http_cache.time, "monotonic", return_value=100):
+            cache.set("a", 1)
+        with mock.patch.object(http_cache.time, "monotonic", return_value=109):
+            self.assertEqual(cache.get("a"), 1)
+        with mock.patch.object(http_cache.time, "monotonic", return_value=111):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import tempfile
+import os
+import json
+
+from schedulur.storage.jsonl_log import JsonlLog
+from schedulur.integrations.communication import MockCommunicationProvider
+
+class TestJsonlLog(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "communication.jsonl")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_append_and_stream(self):
+        log = JsonlLog(self.path)
+        log.append({"kind": "message", "n": 1})
+        log.append({"kind": "call", "n": 2})
+        log.append({"kind": "message", "n": 3})
+
+        self.assertEqual([r["n"] for r in log], [1, 2, 3])
+        self.assertEqual([r["n"] for r in log.iter_records(kind="message")], [1, 3])
+        self.assertEqual([r["n"] for r in log.tail(1)], [3])
+
+    def test_rotation_keeps_order(self):
+        log = JsonlLog(self.path, max_bytes=64)
+        for n in range(20):
+            log.append({"n": n})
+
+        self.assertGreater(len(log.segments()), 1)
+        self.assertEqual([r["n"] for r in log], list(range(20)))
+
+    def test_rotation_drops_oldest_segments(self):
+        log = JsonlLog(self.path, max_bytes=64, max_segments=2)
+        for n in range(20):
+            log.append({"n": n})
+
+        self.assertLessEqual(len(log.segments()), 3)
+        self.assertEqual([r["n"] for r in log][-1], 19)
+
+    def test_open_returns_shared_instance(self):
+        self.assertIs(JsonlLog.open(self.path), JsonlLog.open(self.path))
+
+    def test_mock_provider_migrates_legacy_file(self):
+        legacy_file = os.path.join(self.temp_dir.name, "communication.json")
+        with open(legacy_file, "w") as f:
+            json.dump({"messages": [{"to": "a"}], "calls": [{"to": "b"}]}, f)
+
+        provider = MockCommunicationProvider(self.path)
+        provider.send_message("c", "Subject", "Body")
+
+        self.assertFalse(os.path.exists(legacy_file))
+        self.assertEqual([m["to"] for m in provider.sent_messages], ["a", "c"])
+        self.assertEqual([c["to"] for c in provider.calls], ["b"])
+
+if __name__ == "__main__":
+    unittest.main()
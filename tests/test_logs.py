@@ -0,0 +1,62 @@
+import unittest
+import io
+import json
+import logging
+from unittest import mock
+
+from schedulur import logs, web_app
+from schedulur.logs import DebugSamplingFilter, configure_logging, flush_logging, set_correlation_id
+
+class TestStructuredLogging(unittest.TestCase):
+
+    def setUp(self):
+        self.output = io.StringIO()
+        configure_logging(level="DEBUG", fmt="json", stream=self.output, force=True)
+        self.addCleanup(configure_logging, force=True)
+        self.logger = logging.getLogger("schedulur.tests")
+
+    def lines(self):
+        flush_logging()
+        return [json.loads(line) for line in self.output.getvalue().splitlines()]
+
+    def test_json_lines_carry_correlation_id_and_fields(self):
+        token = set_correlation_id("req-1")
+        try:
+            self.logger.info("Call initiated", extra={"call_id": "c1"})
+        finally:
+            logs.reset_correlation_id(token)
+        self.logger.warning("Doctor not found: %s", "d1")
+
+        first, second = self.lines()
+        self.assertEqual((first["level"], first["message"], first["call_id"]), ("INFO", "Call initiated", "c1"))
+        self.assertEqual(first["correlation_id"], "req-1")
+        self.assertEqual(second["message"], "Doctor not found: d1")
+        self.assertNotIn("correlation_id", second)
+
+    def test_errors_keep_their_traceback(self):
+        try:
+            raise OSError("disk full")
+        except OSError:
+            self.logger.exception("Error saving users")
+        (line,) = self.lines()
+        self.assertEqual(line["level"], "ERROR")
+        self.assertIn("OSError: disk full", line["exception"])
+
+    def test_debug_lines_are_sampled_per_call_site(self):
+        sampler = DebugSamplingFilter(rate=10)
+        record = lambda level, line: logging.LogRecord("schedulur", level, "x.py", line, "m", None, None)
+        kept = [sampler.filter(record(logging.DEBUG, 1)) for _ in range(100)]
+        self.assertEqual(sum(kept), 10)
+        self.assertTrue(sampler.filter(record(logging.DEBUG, 2)))
+        self.assertTrue(all(sampler.filter(record(logging.ERROR, 1)) for _ in range(5)))
+
+    def test_web_requests_get_a_request_id(self):
+        with mock.patch.object(web_app, "_warm_up_started", True):
+            client = web_app.app.test_client()
+            given = client.get("/login", headers={"X-Request-ID": "abc"})
+            generated = client.get("/login")
+        self.assertEqual(given.headers["X-Request-ID"], "abc")
+        self.assertEqual(len(generated.headers["X-Request-ID"]), 32)
+
+if __name__ == "__main__":
+    unittest.main()
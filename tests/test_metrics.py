@@ -0,0 +1,91 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from unittest import mock
+
+import httpx
+
+from schedulur import main, web_app
+from schedulur.metrics import Registry, get_registry
+from schedulur.models.user import User
+from schedulur.services.user_service import UserService
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_text_format(self):
+        calls = self.registry.counter("calls_total", "Calls placed", ["outcome"])
+        calls.inc(outcome="initiated")
+        calls.inc(2, outcome='say "hi"')
+        self.registry.gauge("open_streams", "Open streams").set_function(lambda: 3)
+        latency = self.registry.histogram("latency_seconds", "Latency", ["stage"])
+        for value in (0.1, 0.2, 0.3):
+            latency.observe(value, stage="local")
+
+        lines = self.registry.render().splitlines()
+        self.assertIn("# TYPE calls_total counter", lines)
+        self.assertIn('calls_total{outcome="initiated"} 1', lines)
+        self.assertIn('calls_total{outcome="say \\"hi\\""} 2', lines)
+        self.assertIn("open_streams 3", lines)
+        self.assertIn("# TYPE latency_seconds summary", lines)
+        self.assertIn('latency_seconds_count{stage="local"} 3', lines)
+        median = next(line for line in lines if 'quantile="0.5"' in line)
+        self.assertAlmostEqual(float(median.split()[-1]), 0.2, delta=0.005)
+
+    def test_labels_must_match(self):
+        calls = self.registry.counter("calls_total", "Calls placed", ["outcome"])
+        with self.assertRaises(ValueError):
+            calls.inc(channel="retell")
+        self.assertIs(self.registry.counter("calls_total", "Calls placed", ["outcome"]), calls)
+        with self.assertRaises(ValueError):
+            self.registry.gauge("calls_total", "Calls placed", ["outcome"])
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def test_store_saves_and_cache_lookups_are_counted(self):
+        registry = get_registry()
+        saved = registry.get("schedulur_store_save_bytes_total")
+        lookups = registry.get("schedulur_cache_requests_total")
+        before = saved.value(store="metric_users"), lookups.value(cache="users", result="hit")
+
+        users = UserService(os.path.join(self.temp_dir.name, "metric_users.json"))
+        users.create_user(User(id="u1", name="Pat", email="pat@example.com"))
+        users.get_user("u1")
+
+        self.assertEqual(saved.value(store="metric_users") - before[0],
+                         os.path.getsize(os.path.join(self.temp_dir.name, "metric_users.json")))
+        self.assertGreater(lookups.value(cache="users", result="hit"), before[1])
+
+    def test_webhook_events_are_labelled_from_a_fixed_set(self):
+        with mock.patch.object(web_app, "_warm_up_started", True), mock.patch.object(web_app, "container"):
+            client = web_app.app.test_client()
+            for event in ("call_started", "made-up-1", "made-up-2"):
+                client.post("/api/retell_webhook", json={"event": event, "call": {"call_id": "c1"}})
+
+        rendered = get_registry().render()
+        self.assertIn('schedulur_webhook_seconds_count{event="other"}', rendered)
+        self.assertIn('schedulur_webhook_seconds_count{event="call_started"}', rendered)
+        self.assertNotIn("made-up", rendered)
+
+    def test_both_apps_serve_metrics(self):
+        with mock.patch.object(web_app, "_warm_up_started", True):
+            flask_response = web_app.app.test_client().get("/metrics")
+        self.assertEqual(flask_response.status_code, 200)
+        self.assertIn(b"# TYPE schedulur_store_save_seconds summary", flask_response.data)
+
+        async def fetch():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+                return await client.get("/metrics")
+        response = asyncio.run(fetch())
+        self.assertTrue(response.headers["content-type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn("schedulur_slot_engine_seconds", response.text)
+
+if __name__ == "__main__":
+    unittest.main()
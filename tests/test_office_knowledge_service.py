@@ -0,0 +1,73 @@
+import unittest
+import tempfile
+import os
+from datetime import datetime, timedelta
+from unittest import mock
+
+from schedulur import web_app
+from schedulur.models.doctor import Doctor
+from schedulur.services.office_knowledge_service import OfficeKnowledgeService
+from schedulur.storage.serialization import read_file
+
+class TestOfficeKnowledgeService(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "office_knowledge.json")
+        self.knowledge = OfficeKnowledgeService(data_file=self.path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def webhook_call(self, doctor_id, **analysis):
+        return {
+            "call_id": "call-1",
+            "start_timestamp": int(datetime.now().timestamp() * 1000),
+            "metadata": {"doctor_id": doctor_id, "insurance": "Aetna"},
+            "call_analysis": {"custom_analysis_data": analysis},
+        }
+
+    def test_webhook_call_is_recorded_and_saved(self):
+        recorded = self.knowledge.record_webhook_call(
+            self.webhook_call("d1", accepts_insurance="false", accepting_new_patients=True))
+
+        self.assertTrue(recorded)
+        self.assertEqual(self.knowledge.rejection_reason("d1", "aetna"), "does not accept aetna")
+        self.assertFalse(self.knowledge.record_webhook_call({"call_analysis": {}}))
+        reloaded = OfficeKnowledgeService(data_file=self.path)
+        self.assertTrue(reloaded.facts["d1"]["new_patients"]["accepting"])
+
+    def test_facts_expire(self):
+        self.knowledge.record_call_result("d1", accepting_new_patients=False,
+                                          observed_at=datetime.now() - timedelta(days=91))
+
+        self.assertIsNone(self.knowledge.rejection_reason("d1"))
+        self.assertEqual(self.knowledge.get_stats()["fresh_facts"], 0)
+
+    def test_rank_doctors(self):
+        self.knowledge.record_call_result("d1", accepting_new_patients=False)
+        self.knowledge.record_call_result("d3", insurance="Aetna", accepts_insurance=True)
+        doctors = [Doctor(id=f"d{i}", name=f"Dr. {i}", specialization="Cardiology") for i in (1, 2, 3)]
+
+        with mock.patch("schedulur.services.office_knowledge_service.write_file") as write_file:
+            kept, dropped = self.knowledge.rank_doctors(doctors, "Aetna")
+
+        self.assertEqual([d.id for d in kept], ["d3", "d2"])
+        self.assertEqual([d.id for d in dropped], ["d1"])
+        # Counting a filtered search doesn't rewrite the file; the next recorded call does
+        write_file.assert_not_called()
+        self.assertEqual(self.knowledge.get_stats()["search_results_filtered"], 1)
+        self.knowledge.record_call_result("d2", accepting_new_patients=True)
+        self.assertEqual(read_file(self.path)["stats"]["search_results_filtered"], 1)
+
+    def test_stats_endpoint_requires_login(self):
+        with mock.patch.object(web_app, "_warm_up_started", True), \
+                mock.patch.object(web_app, "container", mock.Mock(office_knowledge=self.knowledge)):
+            client = web_app.app.test_client()
+            self.assertEqual(client.get("/api/office-knowledge/stats").status_code, 401)
+            with client.session_transaction() as session:
+                session["user_id"] = "user-1"
+            self.assertEqual(client.get("/api/office-knowledge/stats").get_json()["doctors_known"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from schedulur.utils.pagination import decode_cursor, encode_cursor, page_after, page_by, page_by_key, parse_fields
+
+class Item:
+    def __init__(self, id, rank):
+        self.id, self.rank = id, rank
+
+class TestPagination(unittest.TestCase):
+
+    def test_pages_cover_every_key_once(self):
+        models = {f"k{i:03d}": i for i in range(95)}
+        seen, cursor = [], None
+        while True:
+            items, cursor = page_by_key(models, 20, cursor)
+            seen.extend(items)
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(range(95)))
+
+    def test_pages_survive_inserts_before_the_cursor(self):
+        items = [Item(f"i{n}", n % 3) for n in range(10)]
+        key = lambda item: (item.rank, item.id)
+        first = page_by(items, key, 4)
+        items.insert(0, Item("a", 0))
+        second = page_by(items, key, 4, first.next_cursor)
+        # Keyset paging neither repeats nor skips records when earlier ones are added
+        self.assertEqual([key(i) for i in second.items], sorted(map(key, items))[5:9])
+
+    def test_unlimited_page_streams_the_rest(self):
+        models = {"a": 1, "b": 2, "c": 3}
+        first = page_by_key(models, 1)
+        self.assertEqual(list(page_by_key(models, None, first.next_cursor).items), [2, 3])
+
+    def test_ranked_results_continue_after_last_seen(self):
+        items = [Item(name, 0) for name in "zyxwv"]
+        first = page_after(items, 2)
+        self.assertEqual([i.id for i in page_after(items, 2, first.next_cursor).items], ["x", "w"])
+
+    def test_bad_input_is_rejected(self):
+        with self.assertRaises(ValueError):
+            decode_cursor("not a cursor")
+        # A valid encoding whose position doesn't compare with this listing's keys
+        with self.assertRaises(ValueError):
+            page_by([Item("a", 1.0)], lambda i: (i.rank, i.id), 10, encode_cursor(["x"]))
+        with self.assertRaises(ValueError):
+            parse_fields("name,password", {"id", "name"})
+        self.assertEqual(parse_fields("name", {"id", "name"}), {"id", "name"})
+
+if __name__ == "__main__":
+    unittest.main()
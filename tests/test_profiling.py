@@ -0,0 +1,93 @@
+import unittest
+import asyncio
+import io
+import os
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from unittest import mock
+
+import httpx
+
+from schedulur import main, profiling, web_app
+from schedulur.cli import CLI
+from schedulur.container import ServiceContainer
+from schedulur.profiling import ADMIN_TOKEN_ENV, Profile, StackSampler, admin_token_matches
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+class TestProfiling(unittest.TestCase):
+
+    def test_sampler_records_collapsed_stacks(self):
+        worker = threading.Thread(target=busy, args=(0.3,))
+        with StackSampler(interval=0.002) as sampler:
+            worker.start()
+            worker.join()
+        profile = sampler.profile
+
+        self.assertGreater(profile.samples, 10)
+        lines = profile.collapsed().splitlines()
+        (stack, count), = [line.rsplit(" ", 1) for line in lines if line.split(" ")[0].endswith(":busy")]
+        # Qualified names need Python 3.11; earlier versions report the bare "_bootstrap"
+        self.assertRegex(stack, r"^threading:(Thread\.)?_bootstrap;")
+        self.assertGreater(int(count), 10)
+        # This thread was waiting in join() the whole time, so it isn't in the profile
+        self.assertFalse(any("TestProfiling" in line for line in lines))
+
+        (top,) = profile.top_functions(modules=["tests.test_profiling"])
+        self.assertEqual((top["function"], top["total_percent"]), ("tests.test_profiling:busy", 100.0))
+
+    def test_frames_are_named_without_co_qualname(self):
+        code = mock.Mock(spec=["co_name"], co_name="dequeue")
+        frame = mock.Mock(f_globals={"__name__": "logging.handlers"}, f_code=code)
+        self.assertEqual(profiling._frame_name(frame), "logging.handlers:dequeue")
+        self.assertTrue(profiling._is_idle(frame))
+
+    def test_top_functions_separate_self_from_total(self):
+        profile = Profile({("a:main", "schedulur.services.x:outer", "schedulur.services.x:inner"): 3,
+                           ("a:main", "schedulur.services.x:outer", "json:dumps"): 1}, 4, 0.01, 0.04)
+        top = {entry["function"]: entry for entry in profile.top_functions()}
+        self.assertEqual((top["schedulur.services.x:outer"]["total"], top["schedulur.services.x:outer"]["self"]), (4, 1))
+        self.assertEqual(top["schedulur.services.x:inner"]["self_percent"], 75.0)
+
+    def test_endpoints_require_the_admin_token(self):
+        with mock.patch.dict(os.environ, {ADMIN_TOKEN_ENV: ""}):
+            self.assertFalse(admin_token_matches("anything"))
+
+        with mock.patch.dict(os.environ, {ADMIN_TOKEN_ENV: "secret"}), \
+                mock.patch.object(web_app, "_warm_up_started", True):
+            client = web_app.app.test_client()
+            denied = client.get("/admin/profile", headers={"Authorization": "Bearer wrong"})
+            folded = client.get("/admin/profile", query_string={"seconds": 0.05},
+                                headers={"Authorization": "Bearer secret"})
+
+            async def fetch():
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app),
+                                             base_url="http://test") as client:
+                    return await client.get("/admin/profile", params={"seconds": 0.05, "format": "json"},
+                                            headers={"Authorization": "secret"})
+            summary = asyncio.run(fetch())
+
+        self.assertEqual(denied.status_code, 403)
+        self.assertEqual(folded.status_code, 200)
+        self.assertIn("attachment", folded.headers["Content-Disposition"])
+        self.assertEqual(summary.status_code, 200)
+        self.assertEqual(set(summary.json()), {"seconds", "samples", "interval", "top", "collapsed"})
+
+    def test_cli_profile_flag(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "cli.folded")
+            cli = CLI(ServiceContainer(user_service=mock.Mock()))
+            output = io.StringIO()
+            with redirect_stdout(output), mock.patch.object(cli, "dispatch", side_effect=lambda args: busy(0.1)):
+                cli.run(["--profile", path, "store", "export"])
+            with open(path) as f:
+                self.assertIn("tests.test_profiling:busy", f.read())
+        self.assertIn(f"written to {path}", output.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import tempfile
+import json
+import os
+from datetime import datetime
+
+from pydantic import ValidationError
+
+from schedulur.models.appointment import Appointment
+from schedulur.models.doctor import Doctor, DoctorAvailability
+from schedulur.services.appointment_service import AppointmentService
+from schedulur.services.doctor_service import DoctorService
+from schedulur.storage.blob_store import BlobStore
+from schedulur.storage.records import SCHEMA_NAME, SCHEMA_VERSION, build_model, load_records, save_records
+
+class TestRecords(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "records.json")
+        self.store = BlobStore(os.path.join(self.temp_dir.name, "transcripts"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_trusted_build_matches_validation(self):
+        record = {
+            "id": "d1",
+            "name": "Dr. Smith",
+            "specialization": "Cardiology",
+            "accepted_insurance": ["Aetna"],
+            "availability": {"days": [0, 2], "time_slots": [{"day": 0, "start": "09:00", "end": "17:00"}]}
+        }
+        trusted = build_model(Doctor, record, trusted=True)
+        self.assertIsInstance(trusted.availability, DoctorAvailability)
+        self.assertEqual(trusted, Doctor(**record))
+
+        appointment = {"id": "a1", "doctor_id": "d1",
+                       "start_time": "2026-03-01T09:00:00", "end_time": "2026-03-01T09:30:00",
+                       "call_timestamp": None}
+        built = build_model(Appointment, appointment, trusted=True)
+        self.assertEqual(built.start_time, datetime(2026, 3, 1, 9))
+        self.assertEqual(built, Appointment(**appointment))
+
+    def test_untrusted_build_validates(self):
+        with self.assertRaises(ValidationError):
+            build_model(Doctor, {"name": "Dr. Smith", "specialization": "Cardiology", "appointment_duration": "long"})
+
+    def test_trusted_record_missing_required_field_is_validated(self):
+        with self.assertRaises(ValidationError):
+            build_model(Doctor, {"name": "Dr. Smith"}, trusted=True)
+
+    def test_only_current_schema_is_trusted(self):
+        save_records(self.path, {"a": {"id": "a"}})
+        self.assertEqual(load_records(self.path), ({"a": {"id": "a"}}, True))
+
+        with open(self.path, 'w') as f:
+            json.dump({"schema": SCHEMA_NAME, "version": SCHEMA_VERSION - 1, "records": {}}, f)
+        self.assertFalse(load_records(self.path)[1])
+
+        with open(self.path, 'w') as f:
+            json.dump({"a": {"id": "a"}}, f)
+        self.assertEqual(load_records(self.path), ({"a": {"id": "a"}}, False))
+
+    def test_legacy_file_is_restamped(self):
+        with open(self.path, 'w') as f:
+            json.dump({"d1": {"id": "d1", "name": "Dr. Smith", "specialization": "Cardiology"}}, f)
+
+        DoctorService(self.path, transcript_store=self.store)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)["version"], SCHEMA_VERSION)
+
+        reloaded = DoctorService(self.path, transcript_store=self.store)
+        self.assertEqual(reloaded.get_doctor("d1").name, "Dr. Smith")
+
+    def test_appointment_round_trip(self):
+        doctors = DoctorService(os.path.join(self.temp_dir.name, "doctors.json"), transcript_store=self.store)
+        doctors.create_doctor(Doctor(id="d1", name="Dr. Smith", specialization="Cardiology"))
+        service = AppointmentService(self.path, doctor_service=doctors, transcript_store=self.store)
+        appointment = service.create_appointment(Appointment(
+            doctor_id="d1", start_time=datetime(2026, 3, 1, 9), end_time=datetime(2026, 3, 1, 9, 30),
+            call_timestamp=datetime(2026, 2, 20, 14, 5)))
+
+        reloaded = AppointmentService(self.path, doctor_service=doctors, transcript_store=self.store)
+        self.assertEqual(reloaded.get_appointment(appointment.id), appointment)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import os
+from datetime import datetime, time
+from unittest import mock
+
+from schedulur.models.appointment import Appointment
+from schedulur.models.slot import Slot
+from schedulur.storage import serialization
+
+class TestSerialization(unittest.TestCase):
+
+    def setUp(self):
+        self.appointment = Appointment(id="a1", doctor_id="d1",
+                                       start_time=datetime(2026, 3, 2, 9, 0),
+                                       end_time=datetime(2026, 3, 2, 9, 30, 15, 250))
+        self.payload = {
+            "appointment": self.appointment,
+            "slots": [Slot.from_datetimes(datetime(2026, 3, 2, 9), datetime(2026, 3, 2, 10))],
+            "opens": time(8, 30),
+            "counts": {1: 2}
+        }
+        self.expected = {
+            "appointment": dict(self.appointment.to_dict(),
+                                start_time="2026-03-02T09:00:00", end_time="2026-03-02T09:30:15.000250"),
+            "slots": [{"start_time": "2026-03-02T09:00:00", "end_time": "2026-03-02T10:00:00"}],
+            "opens": "08:30:00",
+            "counts": {"1": 2}
+        }
+
+    def test_round_trip(self):
+        data = serialization.dumps(self.payload, pretty=False)
+        self.assertNotIn(b"\n", data)
+        self.assertEqual(serialization.loads(data), self.expected)
+
+    def test_stdlib_fallback_matches(self):
+        with mock.patch.object(serialization, "orjson", None):
+            data = serialization.dumps(self.payload, pretty=False)
+            self.assertEqual(serialization.loads(data), self.expected)
+
+    def test_pretty_is_opt_in(self):
+        with mock.patch.dict(os.environ, {serialization.PRETTY_ENV: "1"}):
+            self.assertIn(b"\n", serialization.dumps({"a": [1, 2]}))
+        with mock.patch.dict(os.environ, {serialization.PRETTY_ENV: ""}):
+            self.assertNotIn(b"\n", serialization.dumps({"a": [1, 2]}))
+
+    def test_unsupported_type(self):
+        with self.assertRaises(TypeError):
+            serialization.dumps({"a": object()})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import tempfile
+import json
+import os
+from datetime import datetime, timedelta
+from unittest import mock
+
+from schedulur.models.appointment import Appointment, AppointmentStatus
+from schedulur.models.doctor import Doctor
+from schedulur.models.user import User
+from schedulur.services.appointment_service import AppointmentService
+from schedulur.services.approval_service import ApprovalService
+from schedulur.services.doctor_service import DoctorService
+from schedulur.services.user_service import UserService
+from schedulur.storage.blob_store import BlobStore
+
+class TestShardedStores(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = BlobStore(os.path.join(self.temp_dir.name, "transcripts"))
+        self.doctors = DoctorService(data_file=self.path("doctors.json"), transcript_store=self.store)
+        self.doctors.create_doctor(Doctor(id="d1", name="Dr. Smith", specialization="Cardiology"))
+        self.doctors.create_doctor(Doctor(id="d2", name="Dr. Jones", specialization="Dermatology"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.temp_dir.name, name)
+
+    def make_appointments(self):
+        return AppointmentService(data_file=self.path("appointments.json"), doctor_service=self.doctors,
+                                  communication_service=mock.Mock(), transcript_store=self.store,
+                                  transcript_index=mock.Mock(), office_knowledge=mock.Mock(),
+                                  approval_service=ApprovalService(self.path("approvals"), self.doctors))
+
+    def appointment(self, user_id, appointment_id=None):
+        start = datetime.now() + timedelta(days=1)
+        return Appointment(id=appointment_id, user_id=user_id, doctor_id="d1",
+                           start_time=start, end_time=start + timedelta(minutes=30))
+
+    def test_approvals_are_per_user(self):
+        service = self.make_appointments()
+        self.assertTrue(service.approve_doctor_for_scheduling("d1", True, "u1"))
+        self.assertTrue(service.approve_doctor_for_scheduling("d2", False, "u2"))
+        self.assertFalse(service.approve_doctor_for_scheduling("missing", True, "u1"))
+
+        approvals = ApprovalService(self.path("approvals"), self.doctors)
+        self.assertEqual([d.id for d in approvals.get_approved_doctors("u1")], ["d1"])
+        self.assertEqual(approvals.get_approved_doctors("u2"), [])
+        self.assertEqual([d.id for d in approvals.get_rejected_doctors("u2")], ["d2"])
+        self.assertEqual([d.id for d in approvals.get_pending_doctors("u2")], ["d1"])
+        # The shared doctor record is untouched
+        self.assertIsNone(self.doctors.get_doctor("d1").user_approval)
+
+    def test_appointments_are_stored_per_user(self):
+        service = self.make_appointments()
+        service.create_appointment(self.appointment("u1", "a1"))
+        service.create_appointment(self.appointment("u2", "a2"))
+        shards = [name for name in os.listdir(self.path("appointments")) if name.endswith(".json")]
+        self.assertEqual(sorted(shards), ["u1.json", "u2.json"])
+
+        reloaded = self.make_appointments()
+        self.assertEqual([a.id for a in reloaded.get_user_appointments("u1")], ["a1"])
+        self.assertIsNone(reloaded.get_appointment("a2", user_id="u1"))
+        self.assertTrue(reloaded.cancel_appointment("a2"))
+        self.assertEqual(reloaded.get_appointment("a2", "u2").status, AppointmentStatus.CANCELLED)
+        self.assertEqual(len(reloaded.list_appointments()), 2)
+
+    def test_update_without_user_id_keeps_the_owner(self):
+        service = self.make_appointments()
+        service.event_bus = mock.Mock()
+        service.create_appointment(self.appointment("u1", "a1"))
+
+        change = service.get_appointment("a1", "u1").model_copy(update={"user_id": None, "notes": "Bring records"})
+        updated = service.update_appointment("a1", change)
+
+        self.assertEqual((updated.user_id, updated.notes), ("u1", "Bring records"))
+        self.assertEqual(self.make_appointments().get_appointment("a1", "u1").user_id, "u1")
+        self.assertEqual(service.event_bus.publish.call_args.args[:2], ("u1", "appointment"))
+
+        # Naming a different user is refused rather than reported as a missing appointment
+        with self.assertRaises(ValueError):
+            service.update_appointment("a1", updated.model_copy(update={"user_id": "u2"}))
+        self.assertIsNone(service.update_appointment("missing", updated.model_copy(update={"user_id": "u2"})))
+
+    def test_data_version_tracks_writes_without_listing_shards(self):
+        service = self.make_appointments()
+        other_worker = self.make_appointments()
+        service.create_appointment(self.appointment("u1", "a1"))
+        before = service.data_version()
+
+        service.create_appointment(self.appointment("u1", "a2"))
+        self.assertNotEqual(service.data_version(), before)
+
+        # Once the directory has settled, one stat is enough
+        settled = os.stat(service.store.root).st_mtime - 60
+        os.utime(service.store.root, (settled, settled))
+        with mock.patch.object(service.store, "user_ids", wraps=service.store.user_ids) as user_ids:
+            before = service.data_version()
+            self.assertEqual(service.data_version(), before)
+        user_ids.assert_not_called()
+
+        # Another worker's save renames a file into the directory
+        other_worker.create_appointment(self.appointment("u2", "a3"))
+        self.assertNotEqual(service.data_version(), before)
+
+    def test_legacy_files_are_migrated(self):
+        legacy = {"a1": self.appointment("u1", "a1").to_dict(), "a2": self.appointment("u2", "a2").to_dict()}
+        with open(self.path("appointments.json"), "w") as f:
+            json.dump(legacy, f, default=str)
+        users = UserService(data_file=self.path("users.json"))
+        users.create_user(User(id="u1", name="Pat", email="pat@example.com"))
+        approved = self.doctors.get_doctor("d2")
+        approved.user_approval = True
+        self.doctors.update_doctor("d2", approved)
+
+        service = self.make_appointments()
+        self.assertEqual([a.id for a in service.get_user_appointments("u2")], ["a2"])
+        approvals = ApprovalService(self.path("approvals"), self.doctors, users)
+        self.assertEqual(approvals.get_approvals("u1"), {"d2": True})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import time as clock
+import unittest
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+from schedulur.container import ServiceContainer, set_container
+from schedulur.integrations.calendar import CalendarService
+from schedulur.models.appointment import Appointment
+from schedulur.models.doctor import Doctor, DoctorSummary
+from schedulur.models.provider import Provider
+from schedulur.models.slot import Slot
+from schedulur.models.user import User, UserAvailability
+from schedulur.utils.scheduling import SchedulingOptimizer
+
+class TestSlots(unittest.TestCase):
+
+    def test_slot_round_trip(self):
+        start, end = datetime(2026, 3, 2, 9, 0), datetime(2026, 3, 2, 9, 30)
+        slot = Slot.from_datetimes(start, end)
+        self.assertEqual((slot.start_time, slot.end_time), (start, end))
+        self.assertEqual(slot.duration_minutes, 30)
+        self.assertEqual(slot.to_dict(), {"start": start, "end": end})
+
+    def test_calendar_slots_skip_busy_periods(self):
+        calendar = CalendarService("mock")
+        calendar.provider.events = [{
+            "id": "event-1", "title": "Busy",
+            "start": datetime(2026, 3, 2, 10, 0), "end": datetime(2026, 3, 2, 11, 0)
+        }]
+        slots = calendar.find_available_slots(
+            datetime(2026, 3, 2), days=1,
+            time_preferences=[{"day": 0, "start": "09:00", "end": "12:00"}])
+
+        self.assertTrue(all(isinstance(slot, Slot) for slot in slots))
+        self.assertEqual([slot.start_time.strftime("%H:%M") for slot in slots], ["09:00", "09:15", "09:30", "11:00", "11:15", "11:30"])
+
+    def test_provider_slots(self):
+        provider = Provider(id="p1", name="Dr. Lee", specialization="Cardiology", location="Clinic",
+                            email="lee@example.com", phone="555-0100", appointment_duration=60,
+                            available_times=[{"day": 0, "start_time": time(9, 0), "end_time": time(12, 0)}])
+        busy = [(int(datetime(2026, 3, 2, 10).timestamp()), int(datetime(2026, 3, 2, 11).timestamp()))]
+
+        slots = SchedulingOptimizer.provider_slots(provider, datetime(2026, 3, 2), days=7, busy=busy)
+        self.assertEqual([slot.start_time for slot in slots], [datetime(2026, 3, 2, 9), datetime(2026, 3, 2, 11)])
+
+    def test_provider_slots_when_clocks_change(self):
+        provider = Provider(id="p1", name="Dr. Lee", specialization="Cardiology", location="Clinic",
+                            email="lee@example.com", phone="555-0100", appointment_duration=30,
+                            available_times=[{"day": 6, "start_time": "09:00", "end_time": "10:00"}])
+        try:
+            with mock.patch.dict(os.environ, {"TZ": "America/Los_Angeles"}):
+                clock.tzset()
+                # Daylight saving time starts at 2:00 on Sunday 2026-03-08
+                slots = SchedulingOptimizer.provider_slots(provider, datetime(2026, 3, 8), busy=[])
+                starts = [slot.start_time.strftime("%H:%M") for slot in slots]
+        finally:
+            clock.tzset()
+        self.assertEqual(starts, ["09:00", "09:30"])
+
+    def test_best_providers_read_appointments_once(self):
+        tomorrow = datetime.combine(datetime.now().date() + timedelta(days=1), time(9))
+        providers = [Provider(id=f"p{i}", name=f"Dr. {i}", specialization="Cardiology", location="Clinic",
+                              email="dr@example.com", phone="555-0100", accepted_insurance=["Aetna"],
+                              available_times=[{"day": tomorrow.weekday(), "start_time": "09:00",
+                                                "end_time": "10:00"}])
+                     for i in (1, 2)]
+        appointments = mock.Mock()
+        appointments.get_appointments_by_provider.return_value = {"p1": [Appointment(
+            id="a1", doctor_id="p1", start_time=tomorrow, end_time=tomorrow + timedelta(minutes=30))]}
+        user = User(name="Pat", email="pat@example.com", insurance_provider="Aetna",
+                    availability=UserAvailability(days=[tomorrow.weekday()]))
+
+        set_container(ServiceContainer(appointment_service=appointments))
+        try:
+            with mock.patch("schedulur.services.provider_service.ProviderService.list_providers",
+                            return_value=providers):
+                results = SchedulingOptimizer.find_best_providers(user)
+        finally:
+            set_container(None)
+
+        appointments.get_appointments_by_provider.assert_called_once_with()
+        appointments.get_provider_appointments.assert_not_called()
+        slots = {r["provider"].id: r["total_available_slots"] for r in results}
+        # Each provider has two slots tomorrow; p1's first is booked
+        self.assertEqual(slots["p2"] - slots["p1"], 1)
+
+class TestDoctorSummary(unittest.TestCase):
+
+    def test_to_doctor_keeps_source_fields(self):
+        record = {"id": "d1", "name": "Dr. Smith", "specialization": "Cardiology",
+                  "npi": "1234567890", "accepted_insurance": ["Aetna"]}
+        summary = DoctorSummary.from_dict(record)
+        summary.distance_miles = 4.0
+
+        doctor = summary.to_doctor()
+        self.assertEqual(doctor.npi, "1234567890")
+        self.assertEqual(doctor.distance_miles, 4.0)
+        self.assertFalse(hasattr(summary, "__dict__"))
+
+    def test_from_doctor(self):
+        doctor = Doctor(id="d2", name="Dr. Jones", specialization="Dermatology", call_notes="Call back Monday")
+        summary = DoctorSummary.from_doctor(doctor)
+        summary.user_approval = True
+
+        self.assertEqual(summary.to_doctor().call_notes, "Call back Monday")
+        self.assertTrue(summary.to_doctor().user_approval)
+        self.assertIsNone(doctor.user_approval)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import tempfile
+import os
+from unittest import mock
+
+from schedulur.models.doctor import Doctor
+from schedulur.services.doctor_service import DoctorService
+from schedulur.storage.blob_store import BlobStore
+from schedulur.storage.records import STORE_FORMAT_ENV, export_snapshot, load_records, save_records, snapshot_path
+from schedulur.storage.snapshot import CODEC_JSON, LazyModels, Snapshot, write_snapshot
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "doctors.json")
+        self.store = BlobStore(os.path.join(self.temp_dir.name, "transcripts"))
+        patcher = mock.patch.dict(os.environ, {STORE_FORMAT_ENV: "snapshot"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_service(self):
+        return DoctorService(data_file=self.path, transcript_store=self.store)
+
+    def test_snapshot_records(self):
+        path = os.path.join(self.temp_dir.name, "records.snap")
+        write_snapshot(path, [("a", {"n": 1}), ("b", {"n": 2})], schema_version=1, codec=CODEC_JSON)
+
+        snapshot = Snapshot(path)
+        self.assertEqual(len(snapshot), 2)
+        self.assertEqual(snapshot.get("b"), {"n": 2})
+        self.assertIsNone(snapshot.get("c"))
+        snapshot.close()
+
+    def test_service_loads_records_on_demand(self):
+        service = self.make_service()
+        for i in range(5):
+            service.create_doctor(Doctor(id=f"d{i}", name=f"Dr. {i}", specialization="Cardiology",
+                                         available_times=[{"day": 0, "start_time": "09:00", "end_time": "12:00"}]))
+        self.assertTrue(os.path.exists(snapshot_path(self.path)))
+
+        reloaded = self.make_service()
+        self.assertIsInstance(reloaded.doctors, LazyModels)
+        self.assertEqual(reloaded.get_doctor("d3"), service.get_doctor("d3"))
+        self.assertEqual(reloaded.doctors.loaded_count, 1)
+
+        # Untouched records survive a save; changes and deletes are kept
+        reloaded.delete_doctor("d1")
+        doctor = reloaded.get_doctor("d3")
+        doctor.call_notes = "Call back Monday"
+        reloaded.update_doctor("d3", doctor)
+
+        again = self.make_service()
+        self.assertEqual(sorted(again.doctors), ["d0", "d2", "d3", "d4"])
+        self.assertEqual(again.get_doctor("d3").call_notes, "Call back Monday")
+        self.assertEqual(again.get_doctor("d4"), service.get_doctor("d4"))
+
+    def test_export_and_import_json(self):
+        service = self.make_service()
+        service.create_doctor(Doctor(id="d1", name="Dr. Smith", specialization="Cardiology"))
+
+        self.assertEqual(export_snapshot(self.path), 1)
+        records, trusted = load_records(self.path)
+        self.assertTrue(trusted)
+        self.assertEqual(records["d1"]["name"], "Dr. Smith")
+        self.assertIsInstance(self.make_service().doctors, LazyModels)
+
+        # A JSON file newer than the snapshot is imported
+        records["d1"]["name"] = "Dr. Jones"
+        os.utime(snapshot_path(self.path), (0, 0))
+        save_records(self.path, records)
+
+        imported = self.make_service()
+        self.assertEqual(imported.get_doctor("d1").name, "Dr. Jones")
+        self.assertEqual(self.make_service().get_doctor("d1").name, "Dr. Jones")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import io
+import os
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from unittest import mock
+
+from schedulur import web_app
+from schedulur.cli import CLI
+from schedulur.container import ServiceContainer
+from schedulur.profiling import ADMIN_TOKEN_ENV
+from schedulur.tracing import (Tracer, format_trace, propagate, read_trace_file, recent_traces, set_tracer, span,
+                               trace_context, traced)
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "traces.jsonl")
+        self.tracer = Tracer(buffer_size=100, path=self.path)
+        set_tracer(self.tracer)
+
+    def tearDown(self):
+        set_tracer(None)
+        self.temp_dir.cleanup()
+
+    def by_name(self):
+        return {s["name"]: s for s in self.tracer.spans()}
+
+    def test_spans_nest_and_record_errors(self):
+        @traced("inner")
+        def fail():
+            raise ValueError("no slots")
+
+        with span("outer", user_id="u1"):
+            with self.assertRaises(ValueError):
+                fail()
+            # Work handed to a thread continues the trace
+            worker = threading.Thread(target=propagate(traced("background")(lambda: None)))
+            worker.start()
+            worker.join()
+
+        spans = self.by_name()
+        self.assertEqual(spans["inner"]["parent_id"], spans["outer"]["span_id"])
+        self.assertEqual(spans["background"]["parent_id"], spans["outer"]["span_id"])
+        self.assertEqual(spans["inner"]["error"], "ValueError: no slots")
+        self.assertEqual(spans["outer"]["attributes"], {"user_id": "u1"})
+        self.assertGreaterEqual(spans["outer"]["duration_ms"], spans["inner"]["duration_ms"])
+        self.assertEqual(trace_context(), {})
+
+        lines = list(format_trace(self.tracer.spans()))
+        self.assertTrue(lines[0].endswith("outer  user_id=u1"))
+        self.assertIn("  inner", lines[1])
+        # Everything was also written to the trace file
+        self.assertEqual([s["name"] for s in read_trace_file(self.path)], ["inner", "background", "outer"])
+
+    def test_webhook_continues_the_trace_of_the_call(self):
+        with span("appointment.schedule_with_doctor"):
+            metadata = {"doctor_id": "d1", **trace_context()}
+
+        with mock.patch.object(web_app, "_warm_up_started", True), mock.patch.object(web_app, "container"):
+            client = web_app.app.test_client()
+            page = client.get("/login", headers={"X-Request-ID": "req-1"})
+            client.post("/api/retell_webhook", json={"event": "call_started",
+                                                     "call": {"call_id": "c1", "metadata": metadata}})
+            with mock.patch.dict(os.environ, {ADMIN_TOKEN_ENV: "secret"}):
+                self.assertEqual(client.get("/api/traces").status_code, 403)
+                listed = client.get("/api/traces", query_string={"trace_id": "req-1"},
+                                    headers={"Authorization": "Bearer secret"}).get_json()
+
+        self.assertEqual(page.headers["X-Request-ID"], "req-1")
+        self.assertEqual([s["name"] for s in listed["traces"][0]["spans"]], ["GET login"])
+        self.assertEqual(listed["traces"][0]["spans"][0]["attributes"]["status"], 200)
+
+        spans = self.by_name()
+        self.assertEqual(spans["retell.webhook"]["trace_id"], metadata["trace_id"])
+        self.assertEqual(spans["retell.webhook"]["parent_id"], metadata["span_id"])
+        self.assertEqual(spans["retell.receive_webhook"]["parent_id"], spans["retell.webhook"]["span_id"])
+
+    def test_cli_shows_traces_from_the_file(self):
+        with span("POST schedule"):
+            with span("retell.create_call"):
+                pass
+        with span("GET login"):
+            pass
+        self.assertEqual([t["spans"][-1]["name"] for t in recent_traces(self.tracer.spans())],
+                         ["GET login", "POST schedule"])
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            CLI(ServiceContainer(user_service=mock.Mock())).run(["traces", "--file", self.path, "--limit", "1"])
+        self.assertIn("GET login", output.getvalue())
+        self.assertNotIn("POST schedule", output.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import tempfile
+import os
+from datetime import datetime
+from unittest import mock
+
+from schedulur import web_app
+from schedulur.storage.blob_store import BlobStore
+from schedulur.storage.transcript_index import TranscriptIndex
+
+class TestTranscriptIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.index = TranscriptIndex(
+            os.path.join(self.temp_dir.name, "transcripts.db"),
+            BlobStore(os.path.join(self.temp_dir.name, "blobs"))
+        )
+        self.index.index_call("call-1", "Sorry, we're not taking new patients right now.",
+                              doctor_id="doc-1", user_id="user-1", call_time=datetime(2025, 1, 10))
+        self.index.index_call("call-2", "We accept Medicaid and Medicare. Tuesday works.",
+                              doctor_id="doc-2", user_id="user-1", call_time=datetime(2025, 2, 10))
+        self.index.index_call("call-3", "We only take Medicare at this office.",
+                              doctor_id="doc-3", user_id="user-2", call_time=datetime(2025, 3, 10))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def keys(self, results):
+        return sorted(r["call_key"] for r in results)
+
+    def test_phrase_query(self):
+        results = self.index.search('"not taking new patients"')
+        self.assertEqual(self.keys(results), ["call-1"])
+
+    def test_boolean_query(self):
+        self.assertEqual(self.keys(self.index.search("medicare")), ["call-2", "call-3"])
+        self.assertEqual(self.keys(self.index.search("medicare NOT medicaid")), ["call-3"])
+
+    def test_filters(self):
+        self.assertEqual(self.keys(self.index.search("medicare", user_id="user-1")), ["call-2"])
+        self.assertEqual(self.keys(self.index.search("medicare", doctor_id="doc-3")), ["call-3"])
+        self.assertEqual(self.keys(self.index.search("medicare", since=datetime(2025, 3, 1))), ["call-3"])
+
+    def test_reindex_replaces_transcript(self):
+        self.index.index_call("call-1", "Yes, we are accepting new patients.", doctor_id="doc-1")
+
+        self.assertEqual(self.index.search('"not taking"'), [])
+        self.assertEqual(self.keys(self.index.search('"accepting new patients"')), ["call-1"])
+        self.assertEqual(self.index.count(), 3)
+
+    def test_invalid_query(self):
+        with self.assertRaises(ValueError):
+            self.index.search('"unbalanced')
+
+    def test_search_endpoint_only_searches_own_calls(self):
+        container = mock.Mock(transcript_index=self.index)
+        with mock.patch.object(web_app, "_warm_up_started", True), \
+                mock.patch.object(web_app, "container", container):
+            client = web_app.app.test_client()
+            with client.session_transaction() as session:
+                session["user_id"] = "user-1"
+            # Asking for someone else's calls still searches only the user's own
+            results = client.get("/api/calls/search",
+                                 query_string={"q": "medicare", "user_id": "user-2", "limit": -1}).get_json()
+
+        self.assertEqual(self.keys(results["results"]), ["call-2"])
+
+if __name__ == "__main__":
+    unittest.main()
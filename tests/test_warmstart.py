@@ -0,0 +1,62 @@
+import unittest
+import tempfile
+import os
+from unittest import mock
+
+from schedulur import warmstart
+from schedulur.container import ServiceContainer
+from schedulur.models.doctor import Doctor
+from schedulur.models.user import User
+from schedulur.services.doctor_service import DoctorService
+from schedulur.services.user_service import UserService
+from schedulur.storage.blob_store import BlobStore
+from schedulur.storage.snapshot import LazyModels
+
+class TestWarmStart(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.temp_dir.name, "warmstart.snap")
+        self.store = BlobStore(os.path.join(self.temp_dir.name, "transcripts"))
+        patcher = mock.patch.dict(os.environ, {warmstart.WARMSTART_ENV: "1", warmstart.WARMSTART_FILE_ENV: self.file})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.temp_dir.name, f"{name}.json")
+
+    def build(self):
+        users = UserService(data_file=self.path("users"))
+        users.create_user(User(id="u1", name="Pat", email="pat@example.com"))
+        doctors = DoctorService(data_file=self.path("doctors"), transcript_store=self.store)
+        doctors.create_doctor(Doctor(id="d1", name="Dr. Smith", specialization="Cardiology"))
+
+        container = ServiceContainer(user_service=users, doctor_service=doctors,
+                                     doctor_search_service=object(), transcript_index=mock.Mock())
+        self.assertEqual(warmstart.build(container, self.file), 2)
+
+    def test_services_load_from_warmstart_file(self):
+        self.build()
+
+        users = UserService(data_file=self.path("users"))
+        doctors = DoctorService(data_file=self.path("doctors"), transcript_store=self.store)
+        self.assertIsInstance(users.users, LazyModels)
+        self.assertEqual(users.get_user("u1").email, "pat@example.com")
+        self.assertEqual(doctors.get_doctor("d1").name, "Dr. Smith")
+        self.assertEqual(list(doctors.doctors), ["d1"])
+
+    def test_newer_store_file_wins(self):
+        self.build()
+
+        users = UserService(data_file=self.path("users"))
+        users.create_user(User(id="u2", name="Sam", email="sam@example.com"))
+
+        reloaded = UserService(data_file=self.path("users"))
+        self.assertNotIsInstance(reloaded.users, LazyModels)
+        self.assertEqual(sorted(reloaded.users), ["u1", "u2"])
+
+if __name__ == "__main__":
+    unittest.main()